@@ -0,0 +1,4 @@
+# src/analytics/__init__.py
+from .queueing import QueueEstimate, Prescreen, mmck, mgck, estimate, divergence
+
+__all__ = ["QueueEstimate", "Prescreen", "mmck", "mgck", "estimate", "divergence"]
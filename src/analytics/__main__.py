@@ -0,0 +1,4 @@
+# src/analytics/__main__.py
+from .queueing import main
+
+main()
@@ -0,0 +1,228 @@
+# src/analytics/queueing.py
+"""
+Аналитические оценки для предварительного отбора точек перебора без моделирования.
+Система из ModelConfig рассматривается как c приборов и K = c + размер буфера мест:
+M/M/c/K решается точно, M/G/c/K (и G/G/c/K) - двухмоментными приближениями.
+
+При дисциплине Д10О1 поступление в полную систему вытесняет заявку из буфера, а на
+ее место ставится заглушка, поэтому число заявок в системе меняется так же, как при
+потере поступившей заявки в M/G/c/K. Расхождения с моделированием возникают из-за
+того, что часть вытесненных - сами заглушки (отказ засчитывается источнику -1),
+и из-за несовпадения законов распределения с приближениями.
+"""
+import argparse
+import math
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Tuple
+
+from ..config import ModelConfig
+from ..rng.variates import make_distribution
+
+METHODS = ("exact", "allen_cunneen", "diffusion")
+
+
+@dataclass
+class QueueEstimate:
+    method: str
+    arrival_rate: float
+    mean_service: float
+    servers: int
+    capacity: int
+    arrival_scv: float
+    service_scv: float
+    offered_load: float  # a = λ·E[S], среднее число занятых приборов без потерь
+    rho: float  # a / c
+    rejection_probability: float
+    utilization: float
+    mean_in_system: float
+    mean_in_queue: float
+    mean_wait: float
+    mean_time_in_system: float
+    time_unit_us: float = 1.0
+
+    @property
+    def exact(self) -> bool:
+        return self.method == "exact"
+
+    @property
+    def mean_wait_us(self) -> float:
+        return self.mean_wait * self.time_unit_us
+
+    @property
+    def mean_time_in_system_us(self) -> float:
+        return self.mean_time_in_system * self.time_unit_us
+
+
+def _state_probabilities(offered_load: float, servers: int, capacity: int,
+                         queue_decay_power: float = 1.0) -> List[float]:
+    """
+    Стационарные вероятности числа заявок 0..K. Для n <= c - как в M/M/c/K, для очереди
+    p(c+j) = p(c)·ρ^(j/z): при z = 1 это точное решение M/M/c/K, при z = (ca² + cs²)/2 -
+    диффузионное приближение хвоста очереди. Считается в логарифмах, чтобы не
+    переполняться при больших K и ρ > 1.
+    """
+    if offered_load <= 0:
+        return [1.0] + [0.0] * capacity
+    log_a = math.log(offered_load)
+    log_rho = log_a - math.log(servers)
+    logs = [0.0]
+    for n in range(1, capacity + 1):
+        if n <= servers:
+            logs.append(logs[-1] + log_a - math.log(n))
+        else:
+            logs.append(logs[-1] + log_rho / queue_decay_power)
+    top = max(logs)
+    weights = [math.exp(x - top) for x in logs]
+    total = sum(weights)
+    return [w / total for w in weights]
+
+
+def _from_probabilities(method: str, probabilities: List[float], arrival_rate: float, mean_service: float,
+                        servers: int, arrival_scv: float, service_scv: float, wait_scale: float,
+                        time_unit_us: float) -> QueueEstimate:
+    capacity = len(probabilities) - 1
+    offered_load = arrival_rate * mean_service
+    blocking = probabilities[-1]
+    throughput = arrival_rate * (1.0 - blocking)
+    # Среднее число занятых приборов по формуле Литтла (точно при любых распределениях)
+    mean_busy = throughput * mean_service
+    mean_in_queue = sum((n - servers) * p for n, p in enumerate(probabilities) if n > servers) * wait_scale
+    mean_wait = mean_in_queue / throughput if throughput > 0 else math.inf
+    return QueueEstimate(
+        method=method, arrival_rate=arrival_rate, mean_service=mean_service, servers=servers,
+        capacity=capacity, arrival_scv=arrival_scv, service_scv=service_scv,
+        offered_load=offered_load, rho=offered_load / servers,
+        rejection_probability=blocking, utilization=mean_busy / servers,
+        mean_in_system=mean_busy + mean_in_queue, mean_in_queue=mean_in_queue,
+        mean_wait=mean_wait, mean_time_in_system=mean_wait + mean_service,
+        time_unit_us=time_unit_us,
+    )
+
+
+def mmck(arrival_rate: float, mean_service: float, servers: int, capacity: int,
+         time_unit_us: float = 1.0) -> QueueEstimate:
+    """Точное решение M/M/c/K (пуассоновский поток, экспоненциальное обслуживание)."""
+    if capacity < servers:
+        raise ValueError("System capacity must be at least the number of servers")
+    probabilities = _state_probabilities(arrival_rate * mean_service, servers, capacity)
+    return _from_probabilities("exact", probabilities, arrival_rate, mean_service, servers,
+                               1.0, 1.0, 1.0, time_unit_us)
+
+
+def mgck(arrival_rate: float, mean_service: float, servers: int, capacity: int,
+         arrival_scv: float = 1.0, service_scv: float = 1.0, method: str = "diffusion",
+         time_unit_us: float = 1.0) -> QueueEstimate:
+    """
+    Двухмоментные приближения для G/G/c/K с параметром изменчивости z = (ca² + cs²)/2:
+    "allen_cunneen" - вероятности M/M/c/K, длина очереди умножается на z;
+    "diffusion" - хвост очереди убывает как ρ^(j/z), длина очереди по этим вероятностям.
+    """
+    if capacity < servers:
+        raise ValueError("System capacity must be at least the number of servers")
+    variability = max((arrival_scv + service_scv) / 2, 1e-6)
+    offered_load = arrival_rate * mean_service
+    if method == "exact":
+        return mmck(arrival_rate, mean_service, servers, capacity, time_unit_us)
+    if method == "allen_cunneen":
+        probabilities = _state_probabilities(offered_load, servers, capacity)
+        wait_scale = variability
+    elif method == "diffusion":
+        probabilities = _state_probabilities(offered_load, servers, capacity, variability)
+        wait_scale = 1.0
+    else:
+        raise NotImplementedError(f"Approximation {method} not implemented")
+    return _from_probabilities(method, probabilities, arrival_rate, mean_service, servers,
+                               arrival_scv, service_scv, wait_scale, time_unit_us)
+
+
+def arrival_moments(config: ModelConfig, rho: float) -> Tuple[float, float]:
+    """
+    Интенсивность и квадрат коэффициента вариации суммарного потока источников.
+    Суперпозиция одинаковых потоков - гибридное приближение QNA (Whitt).
+    """
+    interarrival = make_distribution(config.arrival, config.generation_interval)
+    count = config.num_sources
+    rate = count / interarrival.mean
+    weight = 1.0 / (1.0 + 4.0 * (1.0 - min(rho, 1.0)) ** 2 * (count - 1))
+    return rate, weight * interarrival.scv + 1.0 - weight
+
+
+def service_moments(config: ModelConfig) -> Tuple[float, float]:
+    service = make_distribution(config.service_distribution,
+                                mean=(config.service_time_min + config.service_time_max) / 2,
+                                low=config.service_time_min, high=config.service_time_max)
+    return service.mean, service.scv
+
+
+def estimate(config: ModelConfig, method: Optional[str] = None, time_unit_us: float = 1.0) -> QueueEstimate:
+    """
+    Оценка для конфигурации модели. По умолчанию точное решение, если поток пуассоновский
+    и обслуживание экспоненциальное, иначе диффузионное приближение.
+    time_unit_us - длительность единицы модельного времени в микросекундах.
+    """
+    if config.arrival_trace:
+        raise ValueError("Analytic estimate is not available for trace-driven arrivals")
+    mean_service, service_scv = service_moments(config)
+    rate = config.num_sources / config.generation_interval
+    rate, arrival_scv = arrival_moments(config, rate * mean_service / config.num_devices)
+    if method is None:
+        poisson = config.arrival in ("poisson", "exponential")
+        method = "exact" if poisson and config.service_distribution == "exponential" else "diffusion"
+    return mgck(rate, mean_service, config.num_devices, config.num_devices + config.buffer_size,
+                arrival_scv, service_scv, method, time_unit_us)
+
+
+@dataclass
+class Prescreen:
+    """
+    Правила отбора точек: явно перегруженные и явно недогруженные точки не моделируются
+    ("skip"), точки, где аналитика точна, моделируются укороченным прогоном ("coarsen"),
+    остальные - полностью ("simulate").
+    """
+    overload_rho: float = 2.0
+    idle_rho: float = 0.2
+    idle_rejection: float = 1e-6
+    coarsen_exact: bool = True
+    coarsen_factor: int = 10
+
+    def decide(self, estimate: QueueEstimate) -> str:
+        if estimate.rho >= self.overload_rho or (
+                estimate.rho <= self.idle_rho and estimate.rejection_probability <= self.idle_rejection):
+            return "skip"
+        if self.coarsen_exact and estimate.exact:
+            return "coarsen"
+        return "simulate"
+
+    def coarsen(self, config: ModelConfig) -> ModelConfig:
+        tasks = max(1, config.tasks_per_source // self.coarsen_factor)
+        return ModelConfig(**{**config.to_dict(), "tasks_per_source": tasks})
+
+
+def divergence(estimate: QueueEstimate, rejection_probability: float, utilization: float,
+               mean_time_in_system: float) -> Dict[str, float]:
+    """Расхождение моделирования с аналитикой: абсолютное для вероятностей, относительное для времени."""
+    return {
+        "rejection_divergence": rejection_probability - estimate.rejection_probability,
+        "utilization_divergence": utilization - estimate.utilization,
+        "time_in_system_relative_error": (mean_time_in_system / estimate.mean_time_in_system - 1.0
+                                          if estimate.mean_time_in_system > 0 else math.nan),
+    }
+
+
+def main(argv=None):
+    from ..experiments.replication import add_config_arguments, config_from_args
+    parser = argparse.ArgumentParser(description="Аналитическая оценка модели СМО (M/M/c/K, M/G/c/K)")
+    add_config_arguments(parser)
+    parser.add_argument("--method", choices=METHODS, default=None)
+    parser.add_argument("--time-unit-us", type=float, default=1.0,
+                        help="длительность единицы модельного времени в микросекундах")
+    args = parser.parse_args(argv)
+    result = estimate(config_from_args(args), args.method, args.time_unit_us)
+    for f in fields(result):
+        print(f"{f.name}: {getattr(result, f.name)}")
+    print(f"mean_wait_us: {result.mean_wait_us}")
+    print(f"mean_time_in_system_us: {result.mean_time_in_system_us}")
+
+
+if __name__ == "__main__":
+    main()
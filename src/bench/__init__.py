@@ -0,0 +1 @@
+# src/bench/__init__.py
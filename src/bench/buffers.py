@@ -0,0 +1,101 @@
+# src/bench/buffers.py
+"""
+Сравнение дисциплин буфера: время пары операций "поступление + выбор" на заполненном
+буфере при разном числе источников и емкости, память на заявку в буфере (tracemalloc)
+и события в секунду в перегруженной модели склада. Запуск: python -m src.bench.buffers
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from dataclasses import replace
+from typing import Tuple
+
+from ..components.disciplines import BUFFER_DISCIPLINES, create_buffer
+from ..config import ModelConfig, build_model
+from ..models.task_table import TaskTable
+
+DEFAULT_CAPACITIES = [10, 1_000, 100_000]
+DEFAULT_SOURCES = [4, 1_000]
+
+
+def buffer_benchmark(discipline: str, capacity: int, num_sources: int, operations: int,
+                     seed: int = 1) -> Tuple[float, float]:
+    """
+    Возвращает (нс на пару поступление + выбор, байт на заявку в буфере).
+    Буфер все время заполнен: каждое поступление проходит через дисциплину вытеснения.
+    """
+    rng = random.Random(seed)
+    sources = [rng.randrange(1, num_sources + 1) for _ in range(4096)]
+    tasks = TaskTable()
+    buffer = create_buffer(discipline, capacity)
+    buffer.tasks = tasks
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for i in range(capacity):
+        buffer.enqueue(tasks.create(i, sources[i & 4095], float(i)), float(i))
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Таблица заявок общая для всех дисциплин, в память буфера не входит
+    bytes_per_task = (after - before - _table_bytes(tasks)) / capacity
+
+    now = float(capacity)
+    create, release = tasks.create, tasks.release
+    enqueue, dequeue = buffer.enqueue, buffer.dequeue
+    replace_policy = buffer.apply_replacement_policy
+    places_arrival = buffer.places_arrival
+    started = time.perf_counter()
+    for i in range(operations):
+        now += 1.0
+        task = create(i, sources[i & 4095], now)
+        rejected = replace_policy(now, task)
+        if rejected is not None:
+            release(rejected)
+        if not places_arrival:
+            release(task)
+        release(dequeue(now))
+        task = create(i, sources[(i + 7) & 4095], now)
+        enqueue(task, now)
+    return (time.perf_counter() - started) / operations * 1e9, bytes_per_task
+
+
+def _table_bytes(tasks: TaskTable) -> int:
+    return sum(getattr(tasks, name).buffer_info()[1] * getattr(tasks, name).itemsize
+               for name in TaskTable.COLUMNS)
+
+
+def model_benchmark(discipline: str, events: int = 200_000) -> float:
+    """События в секунду в перегруженной модели (8 источников, 2 прибора, буфер 50)."""
+    config = ModelConfig(num_sources=8, num_devices=2, buffer_size=50, generation_interval=5.0,
+                         arrival="poisson", tasks_per_source=10 ** 12)
+    dispatcher = build_model(replace(config, buffer_discipline=discipline), seed=1).dispatcher
+    dispatcher.run(max_events=events // 10)
+    started = time.perf_counter()
+    processed = dispatcher.run(max_events=events)
+    return processed / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение дисциплин буфера")
+    parser.add_argument("--capacities", type=int, nargs="+", default=DEFAULT_CAPACITIES)
+    parser.add_argument("--sources", type=int, nargs="+", default=DEFAULT_SOURCES)
+    parser.add_argument("--operations", type=int, default=100_000)
+    parser.add_argument("--events", type=int, default=200_000, help="событий в прогоне модели")
+    args = parser.parse_args(argv)
+
+    disciplines = list(BUFFER_DISCIPLINES)
+    print(f"{'Дисциплина':<20} {'емкость':>8} {'источн.':>8} {'нс на пару':>11} {'Б на заявку':>12}")
+    for discipline in disciplines:
+        for capacity in args.capacities:
+            for num_sources in args.sources:
+                ns, per_task = buffer_benchmark(discipline, capacity, num_sources, args.operations)
+                print(f"{discipline:<20} {capacity:>8} {num_sources:>8} {ns:>11.0f} {per_task:>12.1f}")
+
+    print("\nМодель склада (8 источников, 2 прибора, буфер 50, загрузка 1.6), событий в секунду:")
+    for discipline in disciplines:
+        print(f"  {discipline:>20}: {model_benchmark(discipline, args.events):,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# src/bench/calendars.py
+"""
+Сравнение структур календаря событий на классической модели "hold":
+в календаре держится N событий, каждая операция извлекает ближайшее и планирует
+новое через случайный интервал. Запуск: python -m src.bench.calendars
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from ..components import Source, Buffer, Device, DeviceManager, Dispatcher
+from ..components.event_calendar import EVENT_CALENDARS, FutureEventList
+from ..models.enums import EventType
+
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def hold_benchmark(kind: str, pending: int, operations: int, zero_delay_share: float = 0.0,
+                   seed: int = 1) -> float:
+    """Возвращает среднее время одной пары извлечение+вставка в наносекундах."""
+    rng = random.Random(seed)
+    increments = [rng.expovariate(1.0) for _ in range(4096)]
+    zero_delay = [rng.random() < zero_delay_share for _ in range(4096)]
+    fel = FutureEventList(kind)
+    counter = 0
+    for _ in range(pending):
+        fel.push((rng.expovariate(1.0) * pending, counter, EventType.GENERATE_TASK, None))
+        counter += 1
+
+    pop = fel.pop
+    push = fel.push
+    started = time.perf_counter()
+    for i in range(operations):
+        entry = pop()
+        j = i & 4095
+        delay = 0.0 if zero_delay[j] else increments[j] * pending
+        push((entry[0] + delay, counter, EventType.GENERATE_TASK, None))
+        counter += 1
+    return (time.perf_counter() - started) / operations * 1e9
+
+
+def dispatcher_benchmark(kind: str, tasks_per_source: int = 50_000) -> float:
+    """События в секунду для модели склада по умолчанию с заданной структурой календаря."""
+    random.seed(1)
+    sources = [Source(i + 1, generation_interval=1.0) for i in range(3)]
+    device_manager = DeviceManager()
+    device_manager.add_devices(Device(i + 1, 1.0, 3.0) for i in range(2))
+    dispatcher = Dispatcher(Buffer(10), device_manager, calendar=kind)
+    dispatcher.initialize_sources(sources, tasks_per_source)
+    started = time.perf_counter()
+    events = dispatcher.run()
+    return events / (time.perf_counter() - started)
+
+
+def find_crossovers(results: Dict[str, List[float]], sizes: List[int], baseline: str = "heap") -> Dict[str, int]:
+    """Наименьший размер календаря, начиная с которого структура быстрее базовой."""
+    crossovers = {}
+    for kind, timings in results.items():
+        if kind == baseline:
+            continue
+        for size, own, base in zip(sizes, timings, results[baseline]):
+            if own < base:
+                crossovers[kind] = size
+                break
+    return crossovers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение структур календаря событий")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--operations", type=int, default=200_000)
+    parser.add_argument("--zero-delay-share", type=float, default=0.0,
+                        help="доля событий с нулевой задержкой (идут через FIFO-полосу)")
+    args = parser.parse_args(argv)
+
+    kinds = list(EVENT_CALENDARS)
+    results = {kind: [] for kind in kinds}
+    print(f"{'N':>10} " + " ".join(f"{kind:>12}" for kind in kinds) + "   (нс на hold)")
+    for size in args.sizes:
+        for kind in kinds:
+            results[kind].append(hold_benchmark(kind, size, args.operations, args.zero_delay_share))
+        print(f"{size:>10} " + " ".join(f"{results[kind][-1]:>12.0f}" for kind in kinds))
+
+    crossovers = find_crossovers(results, args.sizes)
+    for kind in kinds[1:]:
+        if kind in crossovers:
+            print(f"{kind} быстрее heap начиная с N = {crossovers[kind]}")
+        else:
+            print(f"{kind} не обгоняет heap на проверенных размерах")
+
+    print("\nМодель склада (3 источника, 2 прибора, буфер 10), событий в секунду:")
+    for kind in kinds:
+        print(f"  {kind:>10}: {dispatcher_benchmark(kind):,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# src/bench/sources.py
+"""
+Отдельные источники против одного агрегированного (AggregateSource) при росте числа потоков
+заказов: события в секунду, наибольший размер календаря и время сборки модели. Суммарная
+интенсивность поступлений не меняется. Запуск: python -m src.bench.sources --sources 10 1000 20000
+"""
+import argparse
+import time
+from typing import Tuple
+
+from ..config import ModelConfig, build_model
+from ..metrics.time_weighted import TimeWeightedMetrics
+
+DEFAULT_SOURCES = [10, 1_000, 20_000]
+
+
+def source_benchmark(num_sources: int, aggregate: bool, arrival: str = "poisson",
+                     events: int = 200_000) -> Tuple[float, int, float]:
+    """(событий в секунду, наибольший размер календаря, секунд на сборку модели)."""
+    # Два прибора со средним временем обслуживания 2 загружены на 0.8 при любом числе источников;
+    # маленький блок случайных величин - чтобы тысячи отдельных источников поместились в память
+    config = ModelConfig(num_sources=num_sources, num_devices=2, buffer_size=10,
+                         generation_interval=1.25 * num_sources, arrival=arrival, tasks_per_source=10 ** 9,
+                         variate_block_size=256, aggregate_sources=aggregate)
+    started = time.perf_counter()
+    dispatcher = build_model(config, seed=1).dispatcher
+    build_time = time.perf_counter() - started
+    metrics = TimeWeightedMetrics().attach(dispatcher)
+    started = time.perf_counter()
+    processed = dispatcher.run(max_events=events)
+    rate = processed / (time.perf_counter() - started)
+    return rate, metrics.calendar.max_level, build_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Отдельные источники против агрегированного")
+    parser.add_argument("--sources", type=int, nargs="+", default=DEFAULT_SOURCES)
+    parser.add_argument("--arrival", default="poisson", help="poisson, fixed, erlang, uniform")
+    parser.add_argument("--events", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    print(f"{'Источников':>10} {'режим':>12} {'событий/с':>12} {'календарь':>10} {'сборка, с':>10}")
+    for num_sources in args.sources:
+        for aggregate in (False, True):
+            rate, calendar, build_time = source_benchmark(num_sources, aggregate, args.arrival, args.events)
+            mode = "агрегат" if aggregate else "отдельные"
+            print(f"{num_sources:>10} {mode:>12} {rate:>12,.0f} {calendar:>10} {build_time:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# src/bench/suite.py
+"""
+Воспроизводимый набор бенчмарков ядра модели с историей результатов.
+
+Каждый случай матрицы (размер буфера x число приборов x число источников x загрузка)
+прогоняется в отдельном процессе без вывода, с фиксированным зерном:
+  - событий в секунду (лучший из нескольких повторов после разогрева);
+  - нс на событие каждого типа (обработчики диспетчера обернуты таймерами);
+  - пиковый RSS процесса;
+  - память на событие: пик выделенного во время прогона сверх начального (tracemalloc),
+    деленный на число событий, и чистый прирост числа блоков интерпретатора на событие
+    (sys.getallocatedblocks; на длинном окне в установившемся режиме стремится к 0, заметно больше 0 -
+    модель копит объекты).
+    Это не число выделений на событие: tracemalloc и getallocatedblocks видят только живые
+    блоки, а объекты, созданные и освобожденные внутри события, стандартными средствами
+    не сосчитать.
+
+Запуск:  python -m src.bench.suite run --label my-change
+Сравнение двух последних записей истории: python -m src.bench.suite compare --threshold 0.05
+"""
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from ..config import ModelConfig, build_model
+
+DEFAULT_HISTORY = "bench_history.json"
+BUFFER_SIZES = [3, 10, 100]
+DEVICE_COUNTS = [1, 4]
+SOURCE_COUNTS = [1, 8]
+LOAD_LEVELS = [0.5, 0.9, 1.5]
+QUICK_MATRIX = {"buffer_size": [10], "num_devices": [1, 4], "num_sources": [1, 8], "load": [0.9]}
+# Источники генерируют без ограничения, прогон останавливается по числу событий
+UNLIMITED_TASKS = 10 ** 12
+# Редкие типы событий (например, вытеснения при низкой загрузке) слишком шумны для сравнения
+MIN_EVENTS_FOR_TYPE = 1000
+
+
+def case_config(buffer_size: int, num_devices: int, num_sources: int, load: float,
+                calendar: str = "heap") -> ModelConfig:
+    """Пуассоновский поток и равномерное обслуживание на [1, 3] с загрузкой приборов load."""
+    mean_service = 2.0
+    interval = num_sources * mean_service / (load * num_devices)
+    return ModelConfig(num_sources=num_sources, num_devices=num_devices, buffer_size=buffer_size,
+                       generation_interval=interval, service_time_min=1.0, service_time_max=3.0,
+                       tasks_per_source=UNLIMITED_TASKS, arrival="poisson", calendar=calendar)
+
+
+def case_name(case: dict) -> str:
+    return "buf{buffer_size}-dev{num_devices}-src{num_sources}-load{load}".format(**case)
+
+
+def run_case(case: dict, events: int, warmup: int, repeat: int, seed: int = 1) -> dict:
+    """Все измерения одного случая; вызывается в отдельном процессе ради честного пикового RSS."""
+    config = case_config(case["buffer_size"], case["num_devices"], case["num_sources"], case["load"],
+                         case.get("calendar", "heap"))
+
+    # Пропускная способность: лучший из повторов, каждый раз с новой моделью
+    best = float("inf")
+    processed = 0
+    for _ in range(repeat):
+        dispatcher = build_model(config, seed=seed).dispatcher
+        dispatcher.run(max_events=warmup)
+        started = time.perf_counter()
+        processed = dispatcher.run(max_events=events)
+        best = min(best, time.perf_counter() - started)
+
+    # Время обработчиков по типам событий
+    dispatcher = build_model(config, seed=seed).dispatcher
+    dispatcher.run(max_events=warmup)
+    handler_ns: Dict[str, float] = {}
+    handler_counts: Dict[str, int] = {}
+    perf_counter_ns = time.perf_counter_ns
+
+    def timed(event_type, handler):
+        name = event_type.name
+
+        def wrapper(data):
+            started = perf_counter_ns()
+            handler(data)
+            handler_ns[name] = handler_ns.get(name, 0) + perf_counter_ns() - started
+            handler_counts[name] = handler_counts.get(name, 0) + 1
+        return wrapper
+
+    dispatcher._handlers = {et: timed(et, h) for et, h in dispatcher._handlers.items()}
+    dispatcher.run(max_events=events)
+
+    # Память: tracemalloc замедляет прогон, поэтому отдельная модель и меньше событий
+    dispatcher = build_model(config, seed=seed).dispatcher
+    dispatcher.run(max_events=warmup)
+    memory_events = max(1, events // 10)
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    traced = dispatcher.run(max_events=memory_events)
+    _, peak = tracemalloc.get_traced_memory()
+    blocks_after = sys.getallocatedblocks()
+    tracemalloc.stop()
+
+    return {
+        "case": case_name(case),
+        **case,
+        "events": processed,
+        "events_per_sec": processed / best if best > 0 else float("inf"),
+        "ns_per_event": best / processed * 1e9 if processed else float("nan"),
+        "ns_by_event_type": {name: handler_ns[name] / handler_counts[name] for name in sorted(handler_ns)},
+        "events_by_type": dict(sorted(handler_counts.items())),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "traced_peak_bytes_per_event": (peak - baseline) / traced if traced else float("nan"),
+        "net_block_growth_per_event": (blocks_after - blocks_before) / traced if traced else float("nan"),
+    }
+
+
+def build_matrix(quick: bool = False, calendar: str = "heap") -> List[dict]:
+    if quick:
+        matrix = QUICK_MATRIX
+    else:
+        matrix = {"buffer_size": BUFFER_SIZES, "num_devices": DEVICE_COUNTS,
+                  "num_sources": SOURCE_COUNTS, "load": LOAD_LEVELS}
+    names = list(matrix)
+    return [dict(zip(names, values), calendar=calendar) for values in itertools.product(*matrix.values())]
+
+
+def run_suite(cases: List[dict], events: int, warmup: int, repeat: int) -> List[dict]:
+    results = []
+    for case in cases:
+        # Свежий интерпретатор на каждый случай: пиковый RSS не наследуется от предыдущих
+        command = [sys.executable, "-m", "src.bench.suite", "case", json.dumps(case),
+                   "--events", str(events), "--warmup", str(warmup), "--repeat", str(repeat)]
+        completed = subprocess.run(command, capture_output=True, text=True, check=True,
+                                   cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        result = json.loads(completed.stdout)
+        results.append(result)
+        print(f"{result['case']:>32}: {result['events_per_sec']:>12,.0f} соб/с "
+              f"{result['ns_per_event']:>8.0f} нс/соб  RSS {result['peak_rss_kb'] / 1024:>6.1f} МБ  "
+              f"пик {result['traced_peak_bytes_per_event']:>7.2f} Б/соб  "
+              f"прирост {result['net_block_growth_per_event']:>+6.3f} блоков/соб", flush=True)
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        completed = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                   text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def load_history(path: str) -> List[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def append_history(path: str, record: dict):
+    history = load_history(path)
+    history.append(record)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(history, f, indent=1)
+    os.replace(tmp, path)
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """
+    Регрессии текущей записи относительно базовой: падение событий в секунду или рост
+    нс на тип события больше чем на threshold (доля). Сравниваются только общие случаи.
+    """
+    regressions = []
+    base_cases = {r["case"]: r for r in baseline["results"]}
+    for result in current["results"]:
+        base = base_cases.get(result["case"])
+        if base is None:
+            continue
+        change = result["events_per_sec"] / base["events_per_sec"] - 1.0
+        if change < -threshold:
+            regressions.append(f"{result['case']}: событий в секунду {change:+.1%}")
+        for name, ns in result["ns_by_event_type"].items():
+            base_ns = base["ns_by_event_type"].get(name)
+            counts = (result["events_by_type"].get(name, 0), base["events_by_type"].get(name, 0))
+            if min(counts) < MIN_EVENTS_FOR_TYPE:
+                continue
+            if base_ns and ns / base_ns - 1.0 > threshold:
+                regressions.append(f"{result['case']}: {name} {ns / base_ns - 1.0:+.1%} нс на событие")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки ядра модели СМО")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="прогнать матрицу и дописать результат в историю")
+    run.add_argument("--history", default=DEFAULT_HISTORY)
+    run.add_argument("--label", default="", help="подпись записи истории")
+    run.add_argument("--events", type=int, default=200_000, help="событий в замеряемом прогоне")
+    run.add_argument("--warmup", type=int, default=20_000)
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--quick", action="store_true", help="сокращенная матрица")
+    run.add_argument("--calendar", default="heap")
+
+    cmp = commands.add_parser("compare", help="найти регрессии между записями истории")
+    cmp.add_argument("--history", default=DEFAULT_HISTORY)
+    cmp.add_argument("--baseline", type=int, default=-2, help="индекс базовой записи")
+    cmp.add_argument("--current", type=int, default=-1, help="индекс сравниваемой записи")
+    cmp.add_argument("--threshold", type=float, default=0.05, help="допустимое ухудшение (доля)")
+
+    case = commands.add_parser("case", help="один случай матрицы (внутренний, вывод в JSON)")
+    case.add_argument("spec")
+    case.add_argument("--events", type=int, default=200_000)
+    case.add_argument("--warmup", type=int, default=20_000)
+    case.add_argument("--repeat", type=int, default=3)
+
+    args = parser.parse_args(argv)
+    if args.command == "case":
+        print(json.dumps(run_case(json.loads(args.spec), args.events, args.warmup, args.repeat)))
+    elif args.command == "run":
+        cases = build_matrix(args.quick, args.calendar)
+        started = time.perf_counter()
+        results = run_suite(cases, args.events, args.warmup, args.repeat)
+        record = {
+            "label": args.label,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "events": args.events,
+            "results": results,
+        }
+        append_history(args.history, record)
+        print(f"Случаев: {len(results)}, время: {time.perf_counter() - started:.1f} с, "
+              f"записано в {args.history}")
+    else:
+        history = load_history(args.history)
+        if len(history) < 2:
+            print("В истории меньше двух записей, сравнивать не с чем")
+            return
+        baseline, current = history[args.baseline], history[args.current]
+        print(f"База: {baseline['label'] or baseline['commit']} ({baseline['timestamp']}), "
+              f"текущая: {current['label'] or current['commit']} ({current['timestamp']})")
+        regressions = compare(baseline, current, args.threshold)
+        for line in regressions:
+            print(f"  РЕГРЕССИЯ {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"Регрессий больше {args.threshold:.0%} нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# src/checkpoint.py
+"""
+Снимки полного состояния модели: календарь событий, таблица заявок, кольцевой буфер
+с указателем, приборы, источники и генераторы случайных чисел.
+
+Формат файла: заголовок (магия b"OSCKPT\\0\\0", версия схемы, флаги, длина данных), за ним
+pickle из простых типов (столбцы таблицы - байтами), по умолчанию сжатый zlib.
+При чтении допускаются только классы накопителей статистики.
+
+Снимок восстанавливается в модель, собранную build_model, в том числе с другой
+конфигурацией ("что если": больше приборов, больший буфер):
+
+    model = build_model(config, seed=1)
+    model.dispatcher.run(until_time=warmup)
+    data = snapshot(model)
+    variant = fork(data, replace(config, num_devices=3), seed=1, replication=7)
+"""
+import array
+import io
+import pickle
+import random
+import struct
+import zlib
+from collections import defaultdict
+from typing import Optional
+
+from .config import Model, ModelConfig, build_model
+from .metrics import streaming
+from .models.enums import EventType
+
+MAGIC = b"OSCKPT\0\0"
+SCHEMA_VERSION = 1
+FLAG_ZLIB = 1
+HEADER = struct.Struct("<8sIIQ")
+
+# Классы, которые разрешено создавать при чтении снимка
+_ALLOWED_CLASSES = {
+    ("builtins", "int"): int,
+    ("builtins", "float"): float,
+    ("collections", "defaultdict"): defaultdict,
+    ("array", "array"): array.array,
+    ("array", "_array_reconstructor"): array._array_reconstructor,
+}
+for _cls in (streaming.StreamingSummary, streaming.RunningMoments, streaming.TDigest, streaming.Histogram):
+    _ALLOWED_CLASSES[(_cls.__module__, _cls.__name__)] = _cls
+
+
+class _StateUnpickler(pickle.Unpickler):
+    def find_class(self, module, name):
+        try:
+            return _ALLOWED_CLASSES[(module, name)]
+        except KeyError:
+            raise pickle.UnpicklingError(f"Checkpoint refers to forbidden class {module}.{name}") from None
+
+
+def model_state(model: Model, include_rng: bool = True) -> dict:
+    """
+    Состояние модели из простых типов. include_rng=False - без генераторов случайных чисел
+    (быстрое клонирование в памяти, восстанавливается только с restore_rng=False).
+    """
+    return {
+        "global_random": random.getstate() if include_rng else None,
+        "tasks": model.dispatcher.tasks.snapshot_state(),
+        "buffer": model.buffer.snapshot_state(),
+        "devices": [device.snapshot_state(include_rng) for device in model.device_manager.devices],
+        "sources": [source.snapshot_state(include_rng) for source in model.sources],
+        "dispatcher": model.dispatcher.snapshot_state(),
+    }
+
+
+def restore_model_state(model: Model, state: dict, restore_rng: bool = True) -> Model:
+    """
+    Переносит состояние в модель. restore_rng=False оставляет генераторы модели
+    (например, с зерном другой реплики) - так из одного снимка получаются независимые продолжения.
+    Приборы и источники сопоставляются по ID; занятый прибор или источник с событиями
+    в календаре обязан существовать в модели.
+    """
+    if restore_rng and state["global_random"] is None:
+        raise ValueError("Checkpoint was taken without random number generators, use restore_rng=False")
+    dispatcher = model.dispatcher
+    devices = {device.get_id(): device for device in model.device_manager.devices}
+    sources = {source.id: source for source in model.sources}
+    for device_state in state["devices"]:
+        device = devices.get(device_state["id"])
+        if device is None:
+            if device_state["current_task"] is not None:
+                raise ValueError(f"Busy device {device_state['id']} is missing from the model")
+            continue
+        device.restore_state(device_state, restore_rng)
+    for source_state in state["sources"]:
+        source = sources.get(source_state["id"])
+        if source is None:
+            raise ValueError(f"Source {source_state['id']} is missing from the model")
+        source.restore_state(source_state, restore_rng)
+    # Новые источники (которых не было в снимке) не генерируют: их первые события отбрасываются
+    dispatcher.tasks.restore_state(state["tasks"])
+    model.buffer.restore_state(state["buffer"])
+    model.device_manager.rebuild_index()
+    dispatcher.restore_state(state["dispatcher"], sources, devices)
+    # Добавленные приборы сразу забирают заявки, ожидающие в буфере
+    known = {device_state["id"] for device_state in state["devices"]}
+    for device_id, device in devices.items():
+        if device_id not in known and not model.buffer.is_empty():
+            dispatcher.schedule_event(dispatcher.current_time, EventType.DEVICE_BECAME_FREE, device)
+    if restore_rng:
+        random.setstate(state["global_random"])
+    return model
+
+
+def dumps(state: dict, compress: bool = True) -> bytes:
+    payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    flags = 0
+    if compress:
+        payload = zlib.compress(payload, 1)
+        flags |= FLAG_ZLIB
+    return HEADER.pack(MAGIC, SCHEMA_VERSION, flags, len(payload)) + payload
+
+
+def loads(data: bytes) -> dict:
+    if len(data) < HEADER.size:
+        raise ValueError("Not a model checkpoint")
+    magic, version, flags, length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a model checkpoint")
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported checkpoint schema version {version} (expected {SCHEMA_VERSION})")
+    payload = data[HEADER.size:HEADER.size + length]
+    if len(payload) != length:
+        raise ValueError("Truncated model checkpoint")
+    if flags & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return _StateUnpickler(io.BytesIO(payload)).load()
+
+
+def snapshot(model: Model, compress: bool = True) -> bytes:
+    return dumps(model_state(model), compress)
+
+
+def restore(model: Model, data: bytes, restore_rng: bool = True) -> Model:
+    return restore_model_state(model, loads(data), restore_rng)
+
+
+def save(model: Model, path: str, compress: bool = True):
+    with open(path, "wb") as f:
+        f.write(snapshot(model, compress))
+
+
+def load(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def fork(data: bytes, config: ModelConfig, seed: Optional[int] = None, replication: int = 0,
+         reseed: bool = True, reset_stats: bool = False, verbose: int = 0) -> Model:
+    """
+    Собирает модель по config (возможно, отличной от исходной) и продолжает ее из снимка.
+    reseed=True - дальше используются потоки (seed, replication), а не сохраненные;
+    reset_stats=True - статистика начинается заново (разгон отбрасывается).
+    """
+    model = build_model(config, seed=seed, replication=replication, verbose=verbose)
+    restore(model, data, restore_rng=not reseed)
+    if reset_stats:
+        model.dispatcher.reset_stats()
+    return model
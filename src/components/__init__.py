@@ -1,8 +1,13 @@
 # src/components/__init__.py
 from .source import Source
+from .trace_source import TraceSource
+from .external_source import ExternalSource
+from .aggregate_source import AggregateSource
 from .device import Device
 from .buffer import Buffer
+from .disciplines import QueueBuffer, PriorityBuffer, BUFFER_DISCIPLINES, create_buffer
 from .device_manager import DeviceManager
 from .dispatcher import Dispatcher
 
-__all__ = ["Source", "Device", "Buffer", "DeviceManager", "Dispatcher"]
\ No newline at end of file
+__all__ = ["Source", "TraceSource", "ExternalSource", "AggregateSource", "Device", "Buffer", "QueueBuffer", "PriorityBuffer", "BUFFER_DISCIPLINES",
+           "create_buffer", "DeviceManager", "Dispatcher"]
\ No newline at end of file
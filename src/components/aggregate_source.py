@@ -0,0 +1,146 @@
+# src/components/aggregate_source.py
+import heapq
+import random
+from typing import List, Optional, Sequence, Tuple, Union
+from ..interfaces.i_source import ITaskSource
+from ..models.task_table import TaskTable, TaskHandle
+from ..rng.variates import VariateStream, make_distribution
+
+# Идентификатор агрегированного источника в диспетчере (заявки получают номера исходных источников)
+AGGREGATE_SOURCE_ID = 0
+
+
+def alias_table(weights: Sequence[float]) -> Tuple[List[float], List[int]]:
+    """Таблица Уолкера (метод Воуза): выбор индекса i с вероятностью weights[i] / sum(weights) за O(1)."""
+    n = len(weights)
+    total = sum(weights)
+    prob = [w * n / total for w in weights]
+    alias = list(range(n))
+    small = [i for i, p in enumerate(prob) if p < 1.0]
+    large = [i for i, p in enumerate(prob) if p >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        alias[s] = l
+        prob[l] += prob[s] - 1.0
+        (small if prob[l] < 1.0 else large).append(l)
+    for i in small + large:  # Остатки из-за округления
+        prob[i] = 1.0
+    return prob, alias
+
+
+class AggregateSource(ITaskSource):
+    """
+    Много потоков заявок в одном источнике: в календаре всегда одно событие генерации,
+    сколько бы потоков ни было. Заявки получают номер исходного источника (source_ids)
+    и собственную нумерацию в нем, поэтому статистика по источникам сохраняется.
+
+    arrival="poisson" - суперпозиция пуассоновских потоков: один пуассоновский поток суммарной
+    интенсивности, источник заявки выбирается по интенсивностям методом псевдонимов за O(1)
+    по отдельному генератору origin_rng: интервалы берутся блоками, и общий с ними генератор
+    сделал бы выбор источника зависимым от размера блока.
+    Иначе ("fixed", "uniform", "erlang") - потоки восстановления: время следующей заявки каждого
+    потока хранится во внутренней куче (O(log n) на заявку), интервалы - общий поток значений
+    распределения со средним 1, умноженных на средний интервал потока.
+    """
+
+    def __init__(self, source_ids: Sequence[int], intervals: Union[float, Sequence[float]],
+                 arrival: str = "poisson", task_table: Optional[TaskTable] = None,
+                 rng: Optional[random.Random] = None, block_size: int = 4096,
+                 source_id: int = AGGREGATE_SOURCE_ID, antithetic: bool = False,
+                 origin_rng: Optional[random.Random] = None):
+        self.id = source_id
+        self.source_ids = list(source_ids)
+        n = len(self.source_ids)
+        if isinstance(intervals, (int, float)):
+            intervals = [float(intervals)] * n
+        if len(intervals) != n:
+            raise ValueError(f"Expected {n} mean intervals, got {len(intervals)}")
+        self.intervals = list(intervals)
+        self.arrival = arrival
+        self.tasks = task_table if task_table is not None else TaskTable()
+        # Номер следующей заявки каждого исходного источника
+        self.next_task_ids = [1] * n
+        self.poisson = arrival == "poisson"
+        self.last_generation_time = 0.0
+        self.next_interval = 0.0
+        self._heap: List[Tuple[float, int]] = []
+        self._origin_rng: Optional[random.Random] = None
+        if self.poisson:
+            rates = [1.0 / interval for interval in self.intervals]
+            self.rate = sum(rates)
+            self._prob, self._alias = alias_table(rates)
+            if origin_rng is None and rng is not None:
+                # Производный генератор: берется до первого блока интервалов, поэтому не зависит от его размера
+                origin_rng = random.Random(rng.getrandbits(64))
+            self._origin_rng = origin_rng
+            self._uniform = (origin_rng if origin_rng is not None else random).random
+            self.interarrival = VariateStream(make_distribution("poisson", 1.0 / self.rate), rng, block_size,
+                                              antithetic)
+        else:
+            self.interarrival = VariateStream(make_distribution(arrival, 1.0), rng, block_size, antithetic)
+        self._next_value = self.interarrival.next_value
+        if self.poisson:
+            self.next_interval = self._draw()
+        else:
+            self._heap = [(interval * self._draw(), i) for i, interval in enumerate(self.intervals)]
+            heapq.heapify(self._heap)
+
+    def _draw(self) -> float:
+        try:
+            return self._next_value()
+        except StopIteration:  # Блок предварительно сгенерированных значений исчерпан
+            value = self.interarrival.draw()
+            self._next_value = self.interarrival.next_value
+            return value
+
+    def _origin(self) -> int:
+        u = self._uniform() * len(self._prob)
+        i = int(u)
+        return i if u - i < self._prob[i] else self._alias[i]
+
+    def snapshot_state(self, include_rng: bool = True) -> dict:
+        state = {
+            "id": self.id,
+            "next_task_ids": list(self.next_task_ids),
+            "last_generation_time": self.last_generation_time,
+            "next_interval": self.next_interval,
+            "heap": list(self._heap),
+            "interarrival": self.interarrival.snapshot_state() if include_rng else None,
+            "origin": self._origin_rng.getstate() if include_rng and self._origin_rng is not None else None,
+        }
+        self._next_value = self.interarrival.next_value
+        return state
+
+    def restore_state(self, state: dict, restore_rng: bool = True):
+        if len(state["next_task_ids"]) != len(self.source_ids):
+            raise ValueError(f"Checkpoint aggregates {len(state['next_task_ids'])} sources, "
+                             f"not {len(self.source_ids)}")
+        self.next_task_ids = list(state["next_task_ids"])
+        self.last_generation_time = state["last_generation_time"]
+        self.next_interval = state["next_interval"]
+        self._heap = list(state["heap"])
+        heapq.heapify(self._heap)
+        if restore_rng:
+            self.interarrival.restore_state(state["interarrival"])
+            if self._origin_rng is not None and state.get("origin") is not None:
+                self._origin_rng.setstate(state["origin"])
+        self._next_value = self.interarrival.next_value
+
+    def get_next_generation_time(self) -> float:
+        if self.poisson:
+            return self.last_generation_time + self.next_interval
+        return self._heap[0][0] if self._heap else float("inf")
+
+    def generate_task(self, current_time: float) -> Optional[TaskHandle]:
+        if current_time < self.get_next_generation_time():
+            return None
+        if self.poisson:
+            index = self._origin()
+            self.last_generation_time = current_time
+            self.next_interval = self._draw()
+        else:
+            arrival_time, index = self._heap[0]
+            heapq.heapreplace(self._heap, (arrival_time + self.intervals[index] * self._draw(), index))
+        task = self.tasks.create(self.next_task_ids[index], self.source_ids[index], current_time)
+        self.next_task_ids[index] += 1
+        return task
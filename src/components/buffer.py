@@ -1,87 +1,223 @@
 # src/components/buffer.py
-from typing import List, Optional
+import heapq
+from typing import List, Optional, Tuple
 from ..interfaces.i_buffer import IBuffer
-from ..models.task import Task
-from ..models.enums import TaskStatus
+from ..models.task_table import TaskTable, TaskHandle, STATUS_BUFFERED, STATUS_ASSIGNED
+
+
+class _FreeSlotIndex:
+    """
+    Иерархическая битовая карта свободных ячеек кольца (64-арное дерево).
+    Поиск ближайшей свободной ячейки и изменение ячейки - O(log64 n).
+    """
+    WORD_BITS = 64
+
+    def __init__(self, size: int):
+        self.size = size
+        self.levels: List[List[int]] = []
+        # Нижний уровень: бит установлен, если ячейка свободна
+        words = [0] * max(1, (size + 63) >> 6)
+        for w in range(len(words)):
+            bits_in_word = min(64, size - (w << 6))
+            words[w] = (1 << bits_in_word) - 1 if bits_in_word > 0 else 0
+        self.levels.append(words)
+        # Верхние уровни: бит установлен, если соответствующее слово ниже не пусто
+        while len(self.levels[-1]) > 1:
+            lower = self.levels[-1]
+            upper = [0] * ((len(lower) + 63) >> 6)
+            for w, word in enumerate(lower):
+                if word:
+                    upper[w >> 6] |= 1 << (w & 63)
+            self.levels.append(upper)
+
+    def mark_free(self, slot: int):
+        for words in self.levels:
+            w = slot >> 6
+            was_empty = words[w] == 0
+            words[w] |= 1 << (slot & 63)
+            if not was_empty:
+                return
+            slot = w
+
+    def mark_occupied(self, slot: int):
+        for words in self.levels:
+            w = slot >> 6
+            words[w] &= ~(1 << (slot & 63))
+            if words[w]:
+                return
+            slot = w
+
+    def find_from(self, slot: int) -> int:
+        """Возвращает первую свободную ячейку с номером >= slot или -1."""
+        return self._find(0, slot)
+
+    def _find(self, level: int, pos: int) -> int:
+        words = self.levels[level]
+        w = pos >> 6
+        if w >= len(words):
+            return -1
+        masked = words[w] >> (pos & 63)
+        if masked:
+            return pos + ((masked & -masked).bit_length() - 1)
+        if level + 1 == len(self.levels):
+            return -1
+        next_word = self._find(level + 1, w + 1)
+        if next_word < 0:
+            return -1
+        word = words[next_word]
+        return (next_word << 6) + ((word & -word).bit_length() - 1)
 
 
 class Buffer(IBuffer):
-    def __init__(self, max_size: int, buffer_type: str = "ring"):
+    def __init__(self, max_size: int, buffer_type: str = "ring", task_table: Optional[TaskTable] = None):
         self.max_size = max_size
         self.buffer_type = buffer_type
+        # Общая таблица заявок (диспетчер подставляет свою)
+        self.tasks = task_table if task_table is not None else TaskTable()
         if self.buffer_type == "ring":
-            self.ring_buffer: List[Optional[Task]] = [None] * max_size
+            self.ring_buffer: List[Optional[TaskHandle]] = [None] * max_size
             self.pointer = 0  # Указатель для заполнения (Д10З1)
+            # Число занятых ячеек, чтобы проверки заполненности были O(1)
+            self.count = 0
+            # Индекс свободных ячеек для поиска места следом за указателем
+            self._free_slots = _FreeSlotIndex(max_size)
+            # Куча (время поступления, ячейка, номер записи) для выбора самой старой заявки.
+            # Записи вытесненных заявок удаляются лениво: номер записи в ячейке меняется.
+            self._fifo: List[Tuple[float, int, int]] = []
+            self._slot_entry: List[int] = [-1] * max_size
+            self._entry_counter = 0
+            # Ячейка последней операции (постановка, вытеснение, выбор) - для трассы событий
+            self.last_slot = -1
+            # Интеграл заполнения по времени (metrics.time_weighted); None - не ведется
+            self.occupancy = None
         else:
             raise NotImplementedError(f"Buffer type {self.buffer_type} not implemented")
 
     def is_full(self) -> bool:
         if self.buffer_type == "ring":
-            return all(t is not None for t in self.ring_buffer)
+            return self.count == self.max_size
         return False
 
     def is_empty(self) -> bool:
         if self.buffer_type == "ring":
-            return all(t is None for t in self.ring_buffer)
+            return self.count == 0
         return True
 
     def get_pointer_pos(self) -> int:
         return self.pointer
 
-    def enqueue(self, task: Task, current_time: float) -> bool:
+    def _place(self, slot: int, task: TaskHandle):
+        self.ring_buffer[slot] = task
+        self._slot_entry[slot] = self._entry_counter
+        heapq.heappush(self._fifo, (self.tasks.timestamp[task], slot, self._entry_counter))
+        self._entry_counter += 1
+
+    def enqueue(self, task: TaskHandle, current_time: float) -> bool:
         if self.buffer_type == "ring":
-            initial_ptr = self.pointer
-            while self.ring_buffer[self.pointer] is not None:
-                self.pointer = (self.pointer + 1) % self.max_size
-                if self.pointer == initial_ptr:  # Кольцо пройдено, мест нет
-                    return False  # Не удалось поставить в очередь
-
-            self.ring_buffer[self.pointer] = task
-            task.status = TaskStatus.BUFFERED
-            self.pointer = (self.pointer + 1) % self.max_size  # Указатель указывает на следующее место
+            if self.count == self.max_size:  # Кольцо заполнено, мест нет
+                return False  # Не удалось поставить в очередь
+
+            slot = self.pointer
+            if self.ring_buffer[slot] is not None:
+                # Ближайшее свободное место следом за указателем (с переходом через начало кольца)
+                slot = self._free_slots.find_from(slot)
+                if slot < 0:
+                    slot = self._free_slots.find_from(0)
+
+            self._place(slot, task)
+            self.last_slot = slot
+            self._free_slots.mark_occupied(slot)
+            self.count += 1
+            if self.occupancy is not None:
+                self.occupancy.update(current_time, self.count)
+            self.tasks.status[task] = STATUS_BUFFERED
+            self.pointer = (slot + 1) % self.max_size  # Указатель указывает на следующее место
             return True
         return False
 
-    def apply_replacement_policy(self, current_time: float) -> Optional[Task]:
+    def apply_replacement_policy(self, current_time: float,
+                                 task: Optional[TaskHandle] = None) -> Optional[TaskHandle]:
         # Дисциплина отказа Д10О1: под указателем.
         # Указатель не сдвигается, если буфер полон.
         # Заявка под указателем вытесняется.
         if self.buffer_type == "ring":
             if self.ring_buffer[self.pointer] is not None:
                 replaced_task = self.ring_buffer[self.pointer]
-                self.ring_buffer[self.pointer] = None
-                replaced_task.status = TaskStatus.ASSIGNED
-                replaced_task.time_completed = current_time
-                task_to_place = Task(
-                    id=-1,
-                    source_id=-1,
-                    timestamp=current_time,
-                    status=TaskStatus.BUFFERED
-                )
-                self.ring_buffer[self.pointer] = task_to_place
+                self.tasks.status[replaced_task] = STATUS_ASSIGNED
+                self.tasks.time_completed[replaced_task] = current_time
+                task_to_place = self.tasks.create(-1, -1, current_time, STATUS_BUFFERED)
+                # Ячейка остается занятой, запись вытесненной заявки в куче становится устаревшей
+                self._place(self.pointer, task_to_place)
+                self.last_slot = self.pointer
                 self.pointer = (self.pointer + 1) % self.max_size  # Сдвигаем указатель
+                if len(self._fifo) > 2 * self.count + 64:
+                    self._compact_fifo()
                 return replaced_task
         return None
 
-    def dequeue(self, current_time: float) -> Optional[Task]:
+    def _compact_fifo(self):
+        slot_entry = self._slot_entry
+        self._fifo = [entry for entry in self._fifo if slot_entry[entry[1]] == entry[2]]
+        heapq.heapify(self._fifo)
+
+    def dequeue(self, current_time: float) -> Optional[TaskHandle]:
         # Дисциплина выбора заявок Д2Б1: FIFO.
-        # В кольцевом буфере FIFO означает, что нужно искать самую старую задачу.
-        # Это делается за O(n), где n - размер буфера.
+        # Самая старая заявка (при равном времени - в ячейке с меньшим номером)
+        # находится на вершине кучи, устаревшие записи отбрасываются - O(log n).
         if self.buffer_type == "ring":
-            oldest_task: Optional[Task] = None
-            oldest_idx = -1
-            for i, task in enumerate(self.ring_buffer):
-                if task is not None:
-                    if oldest_task is None or task.timestamp < oldest_task.timestamp:
-                        oldest_task = task
-                        oldest_idx = i
-
-            if oldest_task:
-                self.ring_buffer[oldest_idx] = None
-                oldest_task.time_left_buffer = current_time
+            fifo = self._fifo
+            slot_entry = self._slot_entry
+            while fifo:
+                _, slot, entry = heapq.heappop(fifo)
+                if slot_entry[slot] != entry:
+                    continue
+                oldest_task = self.ring_buffer[slot]
+                self.last_slot = slot
+                self.ring_buffer[slot] = None
+                slot_entry[slot] = -1
+                self._free_slots.mark_free(slot)
+                self.count -= 1
+                if self.occupancy is not None:
+                    self.occupancy.update(current_time, self.count)
+                self.tasks.time_left_buffer[oldest_task] = current_time
                 return oldest_task
         return None
 
+    def snapshot_state(self) -> dict:
+        return {
+            "buffer_type": self.buffer_type,
+            "ring": list(self.ring_buffer),
+            "pointer": self.pointer,
+            "count": self.count,
+            "fifo": list(self._fifo),
+            "slot_entry": list(self._slot_entry),
+            "entry_counter": self._entry_counter,
+        }
+
+    def restore_state(self, state: dict):
+        """
+        Восстанавливает содержимое кольца. Буфер может быть больше сохраненного (новые ячейки
+        добавляются свободными в конец кольца), но не может потерять занятые ячейки.
+        """
+        if state.get("buffer_type") != self.buffer_type:
+            raise ValueError(f"Checkpoint buffer discipline {state.get('buffer_type')} "
+                             f"does not match {self.buffer_type}")
+        ring = list(state["ring"])
+        if any(task is not None for task in ring[self.max_size:]):
+            raise ValueError(f"Buffer of size {self.max_size} cannot hold the checkpointed tasks")
+        extra = self.max_size - len(ring)
+        self.ring_buffer = ring[:self.max_size] + [None] * max(0, extra)
+        self._slot_entry = list(state["slot_entry"])[:self.max_size] + [-1] * max(0, extra)
+        self.pointer = state["pointer"] % self.max_size
+        self.count = state["count"]
+        self._fifo = [entry for entry in state["fifo"] if entry[1] < self.max_size]
+        heapq.heapify(self._fifo)
+        self._entry_counter = state["entry_counter"]
+        self._free_slots = _FreeSlotIndex(self.max_size)
+        for slot, task in enumerate(self.ring_buffer):
+            if task is not None:
+                self._free_slots.mark_occupied(slot)
+
     def get_state(self) -> str:
         if self.buffer_type == "ring":
             # Показываем содержимое буфера и позицию указателя
@@ -90,7 +226,7 @@ class Buffer(IBuffer):
                 if task is None:
                     buffer_str.append("Empty")
                 else:
-                    buffer_str.append(f"({task.source_id},{task.id})")
+                    buffer_str.append(f"({self.tasks.source_id[task]},{self.tasks.local_id[task]})")
             pointer_str = f"Pointer: {self.pointer}"
             return f"{buffer_str} | {pointer_str}"
-        return ""
\ No newline at end of file
+        return ""
@@ -2,18 +2,31 @@
 import random
 from typing import Optional
 from ..interfaces.i_device import IDevice
-from ..models.task import Task
-from ..models.enums import TaskStatus
+from ..models.task_table import TaskTable, TaskHandle, STATUS_ASSIGNED, STATUS_COMPLETED
+from ..rng.variates import Distribution, Uniform, VariateStream
 
 
 class Device(IDevice):
-    def __init__(self, device_id: int, service_time_min: float = 1.0, service_time_max: float = 2.0):
+    def __init__(self, device_id: int, service_time_min: float = 1.0, service_time_max: float = 2.0,
+                 task_table: Optional[TaskTable] = None, rng: Optional[random.Random] = None,
+                 service: Optional[Distribution] = None, block_size: int = 4096, antithetic: bool = False):
         self.id = device_id
         self.device_id = device_id
-        self.current_task: Optional[Task] = None
+        self.current_task: Optional[TaskHandle] = None
         self.service_time_min = service_time_min
         self.service_time_max = service_time_max
         self.busy_until_time: float = 0.0
+        # Поток времен обслуживания; по умолчанию равномерное распределение (П32)
+        # и общий генератор модуля random, если собственный не задан
+        if service is None:
+            service = Uniform(service_time_min, service_time_max)
+        self.service_stream = VariateStream(service, rng, block_size, antithetic)
+        self._next_service = self.service_stream.next_value
+        # Менеджер приборов, который ведет индекс свободных приборов (задается в DeviceManager)
+        self.manager = None
+        # Интеграл занятости по времени (metrics.time_weighted); None - не ведется
+        self.busy = None
+        self.tasks = task_table if task_table is not None else TaskTable()
 
     def get_id(self) -> int:
         return self.id
@@ -21,25 +34,57 @@ class Device(IDevice):
     def is_free(self) -> bool:
         return self.current_task is None
 
-    def assign_task(self, task: Task, current_time: float) -> float:
-        if not self.is_free():
+    def assign_task(self, task: TaskHandle, current_time: float) -> float:
+        if self.current_task is not None:
             raise RuntimeError(f"Device {self.id} is not free!")
 
         self.current_task = task
-        task.status = TaskStatus.ASSIGNED
-        task.time_assigned_to_device = current_time
+        tasks = self.tasks
+        tasks.status[task] = STATUS_ASSIGNED
+        tasks.time_assigned_to_device[task] = current_time
 
-        # Время обслуживания равномерно (П32)
-        service_duration = random.uniform(self.service_time_min, self.service_time_max)
+        service_duration = tasks.service_demand[task]
+        if service_duration != service_duration:  # NaN: время не задано трассой, разыгрываем
+            try:
+                service_duration = self._next_service()
+            except StopIteration:  # Блок предварительно сгенерированных значений исчерпан
+                service_duration = self.service_stream.draw()
+                self._next_service = self.service_stream.next_value
         self.busy_until_time = current_time + service_duration
+        if self.busy is not None:
+            self.busy.update(current_time, 1)
+        if self.manager is not None:
+            self.manager.notify_busy(self, current_time)
         return self.busy_until_time
 
-    def complete_task(self) -> Task:
-        if self.is_free():
+    def snapshot_state(self, include_rng: bool = True) -> dict:
+        state = {
+            "id": self.id,
+            "current_task": self.current_task,
+            "busy_until_time": self.busy_until_time,
+            "service": self.service_stream.snapshot_state() if include_rng else None,
+        }
+        self._next_service = self.service_stream.next_value
+        return state
+
+    def restore_state(self, state: dict, restore_rng: bool = True):
+        self.current_task = state["current_task"]
+        self.busy_until_time = state["busy_until_time"]
+        if restore_rng:
+            self.service_stream.restore_state(state["service"])
+        self._next_service = self.service_stream.next_value
+
+    def complete_task(self) -> TaskHandle:
+        if self.current_task is None:
             raise RuntimeError(f"Device {self.id} is free, no task to complete!")
         completed_task = self.current_task
-        completed_task.status = TaskStatus.COMPLETED
-        completed_task.time_completed = self.busy_until_time
+        self.tasks.status[completed_task] = STATUS_COMPLETED
+        completed_time = self.busy_until_time
+        self.tasks.time_completed[completed_task] = completed_time
         self.current_task = None
         self.busy_until_time = 0.0
+        if self.busy is not None:
+            self.busy.update(completed_time, 0)
+        if self.manager is not None:
+            self.manager.notify_free(self, completed_time)
         return completed_task
\ No newline at end of file
@@ -1,20 +1,95 @@
 # src/components/device_manager.py
-from typing import List, Optional
+import bisect
+import heapq
+from typing import Iterable, List, Optional, Set, Tuple
 from ..interfaces.i_device import IDevice
+from ..models.task_table import TaskTable
 
 class DeviceManager:
     def __init__(self):
         self.devices: List[IDevice] = []
+        self._device_ids: Set[int] = set()
+        # Куча свободных приборов (ID, прибор) для Д2П1; занятые удаляются из нее лениво
+        self._free_heap: List[Tuple[int, IDevice]] = []
+        self._in_free_heap: Set[int] = set()
+        self.busy_count = 0
+        # Интеграл числа занятых приборов по времени (metrics.time_weighted); None - не ведется
+        self.occupancy = None
+        # Таблица заявок диспетчера, общая для всех приборов
+        self.tasks: Optional[TaskTable] = None
+
+    def bind_tasks(self, task_table: TaskTable):
+        self.tasks = task_table
+        for d in self.devices:
+            d.tasks = task_table
 
     def add_device(self, d: IDevice):
-        self.devices.append(d)
-        # Сортируем приборы по ID для Д2П1 (приоритет по номеру прибора)
+        self._attach(d)
+        # Вставляем прибор на место по ID для Д2П1 (приоритет по номеру прибора)
+        bisect.insort(self.devices, d, key=lambda dev: dev.get_id())
+        if d.is_free():
+            self._push_free(d)
+        else:
+            self.busy_count += 1
+
+    def add_devices(self, devices: Iterable[IDevice]):
+        # Массовая регистрация: одна сортировка и одно построение кучи - O(n log n)
+        devices = list(devices)
+        for d in devices:
+            self._attach(d)
+        self.devices.extend(devices)
         self.devices.sort(key=lambda dev: dev.get_id())
+        for d in devices:
+            if d.is_free():
+                self._free_heap.append((d.get_id(), d))
+                self._in_free_heap.add(d.get_id())
+            else:
+                self.busy_count += 1
+        heapq.heapify(self._free_heap)
+
+    def _attach(self, d: IDevice):
+        device_id = d.get_id()
+        if device_id in self._device_ids:
+            raise ValueError(f"Device {device_id} is already registered")
+        self._device_ids.add(device_id)
+        # Прибор сообщает менеджеру о смене состояния через notify_busy/notify_free
+        d.manager = self
+        if self.tasks is not None:
+            d.tasks = self.tasks
+
+    def _push_free(self, d: IDevice):
+        device_id = d.get_id()
+        if device_id not in self._in_free_heap:
+            heapq.heappush(self._free_heap, (device_id, d))
+            self._in_free_heap.add(device_id)
+
+    def notify_busy(self, d: IDevice, current_time: float = 0.0):
+        # Занятый прибор остается в куче и выталкивается при ближайшем поиске
+        self.busy_count += 1
+        if self.occupancy is not None:
+            self.occupancy.update(current_time, self.busy_count)
+
+    def notify_free(self, d: IDevice, current_time: float = 0.0):
+        self.busy_count -= 1
+        if self.occupancy is not None:
+            self.occupancy.update(current_time, self.busy_count)
+        self._push_free(d)
+
+    def rebuild_index(self):
+        """Пересобирает кучу свободных приборов после внешнего изменения их состояния."""
+        self._free_heap = [(d.get_id(), d) for d in self.devices if d.is_free()]
+        heapq.heapify(self._free_heap)
+        self._in_free_heap = {device_id for device_id, _ in self._free_heap}
+        self.busy_count = len(self.devices) - len(self._free_heap)
 
     def find_free_device(self) -> Optional[IDevice]:
         # Дисциплина выбора прибора Д2П1: приоритет по номеру прибора.
-        # Перебор начинается с самого приоритетного (с наименьшим ID).
-        for device in self.devices:
+        # На вершине кучи - свободный прибор с наименьшим ID, O(log n).
+        heap = self._free_heap
+        while heap:
+            device = heap[0][1]
             if device.is_free():
                 return device
-        return None
\ No newline at end of file
+            heapq.heappop(heap)
+            self._in_free_heap.discard(device.get_id())
+        return None
@@ -0,0 +1,265 @@
+# src/components/disciplines.py
+"""
+Дисциплины буфера помимо кольцевого Д10З1/Д10О1/Д2Б1 (components.buffer.Buffer).
+
+Эти буферы сами решают судьбу поступившей в полный буфер заявки (places_arrival):
+apply_replacement_policy(время, заявка) либо вытесняет заявку из буфера и ставит
+поступившую, либо отказывает самой поступившей. Заглушки не создаются.
+
+  QueueBuffer    - одна очередь (deque): выбор FIFO или LIFO, при переполнении отказ
+                   самой новой (поступившей) или вытеснение самой старой заявки - O(1);
+  PriorityBuffer - очереди по источникам и кучи непустых источников: приоритет по номеру
+                   источника (меньше номер - выше приоритет), по желанию пакетами; вытесняется
+                   самая новая заявка самого низкоприоритетного источника - O(log S).
+
+Выбор дисциплины по имени: create_buffer(name, max_size), имена - BUFFER_DISCIPLINES.
+"""
+import heapq
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+
+from ..interfaces.i_buffer import IBuffer
+from ..models.task_table import TaskTable, TaskHandle, STATUS_BUFFERED, STATUS_ASSIGNED
+from .buffer import Buffer
+
+
+class QueueBuffer(IBuffer):
+    places_arrival = True
+
+    def __init__(self, max_size: int, selection: str = "fifo", replacement: str = "newest",
+                 task_table: Optional[TaskTable] = None):
+        if selection not in ("fifo", "lifo"):
+            raise NotImplementedError(f"Selection discipline {selection} not implemented")
+        if replacement not in ("newest", "oldest"):
+            raise NotImplementedError(f"Replacement discipline {replacement} not implemented")
+        self.max_size = max_size
+        self.selection = selection
+        self.replacement = replacement
+        self.buffer_type = f"{selection}_reject_{replacement}"
+        self.tasks = task_table if task_table is not None else TaskTable()
+        # Слева - самая старая заявка, справа - самая новая
+        self.queue: Deque[TaskHandle] = deque()
+        self.count = 0
+        self.last_slot = -1  # Ячеек нет, для трассы событий
+        # Интеграл заполнения по времени (metrics.time_weighted); None - не ведется
+        self.occupancy = None
+
+    def is_full(self) -> bool:
+        return self.count == self.max_size
+
+    def is_empty(self) -> bool:
+        return self.count == 0
+
+    def get_pointer_pos(self) -> int:
+        return -1  # Указатель не используется
+
+    def enqueue(self, task: TaskHandle, current_time: float) -> bool:
+        if self.count == self.max_size:
+            return False
+        self.queue.append(task)
+        self.count += 1
+        if self.occupancy is not None:
+            self.occupancy.update(current_time, self.count)
+        self.tasks.status[task] = STATUS_BUFFERED
+        return True
+
+    def dequeue(self, current_time: float) -> Optional[TaskHandle]:
+        if not self.count:
+            return None
+        task = self.queue.popleft() if self.selection == "fifo" else self.queue.pop()
+        self.count -= 1
+        if self.occupancy is not None:
+            self.occupancy.update(current_time, self.count)
+        self.tasks.time_left_buffer[task] = current_time
+        return task
+
+    def apply_replacement_policy(self, current_time: float,
+                                 task: Optional[TaskHandle] = None) -> Optional[TaskHandle]:
+        if task is not None and (self.replacement == "newest" or not self.count):
+            rejected = task
+        elif not self.count:
+            return None
+        else:
+            rejected = self.queue.popleft() if self.replacement == "oldest" else self.queue.pop()
+            self.count -= 1
+            if task is not None:
+                self.enqueue(task, current_time)
+            elif self.occupancy is not None:
+                self.occupancy.update(current_time, self.count)
+        # Как у кольцевого буфера: отказ завершает пребывание заявки в системе
+        self.tasks.status[rejected] = STATUS_ASSIGNED
+        self.tasks.time_completed[rejected] = current_time
+        return rejected
+
+    def snapshot_state(self) -> dict:
+        return {"buffer_type": self.buffer_type, "queue": list(self.queue)}
+
+    def restore_state(self, state: dict):
+        _check_restorable(self, state, len(state["queue"]))
+        self.queue = deque(state["queue"])
+        self.count = len(self.queue)
+
+    def get_state(self) -> str:
+        tasks = self.tasks
+        items = [f"({tasks.source_id[task]},{tasks.local_id[task]})" for task in self.queue]
+        return f"{items} | {self.selection.upper()}, {self.count}/{self.max_size}"
+
+
+class PriorityBuffer(IBuffer):
+    """
+    Выбор по приоритету источника (Д2П1), при packet=True - пакетами (Д2Б5): источник выбранной
+    заявки обслуживается, пока у него есть заявки в буфере, затем выбирается новый пакет.
+    Внутри источника - FIFO. При переполнении отказ получает самая новая заявка источника
+    с наименьшим приоритетом, включая поступившую.
+    """
+    places_arrival = True
+
+    def __init__(self, max_size: int, packet: bool = False, task_table: Optional[TaskTable] = None):
+        self.max_size = max_size
+        self.packet = packet
+        self.buffer_type = "priority_packet" if packet else "priority"
+        self.tasks = task_table if task_table is not None else TaskTable()
+        self.queues: Dict[int, Deque[TaskHandle]] = {}
+        # Кучи номеров источников с заявками: для выбора - по возрастанию номера, для вытеснения -
+        # по убыванию. Опустевший источник удаляется лениво, когда поднимается наверх кучи;
+        # до этого повторная постановка его заявок не добавляет дубликат
+        self._by_priority: List[int] = []
+        self._by_lowest: List[int] = []
+        self._in_priority: Set[int] = set()
+        self._in_lowest: Set[int] = set()
+        self.packet_source: Optional[int] = None
+        self.count = 0
+        self.last_slot = -1  # Ячеек нет, для трассы событий
+        # Интеграл заполнения по времени (metrics.time_weighted); None - не ведется
+        self.occupancy = None
+
+    def is_full(self) -> bool:
+        return self.count == self.max_size
+
+    def is_empty(self) -> bool:
+        return self.count == 0
+
+    def get_pointer_pos(self) -> int:
+        return -1  # Указатель не используется
+
+    def _push(self, task: TaskHandle):
+        source = self.tasks.source_id[task]
+        queue = self.queues.get(source)
+        if queue is None:
+            queue = self.queues[source] = deque()
+        queue.append(task)
+        if source not in self._in_priority:
+            self._in_priority.add(source)
+            heapq.heappush(self._by_priority, source)
+        if source not in self._in_lowest:
+            self._in_lowest.add(source)
+            heapq.heappush(self._by_lowest, -source)
+        self.count += 1
+        self.tasks.status[task] = STATUS_BUFFERED
+
+    def _highest(self) -> Optional[int]:
+        heap, queues = self._by_priority, self.queues
+        while heap:
+            if queues[heap[0]]:
+                return heap[0]
+            self._in_priority.discard(heapq.heappop(heap))
+        return None
+
+    def _lowest(self) -> Optional[int]:
+        heap, queues = self._by_lowest, self.queues
+        while heap:
+            if queues[-heap[0]]:
+                return -heap[0]
+            self._in_lowest.discard(-heapq.heappop(heap))
+        return None
+
+    def enqueue(self, task: TaskHandle, current_time: float) -> bool:
+        if self.count == self.max_size:
+            return False
+        self._push(task)
+        if self.occupancy is not None:
+            self.occupancy.update(current_time, self.count)
+        return True
+
+    def dequeue(self, current_time: float) -> Optional[TaskHandle]:
+        if not self.count:
+            return None
+        source = self.packet_source
+        if source is None or not self.queues[source]:
+            source = self._highest()
+            if self.packet:
+                self.packet_source = source
+        task = self.queues[source].popleft()
+        self.count -= 1
+        if self.occupancy is not None:
+            self.occupancy.update(current_time, self.count)
+        self.tasks.time_left_buffer[task] = current_time
+        return task
+
+    def apply_replacement_policy(self, current_time: float,
+                                 task: Optional[TaskHandle] = None) -> Optional[TaskHandle]:
+        lowest = self._lowest()
+        if task is not None and (lowest is None or self.tasks.source_id[task] >= lowest):
+            rejected = task
+        elif lowest is None:
+            return None
+        else:
+            rejected = self.queues[lowest].pop()
+            self.count -= 1
+            if task is not None:
+                self._push(task)
+            if self.occupancy is not None:
+                self.occupancy.update(current_time, self.count)
+        # Как у кольцевого буфера: отказ завершает пребывание заявки в системе
+        self.tasks.status[rejected] = STATUS_ASSIGNED
+        self.tasks.time_completed[rejected] = current_time
+        return rejected
+
+    def snapshot_state(self) -> dict:
+        return {"buffer_type": self.buffer_type,
+                "queues": {source: list(queue) for source, queue in self.queues.items() if queue},
+                "packet_source": self.packet_source}
+
+    def restore_state(self, state: dict):
+        _check_restorable(self, state, sum(len(queue) for queue in state["queues"].values()))
+        self.queues = {}
+        self._by_priority, self._by_lowest = [], []
+        self._in_priority, self._in_lowest = set(), set()
+        self.count = 0
+        for queue in state["queues"].values():
+            for task in queue:
+                self._push(task)
+        self.packet_source = state["packet_source"]
+
+    def get_state(self) -> str:
+        tasks = self.tasks
+        items = [f"И{source}: {[tasks.local_id[task] for task in self.queues[source]]}"
+                 for source in sorted(self.queues) if self.queues[source]]
+        packet = f", пакет И{self.packet_source}" if self.packet and self.packet_source is not None else ""
+        return f"{items} | {self.count}/{self.max_size}{packet}"
+
+
+def _check_restorable(buffer: IBuffer, state: dict, count: int):
+    if state.get("buffer_type") != buffer.buffer_type:
+        raise ValueError(f"Checkpoint buffer discipline {state.get('buffer_type')} "
+                         f"does not match {buffer.buffer_type}")
+    if count > buffer.max_size:
+        raise ValueError(f"Buffer of size {buffer.max_size} cannot hold the checkpointed tasks")
+
+
+BUFFER_DISCIPLINES = {
+    "ring": lambda max_size: Buffer(max_size, buffer_type="ring"),
+    "fifo_reject_newest": lambda max_size: QueueBuffer(max_size, "fifo", "newest"),
+    "fifo_reject_oldest": lambda max_size: QueueBuffer(max_size, "fifo", "oldest"),
+    "lifo_reject_newest": lambda max_size: QueueBuffer(max_size, "lifo", "newest"),
+    "lifo_reject_oldest": lambda max_size: QueueBuffer(max_size, "lifo", "oldest"),
+    "priority": lambda max_size: PriorityBuffer(max_size, packet=False),
+    "priority_packet": lambda max_size: PriorityBuffer(max_size, packet=True),
+}
+
+
+def create_buffer(discipline: str, max_size: int) -> IBuffer:
+    try:
+        return BUFFER_DISCIPLINES[discipline](max_size)
+    except KeyError:
+        raise NotImplementedError(f"Buffer discipline {discipline} not implemented") from None
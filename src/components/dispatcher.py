@@ -1,51 +1,158 @@
 # src/components/dispatcher.py
-import heapq
-from typing import List, Optional, Dict, Tuple
+from typing import Dict, Iterator, Optional, Tuple, Union
 from collections import defaultdict
 from ..models.task import Task
+from ..models.task_table import TaskTable, TaskHandle, STATUS_BY_CODE
 from ..models.enums import EventType, TaskStatus
 from ..interfaces.i_buffer import IBuffer
 from ..interfaces.i_device import IDevice
+from ..interfaces.i_source import ITaskSource
+from ..interfaces.i_event_calendar import IEventCalendar
 from .device_manager import DeviceManager
+from .event_calendar import FutureEventList
+from ..metrics.streaming import StreamingSummary, copy_stats
 
 
 class Dispatcher:
-    def __init__(self, buffer: IBuffer, device_manager: DeviceManager):
+    def __init__(self, buffer: IBuffer, device_manager: DeviceManager, verbose: int = 0,
+                 calendar: Union[str, IEventCalendar] = "heap", task_table: Optional[TaskTable] = None):
         # self.warehouse = warehouse # Убрано
         self.buffer = buffer
         self.device_manager = device_manager
+        # Единая таблица заявок: компоненты передают друг другу дескрипторы строк
+        if task_table is None:
+            task_table = getattr(buffer, "tasks", None)
+        self.tasks = task_table if task_table is not None else TaskTable()
+        buffer.tasks = self.tasks
+        device_manager.bind_tasks(self.tasks)
+        # Уровень подробности: 0 - без вывода, 1 - журнал событий и состояние после каждого шага
+        self.verbose = verbose
         self.current_time = 0.0
-        self.event_calendar: List[Tuple[float, int, EventType, Optional[object]]] = []  # Добавлен уникальный ID события
+        # Календарь событий (время, уникальный ID события, тип, данные): выбранная структура
+        # для будущих событий ("heap", "calendar", "ladder") и FIFO-полоса для событий без задержки
+        self.event_calendar = FutureEventList(calendar)
         self.event_counter = 0  # Счетчик для уникального ID
-        # Статистика
+        # Средние по времени (metrics.time_weighted.TimeWeightedMetrics.attach): набор метрик
+        # и интеграл размера календаря, который обновляется после каждого события
+        self.time_metrics = None
+        self.calendar_size = None
+        self.reset_stats()
+        # Для отслеживания оставшегося количества генераций
+        self.sources_to_generate = {}
+        # Профилировщик (metrics.profiler.Profiler.attach) и запись трассы событий
+        # (traces.events.EventTraceWriter.attach); без них run() не инструментирован
+        self.profiler = None
+        self.tracer = None
+        # Вызывается с дескриптором вытесненной заявки до ее удаления (например, передача на другой склад)
+        self.on_task_rejected = None
+        # Таблица обработчиков вместо цепочки if/elif
+        self._handlers = {
+            EventType.GENERATE_TASK: self._on_generate_task,
+            EventType.TASK_ARRIVES_AT_DISPATCHER: self._on_task_arrives,
+            EventType.TASK_ENTERED_BUFFER: self._on_task_entered_buffer,
+            EventType.TASK_REPLACED_IN_BUFFER: self._on_task_replaced,
+            EventType.DEVICE_BECAME_FREE: self._on_device_became_free,
+            EventType.TASK_ASSIGNED_TO_DEVICE: self._on_task_assigned,
+            EventType.TASK_COMPLETED_BY_DEVICE: self._on_task_completed,
+        }
+
+    def reset_stats(self):
+        """Обнуляет статистику, например после разгона модели до установившегося режима."""
         self.stats = {
             "generated_by_source": defaultdict(int),
             "rejected_by_source": defaultdict(int),
+            "completed_by_source": defaultdict(int),
             "total_time_in_system_by_source": defaultdict(float),
             "total_time_in_buffer_by_source": defaultdict(float),
             "total_service_time_by_source": defaultdict(float),
-            "service_times": defaultdict(list),
-            "wait_times": defaultdict(list),
+            # Потоковые накопители по завершенным заявкам: среднее, дисперсия, квантили, гистограмма
+            "service_times": defaultdict(StreamingSummary),
+            "wait_times": defaultdict(StreamingSummary),
+            "system_times": defaultdict(StreamingSummary),
         }
-        # Словарь для отслеживания задач, находящихся в системе
-        self.active_tasks: Dict[int, Task] = {}
-        # Для отслеживания оставшегося количества генераций
-        self.sources_to_generate = {}
+        # Общие счетчики для условий остановки пакетного прогона
+        self.completed_count = 0
+        self.processed_events = 0
+        if self.time_metrics is not None:
+            self.time_metrics.reset(self.current_time)
 
     def schedule_event(self, time: float, event_type: EventType, data: Optional[object] = None):
         # Используем event_counter как уникальный идентификатор, чтобы избежать сравнения EventType
-        heapq.heappush(self.event_calendar, (time, self.event_counter, event_type, data))
+        self.event_calendar.push((time, self.event_counter, event_type, data))
         self.event_counter += 1
 
-    def initialize_sources(self, sources, num_tasks_to_generate_per_source: int):
+    @property
+    def active_tasks(self) -> Iterator[TaskHandle]:
+        # Заявки, находящиеся в системе, - занятые строки таблицы
+        return self.tasks.live_handles()
+
+    def task_view(self, task: TaskHandle) -> Task:
+        return Task(self.tasks, task)
+
+    def initialize_sources(self, sources, num_tasks_to_generate_per_source: Optional[int]):
         # Инициализируем ТОЛЬКО первое событие генерации для каждого источника
-        # и отслеживаем, сколько задач уже сгенерировано
+        # и отслеживаем, сколько задач уже сгенерировано (None - без ограничения,
+        # например для трассы, которая воспроизводится целиком)
+        if num_tasks_to_generate_per_source is None:
+            num_tasks_to_generate_per_source = float("inf")
+        for source in sources:
+            source.tasks = self.tasks
         self.sources_to_generate = {source.id: num_tasks_to_generate_per_source for source in sources}
         for source in sources:
             next_gen_time = source.get_next_generation_time()
+            if next_gen_time == float("inf"):  # Источнику нечего генерировать
+                continue
             # Передаем сам источник и его оставшееся количество генераций
             self.schedule_event(next_gen_time, EventType.GENERATE_TASK, (source, self.sources_to_generate[source.id]))
 
+    def wake_source(self, source: ITaskSource):
+        """
+        Планирует генерацию источника внешнего потока, у которого появились заявки после того,
+        как время его следующей генерации было бесконечным. Новый источник регистрируется без ограничения.
+        """
+        if source.id not in self.sources_to_generate:
+            source.tasks = self.tasks
+            self.sources_to_generate[source.id] = float("inf")
+        next_gen_time = source.get_next_generation_time()
+        if next_gen_time < float("inf"):
+            self.schedule_event(max(self.current_time, next_gen_time), EventType.GENERATE_TASK,
+                                (source, self.sources_to_generate[source.id]))
+
+    def snapshot_state(self) -> dict:
+        """
+        Состояние диспетчера из простых типов: источники и приборы в данных событий
+        заменяются ссылками ("@source", ID) и ("@device", ID).
+        """
+        calendar = self.event_calendar
+        return {
+            "current_time": self.current_time,
+            "event_counter": self.event_counter,
+            "completed_count": self.completed_count,
+            "processed_events": self.processed_events,
+            "sources_to_generate": dict(self.sources_to_generate),
+            # Копия: состояние не должно меняться вместе с продолжающимся прогоном
+            "stats": copy_stats(self.stats),
+            "now": calendar.now,
+            "lane": [_encode_entry(entry) for entry in calendar.lane],
+            "events": [_encode_entry(entry) for entry in calendar.backend.entries()],
+        }
+
+    def restore_state(self, state: dict, sources: Dict[int, ITaskSource], devices: Dict[int, IDevice]):
+        self.current_time = state["current_time"]
+        self.event_counter = state["event_counter"]
+        self.completed_count = state["completed_count"]
+        self.processed_events = state["processed_events"]
+        self.sources_to_generate = dict(state["sources_to_generate"])
+        # Копия: продолжения из одного состояния не должны делить статистику
+        self.stats = copy_stats(state["stats"])
+        # Новый календарь той же структуры; события с нулевой задержкой - снова в полосе
+        calendar = FutureEventList(type(self.event_calendar.backend)())
+        for entry in state["events"]:
+            calendar.backend.push(_decode_entry(entry, sources, devices))
+        calendar.lane.extend(_decode_entry(entry, sources, devices) for entry in state["lane"])
+        calendar.now = state["now"]
+        self.event_calendar = calendar
+
     def run_step(self) -> bool:
         """
         Выполняет один шаг моделирования (обрабатывает одно ближайшее событие).
@@ -54,142 +161,242 @@ class Dispatcher:
         if not self.event_calendar:
             return False
 
-        event_time, _, event_type, event_data = heapq.heappop(
-            self.event_calendar)  # Извлекаем уникальный ID, но не используем
+        event_time, _, event_type, event_data = self.event_calendar.pop()  # Извлекаем уникальный ID, но не используем
         self.current_time = event_time
-        print(f"\n--- Шаг моделирования ---")
-        print(f"Текущее модельное время: {self.current_time:.2f}")
-        print(f"Событие: {event_type.value}")
-        print(f"Данные события: {event_data}")
-
-        if event_type == EventType.GENERATE_TASK:
-            source_data = event_data
-            if isinstance(source_data, tuple) and len(source_data) == 2:
-                source = source_data[0]
-                remaining_count = source_data[1]
-                if remaining_count > 0:
-                    task = source.generate_task(self.current_time)
-                    if task:
-                        self.active_tasks[task.id] = task
-                        self.stats["generated_by_source"][task.source_id] += 1
-                        print(f"  Сгенерирована заявка: ID {task.id}, Источник {task.source_id}")
-                        # Планируем событие поступления задачи к диспетчеру
-                        self.schedule_event(self.current_time, EventType.TASK_ARRIVES_AT_DISPATCHER, task)
-
-                        # Обновляем оставшееся количество и планируем следующую генерацию
-                        self.sources_to_generate[source.id] -= 1
-                        if self.sources_to_generate[source.id] > 0:
-                            next_gen_time = source.get_next_generation_time()
-                            if next_gen_time > self.current_time:  # Проверяем, чтобы не было дубликатов
-                                self.schedule_event(next_gen_time, EventType.GENERATE_TASK,
-                                                    (source, self.sources_to_generate[source.id]))
-                        else:
+        if self.verbose:
+            print(f"\n--- Шаг моделирования ---")
+            print(f"Текущее модельное время: {self.current_time:.2f}")
+            print(f"Событие: {event_type.value}")
+            print(f"Данные события: {self._describe_event_data(event_type, event_data)}")
+
+        self._handlers[event_type](event_data)
+        self.processed_events += 1
+        if self.calendar_size is not None:
+            self.calendar_size.update(event_time, len(self.event_calendar))
+
+        if self.verbose:
+            self.print_current_state()
+        return True
+
+    def run(self, until_time: Optional[float] = None, max_completed: Optional[int] = None,
+            max_events: Optional[int] = None) -> int:
+        """
+        Пакетный прогон без интерактива: обрабатывает события, пока календарь не опустеет
+        или не выполнится одно из условий остановки. Возвращает число обработанных событий.
+
+        until_time - обработать все события с временем <= until_time;
+        max_completed - остановиться, когда всего обслужено столько заявок;
+        max_events - ограничение на число событий в этом вызове.
+        """
+        if self.verbose:
+            # Отладочный режим: тот же цикл, но с журналом каждого шага
+            return self._run_verbose(until_time, max_completed, max_events)
+
+        calendar = self.event_calendar
+        handlers = self._handlers
+        pop = calendar.pop
+        check_time = until_time is not None
+        time_limit = float("inf") if until_time is None else until_time
+        completed_limit = float("inf") if max_completed is None else max_completed
+        events_limit = float("inf") if max_events is None else max_events
+        calendar_size = self.calendar_size
+        instrumented = self.profiler if self.profiler is not None else self.tracer
+        if instrumented is not None:
+            processed = instrumented.run(self, time_limit, completed_limit, events_limit, check_time)
+            self.processed_events += processed
+            return processed
+
+        processed = 0
+        while processed < events_limit and self.completed_count < completed_limit:
+            if check_time and calendar and calendar.peek_time() > time_limit:
+                self.current_time = time_limit
+                break
+            try:
+                event_time, _, event_type, event_data = pop()
+            except IndexError:  # Календарь пуст
+                break
+            self.current_time = event_time
+            handlers[event_type](event_data)
+            if calendar_size is not None:
+                calendar_size.update(event_time, len(calendar))
+            processed += 1
+
+        self.processed_events += processed
+        return processed
+
+    def _run_verbose(self, until_time: Optional[float], max_completed: Optional[int],
+                     max_events: Optional[int]) -> int:
+        processed = 0
+        while self.event_calendar:
+            if max_events is not None and processed >= max_events:
+                break
+            if max_completed is not None and self.completed_count >= max_completed:
+                break
+            if until_time is not None and self.event_calendar.peek_time() > until_time:
+                self.current_time = until_time
+                break
+            self.run_step()
+            processed += 1
+        return processed
+
+    def _on_generate_task(self, source_data):
+        if isinstance(source_data, tuple) and len(source_data) == 2:
+            source = source_data[0]
+            remaining_count = source_data[1]
+            if remaining_count > 0:
+                task = source.generate_task(self.current_time)
+                if task is not None:
+                    self.stats["generated_by_source"][self.tasks.source_id[task]] += 1
+                    if self.verbose:
+                        print(f"  Сгенерирована заявка: ID {self.tasks.local_id[task]}, Источник {self.tasks.source_id[task]}")
+                    # Планируем событие поступления задачи к диспетчеру
+                    self.schedule_event(self.current_time, EventType.TASK_ARRIVES_AT_DISPATCHER, task)
+
+                    # Обновляем оставшееся количество и планируем следующую генерацию
+                    self.sources_to_generate[source.id] -= 1
+                    if self.sources_to_generate[source.id] > 0:
+                        next_gen_time = source.get_next_generation_time()
+                        # Заявки трассы могут приходить в один момент времени; бесконечное время -
+                        # источник исчерпан
+                        if self.current_time <= next_gen_time < float("inf"):
+                            self.schedule_event(next_gen_time, EventType.GENERATE_TASK,
+                                                (source, self.sources_to_generate[source.id]))
+                        elif self.verbose:
                             print(f"  Источник {source.id} завершил генерацию заявок.")
-                else:
-                    print(f"  Попытка генерации от источника {source_data[0].id}, но лимит исчерпан.")
+                    elif self.verbose:
+                        print(f"  Источник {source.id} завершил генерацию заявок.")
+            elif self.verbose:
+                print(f"  Попытка генерации от источника {source_data[0].id}, но лимит исчерпан.")
 
-        elif event_type == EventType.TASK_ARRIVES_AT_DISPATCHER:
-            task: Task = event_data
-            print(f"  Заявка {task.id} от источника {task.source_id} поступила к диспетчеру.")
+    def _on_task_arrives(self, task: TaskHandle):
+        tasks = self.tasks
+        if self.verbose:
+            print(f"  Заявка {tasks.local_id[task]} от источника {tasks.source_id[task]} поступила к диспетчеру.")
             # Сразу направляем в буфер
-            print(f"  Направляем заявку {task.id} в буфер.")
-            # Попытка поместить в буфер
-            if self.buffer.is_full():
+            print(f"  Направляем заявку {tasks.local_id[task]} в буфер.")
+        # Попытка поместить в буфер
+        if self.buffer.is_full():
+            if self.verbose:
                 print(f"  Буфер полон! Применяем дисциплину вытеснения.")
-                replaced_task = self.buffer.apply_replacement_policy(self.current_time)
-                if replaced_task:
-                    print(f"  Заявка {replaced_task.id} (источник {replaced_task.source_id}) вытеснена из буфера.")
-                    self.stats["rejected_by_source"][replaced_task.source_id] += 1
-                    self.active_tasks.pop(replaced_task.id, None)  # Убираем из активных
-                    self.schedule_event(self.current_time, EventType.TASK_REPLACED_IN_BUFFER, replaced_task)
-                else:
-                    print(f"  Ошибка: буфер полон, но не удалось вытеснить задачу.")
+            replaced_task = self.buffer.apply_replacement_policy(self.current_time, task)
+            if replaced_task is not None:
+                if self.verbose:
+                    print(f"  Заявка {tasks.local_id[replaced_task]} (источник {tasks.source_id[replaced_task]}) вытеснена из буфера.")
+                self.stats["rejected_by_source"][tasks.source_id[replaced_task]] += 1
+                self.schedule_event(self.current_time, EventType.TASK_REPLACED_IN_BUFFER, replaced_task)
+            elif self.verbose:
+                print(f"  Ошибка: буфер полон, но не удалось вытеснить задачу.")
+            if not self.buffer.places_arrival:
+                # Место вытесненной заявки занимает заглушка буфера, поступившая заявка дальше не участвует
+                tasks.release(task)
+        else:
+            success = self.buffer.enqueue(task, self.current_time)
+            if success:
+                if self.verbose:
+                    print(f"  Заявка {tasks.local_id[task]} помещена в буфер.")
+                self.schedule_event(self.current_time, EventType.TASK_ENTERED_BUFFER, task)
             else:
-                success = self.buffer.enqueue(task, self.current_time)
-                if success:
-                    print(f"  Заявка {task.id} помещена в буфер.")
-                    self.schedule_event(self.current_time, EventType.TASK_ENTERED_BUFFER, task)
-                else:
-                    print(f"  Ошибка: не удалось поместить задачу {task.id} в буфер, несмотря на проверку.")
-
-        elif event_type == EventType.TASK_ENTERED_BUFFER:
-            task: Task = event_data
-            print(f"  Заявка {task.id} официально в буфере.")
-            free_device = self.device_manager.find_free_device()
-            if free_device and not self.buffer.is_empty():
-                task_to_assign = self.buffer.dequeue(self.current_time)
-                if task_to_assign:
-                    print(f"  Выбрана заявка {task_to_assign.id} из буфера для обслуживания (FIFO).")
-                    completion_time = free_device.assign_task(task_to_assign, self.current_time)
-                    print(f"  Заявка {task_to_assign.id} назначена на прибор {free_device.get_id()}.")
-                    self.schedule_event(completion_time, EventType.TASK_COMPLETED_BY_DEVICE,
-                                        (task_to_assign, free_device))
-                    self.schedule_event(self.current_time, EventType.TASK_ASSIGNED_TO_DEVICE,
-                                        (task_to_assign, free_device))
-                else:
-                    print(f"  Ошибка: буфер пуст при попытке выбора задачи, хотя только что была задача.")
-
-
-        elif event_type == EventType.TASK_REPLACED_IN_BUFFER:
-            replaced_task: Task = event_data
-            # Обновляем статистику для вытесненной задачи
-            time_in_system = replaced_task.time_completed - replaced_task.timestamp
-            self.stats["total_time_in_system_by_source"][replaced_task.source_id] += time_in_system
-            # Время в буфере для вытесненной не считаем, так как она не была обслужена
-            self.active_tasks.pop(replaced_task.id, None)  # Убираем из активных
-
-        elif event_type == EventType.DEVICE_BECAME_FREE:
-            device: IDevice = event_data
-            print(f"  Прибор {device.get_id()} освободился.")
-            # Попытка выбрать задачу из буфера и назначить на прибор
+                if self.verbose:
+                    print(f"  Ошибка: не удалось поместить задачу {tasks.local_id[task]} в буфер, несмотря на проверку.")
+                tasks.release(task)
+
+    def _on_task_entered_buffer(self, task: TaskHandle):
+        if self.verbose:
+            print(f"  Заявка {self.tasks.local_id[task]} официально в буфере.")
+        free_device = self.device_manager.find_free_device()
+        if free_device and not self.buffer.is_empty():
             task_to_assign = self.buffer.dequeue(self.current_time)
-            if task_to_assign:
-                print(f"  Выбрана заявка {task_to_assign.id} из буфера для обслуживания (FIFO).")
-                completion_time = device.assign_task(task_to_assign, self.current_time)
-                print(f"  Заявка {task_to_assign.id} назначена на прибор {device.get_id()}.")
-                self.schedule_event(completion_time, EventType.TASK_COMPLETED_BY_DEVICE, (task_to_assign, device))
-                self.schedule_event(self.current_time, EventType.TASK_ASSIGNED_TO_DEVICE, (task_to_assign, device))
-            else:
-                print(f"  Буфер пуст, прибор {device.get_id()} ожидает.")
+            if task_to_assign is not None:
+                if self.verbose:
+                    print(f"  Выбрана заявка {self.tasks.local_id[task_to_assign]} из буфера для обслуживания (FIFO).")
+                completion_time = free_device.assign_task(task_to_assign, self.current_time)
+                if self.verbose:
+                    print(f"  Заявка {self.tasks.local_id[task_to_assign]} назначена на прибор {free_device.get_id()}.")
+                self.schedule_event(completion_time, EventType.TASK_COMPLETED_BY_DEVICE,
+                                    (task_to_assign, free_device))
+                self.schedule_event(self.current_time, EventType.TASK_ASSIGNED_TO_DEVICE,
+                                    (task_to_assign, free_device))
+            elif self.verbose:
+                print(f"  Ошибка: буфер пуст при попытке выбора задачи, хотя только что была задача.")
 
-        elif event_type == EventType.TASK_ASSIGNED_TO_DEVICE:
-            task_data: Tuple[Task, IDevice] = event_data
-            task, device = task_data
-            print(f"  Подтверждение назначения задачи {task.id} на прибор {device.get_id()}.")
+    def _on_task_replaced(self, replaced_task: TaskHandle):
+        tasks = self.tasks
+        # Обновляем статистику для вытесненной задачи
+        time_in_system = tasks.time_completed[replaced_task] - tasks.timestamp[replaced_task]
+        self.stats["total_time_in_system_by_source"][tasks.source_id[replaced_task]] += time_in_system
+        # Время в буфере для вытесненной не считаем, так как она не была обслужена
+        if self.on_task_rejected is not None:
+            self.on_task_rejected(replaced_task)
+        tasks.release(replaced_task)  # Убираем из системы
 
-        elif event_type == EventType.TASK_COMPLETED_BY_DEVICE:
-            task_data: Tuple[Task, IDevice] = event_data
+    def _on_device_became_free(self, device: IDevice):
+        if self.verbose:
+            print(f"  Прибор {device.get_id()} освободился.")
+        # Попытка выбрать задачу из буфера и назначить на прибор
+        task_to_assign = self.buffer.dequeue(self.current_time)
+        if task_to_assign is not None:
+            if self.verbose:
+                print(f"  Выбрана заявка {self.tasks.local_id[task_to_assign]} из буфера для обслуживания (FIFO).")
+            completion_time = device.assign_task(task_to_assign, self.current_time)
+            if self.verbose:
+                print(f"  Заявка {self.tasks.local_id[task_to_assign]} назначена на прибор {device.get_id()}.")
+            self.schedule_event(completion_time, EventType.TASK_COMPLETED_BY_DEVICE, (task_to_assign, device))
+            self.schedule_event(self.current_time, EventType.TASK_ASSIGNED_TO_DEVICE, (task_to_assign, device))
+        elif self.verbose:
+            print(f"  Буфер пуст, прибор {device.get_id()} ожидает.")
+
+    def _on_task_assigned(self, task_data: Tuple[TaskHandle, IDevice]):
+        if self.verbose:
             task, device = task_data
-            completed_task = device.complete_task()
-            print(f"  Заявка {completed_task.id} обслужена прибором {device.get_id()}.")
+            print(f"  Подтверждение назначения задачи {self.tasks.local_id[task]} на прибор {device.get_id()}.")
 
-            # Обновляем статистику для завершенной задачи
-            time_in_system = completed_task.time_completed - completed_task.timestamp
-            time_in_buffer = (
-                        completed_task.time_left_buffer - completed_task.timestamp) if completed_task.time_left_buffer else 0
-            time_in_service = completed_task.time_completed - completed_task.time_assigned_to_device
+    def _on_task_completed(self, task_data: Tuple[TaskHandle, IDevice]):
+        task, device = task_data
+        completed_task = device.complete_task()
+        tasks = self.tasks
+        if self.verbose:
+            print(f"  Заявка {tasks.local_id[completed_task]} обслужена прибором {device.get_id()}.")
 
-            self.stats["total_time_in_system_by_source"][completed_task.source_id] += time_in_system
-            self.stats["total_time_in_buffer_by_source"][completed_task.source_id] += time_in_buffer
-            self.stats["total_service_time_by_source"][completed_task.source_id] += time_in_service
+        # Обновляем статистику для завершенной задачи
+        timestamp = tasks.timestamp[completed_task]
+        time_completed = tasks.time_completed[completed_task]
+        time_in_system = time_completed - timestamp
+        time_in_buffer = tasks.time_left_buffer[completed_task] - timestamp
+        time_in_service = time_completed - tasks.time_assigned_to_device[completed_task]
 
-            self.stats["service_times"][completed_task.source_id].append(time_in_service)
-            self.stats["wait_times"][completed_task.source_id].append(time_in_buffer)
+        stats = self.stats
+        source_id = tasks.source_id[completed_task]
+        stats["completed_by_source"][source_id] += 1
+        stats["total_time_in_system_by_source"][source_id] += time_in_system
+        stats["total_time_in_buffer_by_source"][source_id] += time_in_buffer
+        stats["total_service_time_by_source"][source_id] += time_in_service
 
-            # Убираем задачу из активных
-            self.active_tasks.pop(completed_task.id, None)
+        stats["service_times"][source_id].add(time_in_service)
+        stats["wait_times"][source_id].add(time_in_buffer)
+        stats["system_times"][source_id].add(time_in_system)
+        self.completed_count += 1
 
-            # Планируем событие освобождения прибора, чтобы он мог принять следующую задачу
-            self.schedule_event(self.current_time, EventType.DEVICE_BECAME_FREE, device)
+        # Убираем задачу из системы, строка таблицы будет переиспользована
+        tasks.release(completed_task)
 
-        self.print_current_state()
-        return True
+        # Планируем событие освобождения прибора, чтобы он мог принять следующую задачу
+        self.schedule_event(self.current_time, EventType.DEVICE_BECAME_FREE, device)
+
+    def _describe_event_data(self, event_type: EventType, event_data):
+        # Для журнала показываем заявки через представление Task, а не номером строки таблицы
+        if event_type in (EventType.TASK_ARRIVES_AT_DISPATCHER, EventType.TASK_ENTERED_BUFFER,
+                          EventType.TASK_REPLACED_IN_BUFFER):
+            return self.task_view(event_data)
+        if event_type in (EventType.TASK_ASSIGNED_TO_DEVICE, EventType.TASK_COMPLETED_BY_DEVICE):
+            return (self.task_view(event_data[0]), event_data[1])
+        return event_data
 
     def print_current_state(self):
         print("\n--- Текущее состояние системы ---")
         print(f"Модельное время: {self.current_time:.2f}")
         # Печатаем ближайшие 5 событий, исключая уникальный ID из вывода
-        upcoming_events = [(time, et.value, data) for time, _, et, data in self.event_calendar[:5]]
+        upcoming_events = [(time, et.value, self._describe_event_data(et, data))
+                           for time, _, et, data in self.event_calendar.upcoming(5)]
         print(f"Календарь событий (ближайшие 5): {upcoming_events}")
         print(f"Состояние буфера: {self.buffer.get_state()}")
         print(f"Позиция указателя буфера: {self.buffer.get_pointer_pos()}")
@@ -199,13 +406,44 @@ class Dispatcher:
                 print(f"  Прибор {dev.get_id()}: Свободен")
             else:
                 print(
-                    f"  Прибор {dev.get_id()}: Занят задачей {dev.current_task.id if dev.current_task else 'None'} до времени {dev.busy_until_time:.2f}")
+                    f"  Прибор {dev.get_id()}: Занят задачей {self.tasks.local_id[dev.current_task]} до времени {dev.busy_until_time:.2f}")
         print("Активные задачи (в системе):")
-        for tid, t in self.active_tasks.items():
-            print(f"  ID {t.id}, Источник {t.source_id}, Статус {t.status.value}, Время поступления {t.timestamp:.2f}")
+        tasks = self.tasks
+        for t in self.active_tasks:
+            print(f"  ID {tasks.local_id[t]}, Источник {tasks.source_id[t]}, Статус {STATUS_BY_CODE[tasks.status[t]].value}, Время поступления {tasks.timestamp[t]:.2f}")
         print("Частичная статистика (сгенерировано/отказано):")
         for src_id in self.stats["generated_by_source"]:
             gen = self.stats["generated_by_source"][src_id]
             rej = self.stats["rejected_by_source"][src_id]
             print(f"  Источник {src_id}: {gen} / {rej}")
-        print("--- Конец состояния ---\n")
\ No newline at end of file
+        print("--- Конец состояния ---\n")
+
+
+def _encode(value):
+    if isinstance(value, ITaskSource):
+        return ("@source", value.id)
+    if isinstance(value, IDevice):
+        return ("@device", value.get_id())
+    if isinstance(value, tuple):
+        return tuple(_encode(item) for item in value)
+    return value
+
+
+def _decode(value, sources: Dict[int, ITaskSource], devices: Dict[int, IDevice]):
+    if isinstance(value, tuple):
+        if len(value) == 2 and value[0] == "@source":
+            return sources[value[1]]
+        if len(value) == 2 and value[0] == "@device":
+            return devices[value[1]]
+        return tuple(_decode(item, sources, devices) for item in value)
+    return value
+
+
+def _encode_entry(entry: tuple) -> tuple:
+    time, counter, event_type, data = entry
+    return time, counter, event_type.name, _encode(data)
+
+
+def _decode_entry(entry: tuple, sources: Dict[int, ITaskSource], devices: Dict[int, IDevice]) -> tuple:
+    time, counter, event_type, data = entry
+    return time, counter, EventType[event_type], _decode(data, sources, devices)
@@ -0,0 +1,368 @@
+# src/components/event_calendar.py
+import bisect
+import heapq
+from collections import deque
+from typing import Deque, Iterable, List, Union
+from ..interfaces.i_event_calendar import IEventCalendar, EventEntry
+
+
+class HeapEventCalendar(IEventCalendar):
+    """Двоичная куча: O(log n) на вставку и извлечение."""
+
+    def __init__(self):
+        self.heap: List[EventEntry] = []
+
+    def push(self, entry: EventEntry):
+        heapq.heappush(self.heap, entry)
+
+    def pop(self) -> EventEntry:
+        return heapq.heappop(self.heap)
+
+    def peek(self) -> EventEntry:
+        return self.heap[0]
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+    def entries(self) -> Iterable[EventEntry]:
+        return iter(self.heap)
+
+
+class CalendarQueue(IEventCalendar):
+    """
+    Календарная очередь Брауна: события раскладываются по корзинам фиксированной ширины
+    ("дни" циклического "года"). При разумной ширине корзины вставка и извлечение - O(1)
+    в среднем; число корзин и их ширина пересчитываются при росте и сокращении очереди.
+    """
+    MIN_BUCKETS = 2
+    WIDTH_SAMPLE = 25
+
+    def __init__(self, bucket_width: float = 1.0, num_buckets: int = MIN_BUCKETS):
+        self._size = 0
+        self._setup(num_buckets, bucket_width, 0.0)
+
+    def _setup(self, num_buckets: int, width: float, start_time: float):
+        self._buckets: List[List[EventEntry]] = [[] for _ in range(num_buckets)]
+        self._num_buckets = num_buckets
+        self._width = width
+        self._last_time = start_time
+        self._set_position(start_time)
+        # Кэш ближайшего события: индекс корзины или -1
+        self._min_bucket = -1
+        self._grow_at = 2 * num_buckets
+        self._shrink_at = num_buckets // 2 - 2
+
+    def _set_position(self, time: float):
+        year_day = int(time / self._width)
+        self._last_bucket = year_day % self._num_buckets
+        self._bucket_top = (year_day + 1) * self._width + 0.5 * self._width
+        # Начало "дня", с которого идет сканирование
+        self._position_time = year_day * self._width
+
+    def push(self, entry: EventEntry):
+        time = entry[0]
+        if time < self._position_time:
+            # Событие раньше текущей позиции сканирования - сдвигаем позицию назад
+            self._set_position(time)
+        bucket = self._buckets[int(time / self._width) % self._num_buckets]
+        if not bucket or bucket[-1] < entry:
+            bucket.append(entry)
+        else:
+            bisect.insort(bucket, entry)
+        self._size += 1
+        if self._min_bucket >= 0 and entry < self._buckets[self._min_bucket][0]:
+            self._min_bucket = -1
+        if self._size > self._grow_at:
+            self._resize(2 * self._num_buckets)
+
+    def _locate(self) -> int:
+        if self._min_bucket >= 0:
+            return self._min_bucket
+        if not self._size:
+            raise IndexError("pop from empty calendar queue")
+        buckets = self._buckets
+        num_buckets = self._num_buckets
+        i = self._last_bucket
+        top = self._bucket_top
+        for _ in range(num_buckets):
+            bucket = buckets[i]
+            if bucket and bucket[0][0] < top:
+                self._last_bucket = i
+                self._bucket_top = top
+                self._position_time = top - 1.5 * self._width
+                self._min_bucket = i
+                return i
+            i += 1
+            top += self._width
+            if i == num_buckets:
+                i = 0
+        # За целый "год" ничего не нашлось - прямой поиск минимума
+        best = -1
+        for i, bucket in enumerate(buckets):
+            if bucket and (best < 0 or bucket[0] < buckets[best][0]):
+                best = i
+        self._set_position(buckets[best][0][0])
+        self._min_bucket = best
+        return best
+
+    def pop(self) -> EventEntry:
+        i = self._locate()
+        entry = self._buckets[i].pop(0)
+        self._size -= 1
+        self._last_time = entry[0]
+        self._min_bucket = -1
+        if self._size < self._shrink_at:
+            self._resize(self._num_buckets // 2)
+        return entry
+
+    def peek(self) -> EventEntry:
+        return self._buckets[self._locate()][0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def entries(self) -> Iterable[EventEntry]:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def _resize(self, num_buckets: int):
+        num_buckets = max(self.MIN_BUCKETS, num_buckets)
+        if num_buckets == self._num_buckets:
+            return
+        entries = list(self.entries())
+        width = self._estimate_width(entries)
+        self._setup(num_buckets, width, self._last_time)
+        buckets = self._buckets
+        for entry in sorted(entries):
+            buckets[int(entry[0] / width) % num_buckets].append(entry)
+
+    def _estimate_width(self, entries: List[EventEntry]) -> float:
+        # Ширина корзины - около трех средних интервалов между ближайшими событиями
+        sample = heapq.nsmallest(min(len(entries), self.WIDTH_SAMPLE), entries)
+        if len(sample) < 2:
+            return self._width
+        gaps = [b[0] - a[0] for a, b in zip(sample, sample[1:])]
+        mean_gap = sum(gaps) / len(gaps)
+        # Отбрасываем далекие выбросы и пересчитываем среднее
+        close_gaps = [g for g in gaps if g <= 2 * mean_gap]
+        if close_gaps and sum(close_gaps) > 0:
+            mean_gap = sum(close_gaps) / len(close_gaps)
+        return 3.0 * mean_gap if mean_gap > 0 else self._width
+
+
+class _Rung:
+    __slots__ = ("start", "width", "current", "buckets", "size")
+
+    def __init__(self, start: float, width: float, num_buckets: int):
+        self.start = start
+        self.width = width
+        self.current = 0
+        self.buckets: List[List[EventEntry]] = [[] for _ in range(num_buckets)]
+        self.size = 0
+
+    def bucket_index(self, time: float) -> int:
+        index = int((time - self.start) / self.width)
+        return min(index, len(self.buckets) - 1)
+
+
+class LadderQueue(IEventCalendar):
+    """
+    Лестничная очередь (Tang, Goh, Thng): дальние события копятся несортированными
+    в Top, по мере приближения раскладываются по корзинам ступеней (rungs), и только
+    ближайшая корзина сортируется в Bottom. O(1) в среднем без подбора ширины корзин.
+    """
+    THRESHOLD = 50
+    MAX_RUNGS = 8
+
+    def __init__(self):
+        self._top: List[EventEntry] = []
+        self._top_start = float("-inf")
+        self._top_min = float("inf")
+        self._top_max = float("-inf")
+        self._rungs: List[_Rung] = []
+        # Bottom отсортирован по убыванию, ближайшее событие - в конце списка
+        self._bottom: List[EventEntry] = []
+        self._size = 0
+
+    def push(self, entry: EventEntry):
+        time = entry[0]
+        self._size += 1
+        if time >= self._top_start:
+            self._top.append(entry)
+            if time < self._top_min:
+                self._top_min = time
+            if time > self._top_max:
+                self._top_max = time
+            return
+        for rung in self._rungs:
+            index = rung.bucket_index(time)
+            if index >= rung.current:
+                rung.buckets[index].append(entry)
+                rung.size += 1
+                return
+        self._insert_bottom(entry)
+
+    def _insert_bottom(self, entry: EventEntry):
+        bottom = self._bottom
+        # Бинарный поиск в списке, упорядоченном по убыванию
+        lo, hi = 0, len(bottom)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bottom[mid] > entry:
+                lo = mid + 1
+            else:
+                hi = mid
+        bottom.insert(lo, entry)
+
+    def _refill_bottom(self):
+        while not self._bottom:
+            if not self._rungs:
+                if not self._top:
+                    return
+                self._top_to_rung()
+                continue
+            rung = self._rungs[-1]
+            if not rung.size:
+                self._rungs.pop()
+                continue
+            while not rung.buckets[rung.current]:
+                rung.current += 1
+            bucket = rung.buckets[rung.current]
+            rung.buckets[rung.current] = []
+            rung.current += 1
+            rung.size -= len(bucket)
+            if len(bucket) > self.THRESHOLD and len(self._rungs) < self.MAX_RUNGS:
+                bucket_start = rung.start + (rung.current - 1) * rung.width
+                child_width = rung.width / len(bucket)
+                if child_width > 0 and bucket_start + child_width > bucket_start:
+                    self._spawn_rung(bucket, bucket_start, child_width)
+                    continue
+            bucket.sort(reverse=True)
+            self._bottom = bucket
+
+    def _top_to_rung(self):
+        top = self._top
+        self._top = []
+        span = self._top_max - self._top_min
+        self._top_start = self._top_max
+        if span <= 0 or len(top) <= self.THRESHOLD:
+            top.sort(reverse=True)
+            self._bottom = top
+        else:
+            self._spawn_rung(top, self._top_min, span / len(top))
+        self._top_min = float("inf")
+        self._top_max = float("-inf")
+
+    def _spawn_rung(self, entries: List[EventEntry], start: float, width: float):
+        rung = _Rung(start, width, len(entries) + 1)
+        for entry in entries:
+            rung.buckets[rung.bucket_index(entry[0])].append(entry)
+        rung.size = len(entries)
+        self._rungs.append(rung)
+
+    def pop(self) -> EventEntry:
+        if not self._bottom:
+            self._refill_bottom()
+            if not self._bottom:
+                raise IndexError("pop from empty ladder queue")
+        self._size -= 1
+        return self._bottom.pop()
+
+    def peek(self) -> EventEntry:
+        if not self._bottom:
+            self._refill_bottom()
+            if not self._bottom:
+                raise IndexError("peek into empty ladder queue")
+        return self._bottom[-1]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def entries(self) -> Iterable[EventEntry]:
+        yield from self._top
+        for rung in self._rungs:
+            for bucket in rung.buckets:
+                yield from bucket
+        yield from self._bottom
+
+
+EVENT_CALENDARS = {
+    "heap": HeapEventCalendar,
+    "calendar": CalendarQueue,
+    "ladder": LadderQueue,
+}
+
+
+def create_event_calendar(kind: str = "heap") -> IEventCalendar:
+    try:
+        return EVENT_CALENDARS[kind]()
+    except KeyError:
+        raise NotImplementedError(f"Event calendar {kind} not implemented") from None
+
+
+class FutureEventList:
+    """
+    Календарь событий диспетчера: структура для будущих событий плюс отдельная
+    FIFO-полоса для событий с нулевой задержкой (время = текущему модельному).
+    Порядок извлечения совпадает с порядком (время, номер события) единой кучи.
+    """
+
+    def __init__(self, backend: Union[str, IEventCalendar, None] = None):
+        if backend is None or isinstance(backend, str):
+            backend = create_event_calendar(backend or "heap")
+        self.backend = backend
+        self.lane: Deque[EventEntry] = deque()
+        self.now = float("-inf")
+        # Для двоичной кучи работаем со списком напрямую, без вызовов методов
+        self._heap = backend.heap if type(backend) is HeapEventCalendar else None
+
+    def push(self, entry: EventEntry):
+        if entry[0] == self.now:
+            # Номера событий растут, поэтому полоса всегда упорядочена
+            self.lane.append(entry)
+        elif self._heap is not None:
+            heapq.heappush(self._heap, entry)
+        else:
+            self.backend.push(entry)
+
+    def pop(self) -> EventEntry:
+        """Извлекает ближайшее событие; IndexError, если календарь пуст."""
+        lane = self.lane
+        heap = self._heap
+        if heap is not None:
+            if lane and not (heap and heap[0] < lane[0]):
+                entry = lane.popleft()
+            else:
+                entry = heapq.heappop(heap)
+        elif lane:
+            backend = self.backend
+            # В календаре может остаться более раннее событие с тем же временем
+            if len(backend) and backend.peek() < lane[0]:
+                entry = backend.pop()
+            else:
+                entry = lane.popleft()
+        else:
+            entry = self.backend.pop()
+        self.now = entry[0]
+        return entry
+
+    def peek(self) -> EventEntry:
+        lane = self.lane
+        if lane:
+            if len(self.backend):
+                return min(self.backend.peek(), lane[0])
+            return lane[0]
+        return self.backend.peek()
+
+    def peek_time(self) -> float:
+        return self.peek()[0]
+
+    def upcoming(self, count: int) -> List[EventEntry]:
+        return heapq.nsmallest(count, self.entries())
+
+    def entries(self) -> Iterable[EventEntry]:
+        yield from self.lane
+        yield from self.backend.entries()
+
+    def __len__(self) -> int:
+        return len(self.lane) + len(self.backend)
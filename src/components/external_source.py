@@ -0,0 +1,73 @@
+# src/components/external_source.py
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+from ..interfaces.i_source import ITaskSource
+from ..metrics.profiler import LatencyHistogram
+from ..models.task_table import TaskTable, TaskHandle, NO_TIME
+
+NO_ARRIVAL = float("inf")
+
+
+class ExternalSource(ITaskSource):
+    """
+    Источник внешнего потока заказов (живой склад, очередь, сокет): заявки передаются
+    через submit() с модельным временем поступления и выдаются в порядке поступления.
+    Когда очередь пуста, время следующей генерации бесконечно и диспетчер не планирует
+    генерацию - после submit() в пустую очередь ее нужно запланировать заново
+    (Dispatcher.wake_source), о чем сообщает возвращаемое значение.
+    """
+
+    def __init__(self, source_id: int, task_table: Optional[TaskTable] = None):
+        self.id = source_id
+        self.tasks = task_table if task_table is not None else TaskTable()
+        self.next_task_id = 1
+        # (модельное время, требуемое время обслуживания, момент приема по perf_counter_ns)
+        self.pending: Deque[Tuple[float, float, int]] = deque()
+        self.idle = True  # Генерация не запланирована
+        self._last_time = 0.0
+        # Задержка от приема заказа до его поступления в модель (реальное время, нс)
+        self.latency = LatencyHistogram()
+
+    def submit(self, model_time: float, service_demand: float = NO_TIME) -> bool:
+        """Принимает заказ; True - источник простаивал и генерацию нужно запланировать."""
+        # Время поступлений не убывает, даже если часы отправителя отстают
+        if model_time < self._last_time:
+            model_time = self._last_time
+        self._last_time = model_time
+        self.pending.append((model_time, service_demand, time.perf_counter_ns()))
+        if self.idle:
+            self.idle = False
+            return True
+        return False
+
+    @property
+    def remaining(self) -> int:
+        return len(self.pending)
+
+    def snapshot_state(self, include_rng: bool = True) -> dict:
+        return {"id": self.id, "next_task_id": self.next_task_id,
+                "pending": [(model_time, demand) for model_time, demand, _ in self.pending],
+                "last_time": self._last_time}
+
+    def restore_state(self, state: dict, restore_rng: bool = True):
+        self.next_task_id = state["next_task_id"]
+        received = time.perf_counter_ns()
+        self.pending = deque((model_time, demand, received) for model_time, demand in state["pending"])
+        self._last_time = state["last_time"]
+        self.idle = not self.pending
+
+    def get_next_generation_time(self) -> float:
+        if self.pending:
+            return self.pending[0][0]
+        self.idle = True
+        return NO_ARRIVAL
+
+    def generate_task(self, current_time: float) -> Optional[TaskHandle]:
+        if self.pending and current_time >= self.pending[0][0]:
+            _, demand, received = self.pending.popleft()
+            task = self.tasks.create(self.next_task_id, self.id, current_time, service_demand=demand)
+            self.next_task_id += 1
+            self.latency.add(time.perf_counter_ns() - received)
+            return task
+        return None
@@ -1,26 +1,72 @@
 # src/components/source.py
+import random
 from typing import Optional
 from ..interfaces.i_source import ITaskSource
-from ..models.task import Task
+from ..models.task_table import TaskTable, TaskHandle
+from ..rng.variates import Distribution, VariateStream, make_distribution
 
 class Source(ITaskSource):
-    def __init__(self, source_id: int, generation_interval: float = 1.0):
+    def __init__(self, source_id: int, generation_interval: float = 1.0,
+                 task_table: Optional[TaskTable] = None, arrival: str = "fixed",
+                 rng: Optional[random.Random] = None, interarrival: Optional[Distribution] = None,
+                 block_size: int = 4096, antithetic: bool = False, service: Optional[Distribution] = None,
+                 service_rng: Optional[random.Random] = None):
         self.id = source_id
         self.generation_interval = generation_interval
         self.last_generation_time = 0.0
         self.next_task_id = 1
+        # Общая таблица заявок (диспетчер подставляет свою при инициализации)
+        self.tasks = task_table if task_table is not None else TaskTable()
+        # "fixed" - заявки через равные интервалы, "poisson" - экспоненциальные интервалы (ИБ, И31);
+        # произвольный закон задается распределением interarrival
+        if interarrival is None:
+            interarrival = make_distribution(arrival, generation_interval)
+        self.arrival = arrival
+        self.interarrival = VariateStream(interarrival, rng, block_size, antithetic)
+        self.next_interval = self.interarrival.draw()
+        self._next_interval = self.interarrival.next_value
+        # Время обслуживания, разыгрываемое источником для каждой заявки (service_demand), а не прибором:
+        # при общих случайных числах заявка сохраняет его при любом числе и порядке приборов
+        self.service_stream = VariateStream(service, service_rng, block_size, antithetic) if service else None
+
+    def snapshot_state(self, include_rng: bool = True) -> dict:
+        state = {
+            "id": self.id,
+            "last_generation_time": self.last_generation_time,
+            "next_task_id": self.next_task_id,
+            # Следующая генерация уже в календаре, поэтому интервал до нее сохраняется всегда
+            "next_interval": self.next_interval,
+            "interarrival": self.interarrival.snapshot_state() if include_rng else None,
+            "service": (self.service_stream.snapshot_state()
+                        if include_rng and self.service_stream is not None else None),
+        }
+        self._next_interval = self.interarrival.next_value
+        return state
+
+    def restore_state(self, state: dict, restore_rng: bool = True):
+        self.last_generation_time = state["last_generation_time"]
+        self.next_task_id = state["next_task_id"]
+        self.next_interval = state["next_interval"]
+        if restore_rng:
+            self.interarrival.restore_state(state["interarrival"])
+            if self.service_stream is not None:
+                self.service_stream.restore_state(state.get("service"))
+        self._next_interval = self.interarrival.next_value
 
     def get_next_generation_time(self) -> float:
-        return self.last_generation_time + self.generation_interval
+        return self.last_generation_time + self.next_interval
 
-    def generate_task(self, current_time: float) -> Optional[Task]:
+    def generate_task(self, current_time: float) -> Optional[TaskHandle]:
         if current_time >= self.get_next_generation_time():
-            task = Task(
-                id=self.next_task_id,
-                source_id=self.id,
-                timestamp=current_time
-            )
+            task = self.tasks.create(self.next_task_id, self.id, current_time)
+            if self.service_stream is not None:
+                self.tasks.service_demand[task] = self.service_stream.draw()
             self.next_task_id += 1
             self.last_generation_time = current_time
+            try:
+                self.next_interval = self._next_interval()
+            except StopIteration:  # Блок предварительно сгенерированных значений исчерпан
+                self.next_interval = self.interarrival.draw()
+                self._next_interval = self.interarrival.next_value
             return task
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,60 @@
+# src/components/trace_source.py
+from typing import Optional, Union
+from ..interfaces.i_source import ITaskSource
+from ..models.task_table import TaskTable, TaskHandle, NO_TIME
+from ..traces.arrivals import ArrivalTrace
+
+NO_ARRIVAL = float("inf")
+
+
+class TraceSource(ITaskSource):
+    """
+    Источник, воспроизводящий реальный журнал заказов из файла трассы поступлений.
+    Трасса читается через mmap по одной записи за генерацию, поэтому время запуска
+    и занимаемая память не зависят от ее длины.
+    """
+
+    def __init__(self, source_id: int, trace: Union[str, ArrivalTrace],
+                 task_table: Optional[TaskTable] = None, time_offset: Optional[float] = None):
+        self.id = source_id
+        self.trace = trace if isinstance(trace, ArrivalTrace) else ArrivalTrace(trace)
+        self.tasks = task_table if task_table is not None else TaskTable()
+        self.next_task_id = 1
+        self.position = 0  # Номер следующей записи трассы
+        self._timestamps = self.trace.timestamps
+        self._demands = self.trace.demands
+        self._count = len(self.trace)
+        # Сдвиг времени трассы к модельному; по умолчанию первая заявка приходит в момент 0
+        if time_offset is None:
+            time_offset = self._timestamps[0] if self._count else 0.0
+        self.time_offset = time_offset
+
+    @property
+    def remaining(self) -> int:
+        return self._count - self.position
+
+    def snapshot_state(self, include_rng: bool = True) -> dict:
+        return {"id": self.id, "trace": self.trace.path, "position": self.position,
+                "next_task_id": self.next_task_id, "time_offset": self.time_offset}
+
+    def restore_state(self, state: dict, restore_rng: bool = True):
+        if state["position"] > self._count:
+            raise ValueError(f"Trace {self.trace.path} is shorter than the checkpointed position")
+        self.position = state["position"]
+        self.next_task_id = state["next_task_id"]
+        self.time_offset = state["time_offset"]
+
+    def get_next_generation_time(self) -> float:
+        if self.position < self._count:
+            return self._timestamps[self.position] - self.time_offset
+        return NO_ARRIVAL  # Трасса исчерпана
+
+    def generate_task(self, current_time: float) -> Optional[TaskHandle]:
+        position = self.position
+        if position < self._count and current_time >= self._timestamps[position] - self.time_offset:
+            demand = self._demands[position] if self._demands is not None else NO_TIME
+            task = self.tasks.create(self.next_task_id, self.id, current_time, service_demand=demand)
+            self.next_task_id += 1
+            self.position = position + 1
+            return task
+        return None
@@ -0,0 +1,103 @@
+# src/config.py
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+from .components import AggregateSource, Source, TraceSource, Device, DeviceManager, Dispatcher, create_buffer
+from .interfaces.i_buffer import IBuffer
+from .interfaces.i_source import ITaskSource
+from .rng.streams import make_stream
+from .rng.variates import make_distribution
+
+
+@dataclass
+class ModelConfig:
+    num_sources: int = 1
+    num_devices: int = 1
+    buffer_size: int = 3
+    # Дисциплина буфера (components.disciplines.BUFFER_DISCIPLINES): "ring" - исходная Д10З1/Д10О1/Д2Б1
+    buffer_discipline: str = "ring"
+    generation_interval: float = 2.0
+    service_time_min: float = 1.0
+    service_time_max: float = 3.0
+    tasks_per_source: int = 5
+    # Закон поступления заявок: "fixed" - через равные интервалы, "poisson" - пуассоновский поток
+    arrival: str = "fixed"
+    # Закон времени обслуживания: "uniform" на [min, max] или "exponential"/"erlang" с тем же средним
+    service_distribution: str = "uniform"
+    # Размер блока предварительно генерируемых случайных величин
+    variate_block_size: int = 4096
+    calendar: str = "heap"
+    # Файл трассы поступлений (src.traces.arrivals): если задан, вместо генерируемых источников
+    # воспроизводится журнал заказов целиком, а tasks_per_source не используется
+    arrival_trace: str = ""
+    # Все источники - потоки одного AggregateSource (одно событие генерации в календаре);
+    # tasks_per_source тогда ограничивает их суммарно: tasks_per_source * num_sources заявок
+    aggregate_sources: bool = False
+    # Время обслуживания разыгрывает источник для каждой заявки (поток (источник, "service")), а не прибор:
+    # для общих случайных чисел при сравнении конфигураций с разным числом приборов
+    service_per_order: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class Model:
+    dispatcher: Dispatcher
+    sources: List[ITaskSource]
+    buffer: IBuffer
+    device_manager: DeviceManager
+
+    @property
+    def order_source_ids(self) -> List[int]:
+        """Номера источников, по которым ведется статистика (у агрегированного - исходные потоки)."""
+        ids: List[int] = []
+        for source in self.sources:
+            ids.extend(source.source_ids if isinstance(source, AggregateSource) else [source.id])
+        return ids
+
+
+def build_model(config: ModelConfig, seed: Optional[int] = None, replication: int = 0,
+                verbose: int = 0, antithetic: bool = False) -> Model:
+    """
+    Собирает источники, буфер, приборы и диспетчер по конфигурации и планирует
+    первые генерации. Если seed задан, каждый источник и прибор получает собственный
+    поток случайных чисел (seed, "replication", replication, компонент, номер);
+    иначе используется общий генератор модуля random. antithetic=True - те же потоки
+    с антитетическим преобразованием (u -> 1 - u): пара к реплике с тем же номером.
+    """
+    def stream(*path):
+        return make_stream(seed, "replication", replication, *path) if seed is not None else None
+
+    service = make_distribution(config.service_distribution,
+                                mean=(config.service_time_min + config.service_time_max) / 2,
+                                low=config.service_time_min, high=config.service_time_max)
+    if config.arrival_trace:
+        sources = [TraceSource(1, config.arrival_trace)]
+        tasks_per_source = None
+    elif config.aggregate_sources:
+        if config.service_per_order:
+            raise ValueError("service_per_order is not supported together with aggregate_sources")
+        sources = [AggregateSource(range(1, config.num_sources + 1), config.generation_interval,
+                                   arrival=config.arrival, rng=stream("aggregate_source"),
+                                   block_size=config.variate_block_size, antithetic=antithetic,
+                                   origin_rng=stream("aggregate_source", "origin"))]
+        tasks_per_source = config.tasks_per_source * config.num_sources
+    else:
+        order_service = service if config.service_per_order else None
+        sources = [Source(i + 1, generation_interval=config.generation_interval, arrival=config.arrival,
+                          rng=stream("source", i + 1), block_size=config.variate_block_size,
+                          antithetic=antithetic, service=order_service,
+                          service_rng=stream("source", i + 1, "service") if order_service else None)
+                   for i in range(config.num_sources)]
+        tasks_per_source = config.tasks_per_source
+    buffer = create_buffer(config.buffer_discipline, config.buffer_size)
+    device_manager = DeviceManager()
+    device_manager.add_devices(
+        Device(device_id=i + 1, service_time_min=config.service_time_min,
+               service_time_max=config.service_time_max, rng=stream("device", i + 1),
+               service=service, block_size=config.variate_block_size, antithetic=antithetic)
+        for i in range(config.num_devices))
+    dispatcher = Dispatcher(buffer, device_manager, verbose=verbose, calendar=config.calendar)
+    dispatcher.initialize_sources(sources, tasks_per_source)
+    return Model(dispatcher, sources, buffer, device_manager)
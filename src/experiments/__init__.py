@@ -0,0 +1 @@
+# src/experiments/__init__.py
@@ -0,0 +1,313 @@
+# src/experiments/network.py
+"""
+Сеть складов: у каждого склада свой диспетчер, вытесненные из буфера заказы передаются
+соседнему складу (по кольцу) и поступают к нему через время перевозки.
+
+Синхронизация консервативная, окнами предпросмотра (lookahead): L - наименьшее время
+перевозки. Заказ, вытесненный в окне [kL, (k+1)L), приходит не раньше (k+1)L, поэтому
+склады обрабатывают окно независимо, а после барьера получают переданные заказы.
+Склады делятся на группы, по группе на процесс; координатор рассылает входящие заказы
+и собирает исходящие. Внутри склада поступления вставляются в порядке
+(время, склад-отправитель, номер передачи), поэтому результат не зависит от числа
+процессов и совпадает с последовательным прогоном по тем же окнам (run_sequential).
+
+Переданные заказы учитываются на складе-получателе как источник TRANSFER_SOURCE_ID;
+повторно вытесненный переданный заказ теряется (одна пересылка).
+
+Запуск: python -m src.experiments.network --warehouses 24 --workers 4 --until-time 2000 --check
+"""
+import argparse
+import math
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from ..config import ModelConfig, build_model
+from ..models.enums import EventType
+from ..models.task_table import STATUS_PENDING
+from .replication import add_config_arguments, config_from_args
+
+TRANSFER_SOURCE_ID = 0
+# Переданный заказ: (время прибытия, склад-отправитель, номер передачи, склад-получатель, время обслуживания)
+Transfer = Tuple[float, int, int, int, float]
+
+
+@dataclass
+class NetworkConfig:
+    warehouses: List[ModelConfig]
+    # Время перевозки от каждого склада к следующему по кольцу (одно значение - для всех)
+    transfer_delay: Union[float, Sequence[float]] = 5.0
+
+    def delay(self, warehouse: int) -> float:
+        if isinstance(self.transfer_delay, (int, float)):
+            return float(self.transfer_delay)
+        return float(self.transfer_delay[warehouse])
+
+    def target(self, warehouse: int) -> int:
+        return (warehouse + 1) % len(self.warehouses)
+
+    @property
+    def lookahead(self) -> float:
+        return min(self.delay(w) for w in range(len(self.warehouses)))
+
+
+@dataclass
+class WarehouseResult:
+    warehouse: int
+    events: int
+    generated: int
+    completed: int
+    rejected: int
+    transferred_out: int
+    received: int
+    lost: int
+    mean_time_in_system: float
+
+
+@dataclass
+class NetworkResult:
+    warehouses: List[WarehouseResult]
+    windows: int
+    workers: int
+    wall_time: float = 0.0
+    transfers: int = 0
+
+    def key(self) -> List[tuple]:
+        """Сравнимое представление результатов (NaN заменен на None: NaN не равен сам себе)."""
+        return [tuple(None if isinstance(v, float) and math.isnan(v) else v for v in vars(w).values())
+                for w in self.warehouses]
+
+
+class Warehouse:
+    """Модель одного склада с перехватом вытесненных заказов."""
+
+    def __init__(self, index: int, config: ModelConfig, seed: int, delay: float, target: int):
+        self.index = index
+        self.delay = delay
+        self.target = target
+        # Потоки случайных чисел склада не зависят от того, в каком процессе он считается
+        self.model = build_model(config, seed=seed, replication=index)
+        self.dispatcher = self.model.dispatcher
+        self.dispatcher.on_task_rejected = self._on_rejected
+        self.outbox: List[Transfer] = []
+        self.transferred_out = 0
+        self.received = 0
+        self.lost = 0
+        self.events = 0
+
+    def _on_rejected(self, task: int):
+        tasks = self.dispatcher.tasks
+        # Передаются только собственные заказы; заглушки и уже переданные заказы теряются
+        if tasks.source_id[task] <= TRANSFER_SOURCE_ID:
+            if tasks.source_id[task] == TRANSFER_SOURCE_ID:
+                self.lost += 1
+            return
+        self.transferred_out += 1
+        self.outbox.append((self.dispatcher.current_time + self.delay, self.index, self.transferred_out,
+                            self.target, tasks.service_demand[task]))
+
+    def inject(self, transfers: List[Transfer]):
+        dispatcher = self.dispatcher
+        for arrival, _, _, _, demand in sorted(transfers):
+            self.received += 1
+            task = dispatcher.tasks.create(self.received, TRANSFER_SOURCE_ID, arrival, STATUS_PENDING, demand)
+            dispatcher.stats["generated_by_source"][TRANSFER_SOURCE_ID] += 1
+            dispatcher.schedule_event(arrival, EventType.TASK_ARRIVES_AT_DISPATCHER, task)
+
+    def advance(self, end: float) -> List[Transfer]:
+        """Обрабатывает события со временем строго меньше end и возвращает переданные заказы."""
+        self.events += self.dispatcher.run(until_time=math.nextafter(end, -math.inf))
+        outbox, self.outbox = self.outbox, []
+        return outbox
+
+    def result(self) -> WarehouseResult:
+        stats = self.dispatcher.stats
+        completed = sum(stats["completed_by_source"].values())
+        return WarehouseResult(
+            warehouse=self.index,
+            events=self.events,
+            generated=sum(stats["generated_by_source"].values()),
+            completed=completed,
+            rejected=sum(stats["rejected_by_source"].values()),
+            transferred_out=self.transferred_out,
+            received=self.received,
+            lost=self.lost,
+            mean_time_in_system=sum(s.mean * s.count for s in stats["system_times"].values()) / completed
+            if completed else math.nan,
+        )
+
+
+class _LocalShard:
+    """Группа складов в текущем процессе."""
+
+    def __init__(self, warehouses: List[Warehouse]):
+        self.warehouses = {w.index: w for w in warehouses}
+        self._outbox: List[Transfer] = []
+
+    def send(self, end: float, inbound: Dict[int, List[Transfer]]):
+        outbox = []
+        for index, warehouse in self.warehouses.items():
+            warehouse.inject(inbound.get(index, []))
+            outbox.extend(warehouse.advance(end))
+        self._outbox = outbox
+
+    def receive(self) -> List[Transfer]:
+        return self._outbox
+
+    def results(self) -> List[WarehouseResult]:
+        return [w.result() for w in self.warehouses.values()]
+
+    def close(self):
+        pass
+
+
+def _shard_worker(conn, specs: List[tuple], seed: int):
+    shard = _LocalShard([Warehouse(index, config, seed, delay, target)
+                         for index, config, delay, target in specs])
+    while True:
+        command, end, inbound = conn.recv()
+        if command == "window":
+            shard.send(end, inbound)
+            conn.send(shard.receive())
+        else:
+            conn.send(shard.results())
+            conn.close()
+            return
+
+
+class _ProcessShard:
+    """Группа складов в отдельном процессе; окно выполняется между send и receive."""
+
+    def __init__(self, context, specs: List[tuple], seed: int):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_shard_worker, args=(child, specs, seed), daemon=True)
+        self.process.start()
+        child.close()
+
+    def send(self, end: float, inbound: Dict[int, List[Transfer]]):
+        self.conn.send(("window", end, inbound))
+
+    def receive(self) -> List[Transfer]:
+        return self.conn.recv()
+
+    def results(self) -> List[WarehouseResult]:
+        self.conn.send(("finish", None, None))
+        return self.conn.recv()
+
+    def close(self):
+        self.conn.close()
+        self.process.join()
+
+
+def _specs(network: NetworkConfig) -> List[tuple]:
+    return [(w, config, network.delay(w), network.target(w)) for w, config in enumerate(network.warehouses)]
+
+
+def _run_windows(network: NetworkConfig, shards, shard_of: Dict[int, int], until_time: float,
+                 workers: int) -> NetworkResult:
+    lookahead = network.lookahead
+    if lookahead <= 0:
+        raise ValueError("Conservative synchronization needs a positive transfer delay (lookahead)")
+    started = time.perf_counter()
+    pending: List[Transfer] = []  # Переданные заказы, еще не отправленные получателям
+    windows = 0
+    transfers = 0
+    start = 0.0
+    try:
+        while start <= until_time:
+            # Последнее окно включает until_time, как until_time в Dispatcher.run
+            end = start + lookahead if start + lookahead <= until_time else math.nextafter(until_time, math.inf)
+            inbound: List[Dict[int, List[Transfer]]] = [{} for _ in shards]
+            later = []
+            for transfer in pending:
+                if transfer[0] < end:
+                    inbound[shard_of[transfer[3]]].setdefault(transfer[3], []).append(transfer)
+                else:
+                    later.append(transfer)
+            pending = later
+            for shard, shard_inbound in zip(shards, inbound):
+                shard.send(end, shard_inbound)
+            for shard in shards:
+                outbox = shard.receive()
+                transfers += len(outbox)
+                pending.extend(outbox)
+            windows += 1
+            start = end
+        results = sorted((r for shard in shards for r in shard.results()), key=lambda r: r.warehouse)
+    finally:
+        for shard in shards:
+            shard.close()
+    return NetworkResult(results, windows, workers, time.perf_counter() - started, transfers)
+
+
+def run_sequential(network: NetworkConfig, until_time: float, seed: int = 0) -> NetworkResult:
+    """Эталонный прогон в одном процессе по тем же окнам."""
+    shard = _LocalShard([Warehouse(*spec[:2], seed, *spec[2:]) for spec in _specs(network)])
+    return _run_windows(network, [shard], {w: 0 for w in range(len(network.warehouses))}, until_time, 1)
+
+
+def run_network(network: NetworkConfig, until_time: float, seed: int = 0,
+                workers: Optional[int] = None) -> NetworkResult:
+    """Параллельный прогон: склады распределяются по workers процессам по кругу."""
+    count = len(network.warehouses)
+    workers = max(1, min(workers or os.cpu_count() or 1, count))
+    if workers == 1:
+        return run_sequential(network, until_time, seed)
+    specs = _specs(network)
+    context = multiprocessing.get_context()
+    groups = [specs[i::workers] for i in range(workers)]
+    shards = [_ProcessShard(context, group, seed) for group in groups]
+    shard_of = {spec[0]: i for i, group in enumerate(groups) for spec in group}
+    return _run_windows(network, shards, shard_of, until_time, workers)
+
+
+def uniform_network(config: ModelConfig, warehouses: int, transfer_delay: float = 5.0,
+                    load_spread: float = 0.0) -> NetworkConfig:
+    """
+    Сеть одинаковых складов; load_spread > 0 делает интервал генерации складов неравным
+    (от interval * (1 - spread) до interval * (1 + spread)), чтобы перегруженные склады передавали заказы.
+    """
+    configs = []
+    for w in range(warehouses):
+        share = w / (warehouses - 1) if warehouses > 1 else 0.5
+        interval = config.generation_interval * (1 + load_spread * (2 * share - 1))
+        configs.append(replace(config, generation_interval=interval))
+    return NetworkConfig(configs, transfer_delay)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сеть складов с консервативной синхронизацией процессов")
+    add_config_arguments(parser, ModelConfig(num_sources=4, num_devices=2, buffer_size=10, arrival="poisson",
+                                             generation_interval=4.0, tasks_per_source=10 ** 12))
+    parser.add_argument("--warehouses", type=int, default=8)
+    parser.add_argument("--transfer-delay", type=float, default=5.0)
+    parser.add_argument("--load-spread", type=float, default=0.5)
+    parser.add_argument("--until-time", type=float, default=2000.0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true",
+                        help="сравнить с последовательным прогоном (совпадение и ускорение)")
+    args = parser.parse_args(argv)
+
+    network = uniform_network(config_from_args(args), args.warehouses, args.transfer_delay, args.load_spread)
+    result = run_network(network, args.until_time, seed=args.seed, workers=args.workers)
+    print(f"Складов: {len(result.warehouses)}, процессов: {result.workers}, окон: {result.windows} "
+          f"(L = {network.lookahead:g}), передач: {result.transfers}, время: {result.wall_time:.2f} с")
+    print(f"{'Склад':>5} {'событий':>10} {'заказов':>8} {'обслуж.':>8} {'отказов':>8} "
+          f"{'передано':>9} {'получено':>9} {'потеряно':>9} {'время в сист.':>14}")
+    for w in result.warehouses:
+        print(f"{w.warehouse:>5} {w.events:>10} {w.generated:>8} {w.completed:>8} {w.rejected:>8} "
+              f"{w.transferred_out:>9} {w.received:>9} {w.lost:>9} {w.mean_time_in_system:>14.3f}")
+    if args.check:
+        reference = run_sequential(network, args.until_time, seed=args.seed)
+        same = reference.key() == result.key()
+        print(f"Последовательный прогон: {reference.wall_time:.2f} с, ускорение "
+              f"{reference.wall_time / result.wall_time:.2f}, результаты {'совпадают' if same else 'РАЗЛИЧАЮТСЯ'}")
+        if not same:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# src/experiments/replication.py
+"""
+Независимые реплики модели в пуле процессов. Каждая реплика собирается из ModelConfig
+заново, со своими потоками случайных чисел для источников и приборов, поэтому результат
+не зависит от числа процессов и порядка выполнения.
+Запуск: python -m src.experiments.replication --replications 32 --workers 8
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Optional
+
+from ..config import ModelConfig, build_model
+from ..metrics.confidence import confidence_interval
+
+
+@dataclass
+class ReplicationResult:
+    replication: int
+    events: int
+    end_time: float
+    generated: Dict[int, int]
+    rejected: Dict[int, int]
+    completed: Dict[int, int]
+    mean_time_in_system: Dict[int, float]
+
+    def rejection_probability(self, source_id: int) -> float:
+        generated = self.generated.get(source_id, 0)
+        return self.rejected.get(source_id, 0) / generated if generated else math.nan
+
+
+@dataclass
+class MetricEstimate:
+    mean: float
+    half_width: float
+    n: int
+
+    def __str__(self):
+        return f"{self.mean:.4f} ± {self.half_width:.4f}"
+
+
+@dataclass
+class ReplicationSummary:
+    config: ModelConfig
+    level: float
+    rejection_probability: Dict[int, MetricEstimate]
+    time_in_system: Dict[int, MetricEstimate]
+    results: List[ReplicationResult] = field(default_factory=list)
+    wall_time: float = 0.0
+
+
+def run_replication(config: ModelConfig, seed: int, replication: int,
+                    until_time: Optional[float] = None) -> ReplicationResult:
+    model = build_model(config, seed=seed, replication=replication)
+    dispatcher = model.dispatcher
+    events = dispatcher.run(until_time=until_time)
+    stats = dispatcher.stats
+    source_ids = model.order_source_ids
+    return ReplicationResult(
+        replication=replication,
+        events=events,
+        end_time=dispatcher.current_time,
+        generated={sid: stats["generated_by_source"][sid] for sid in source_ids},
+        rejected={sid: stats["rejected_by_source"][sid] for sid in source_ids},
+        completed={sid: stats["completed_by_source"][sid] for sid in source_ids},
+        mean_time_in_system={sid: stats["system_times"][sid].mean if stats["system_times"][sid].count else math.nan
+                             for sid in source_ids},
+    )
+
+
+def _run_replication_args(args) -> ReplicationResult:
+    return run_replication(*args)
+
+
+def summarize(config: ModelConfig, results: List[ReplicationResult], level: float = 0.95) -> ReplicationSummary:
+    rejection = {}
+    time_in_system = {}
+    for source_id in range(1, config.num_sources + 1):
+        values = [r.rejection_probability(source_id) for r in results]
+        values = [v for v in values if not math.isnan(v)]
+        rejection[source_id] = MetricEstimate(*confidence_interval(values, level), len(values))
+        values = [r.mean_time_in_system[source_id] for r in results]
+        values = [v for v in values if not math.isnan(v)]
+        time_in_system[source_id] = MetricEstimate(*confidence_interval(values, level), len(values))
+    return ReplicationSummary(config, level, rejection, time_in_system, results)
+
+
+def run_replications(config: ModelConfig, replications: int, seed: int = 0, workers: Optional[int] = None,
+                     until_time: Optional[float] = None, level: float = 0.95) -> ReplicationSummary:
+    """Выполняет replications независимых реплик и возвращает средние с доверительными интервалами."""
+    workers = workers or os.cpu_count() or 1
+    tasks = [(config, seed, r, until_time) for r in range(replications)]
+    started = time.perf_counter()
+    if workers == 1:
+        results = [_run_replication_args(args) for args in tasks]
+    else:
+        # Крупные порции снижают накладные расходы на передачу задач между процессами
+        chunksize = max(1, replications // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_replication_args, tasks, chunksize=chunksize))
+    summary = summarize(config, results, level)
+    summary.wall_time = time.perf_counter() - started
+    return summary
+
+
+def add_config_arguments(parser: argparse.ArgumentParser, defaults: Optional[ModelConfig] = None):
+    defaults = defaults or ModelConfig()
+    for f in fields(ModelConfig):
+        value = getattr(defaults, f.name)
+        if isinstance(value, bool):
+            parser.add_argument("--" + f.name.replace("_", "-"), action=argparse.BooleanOptionalAction, default=value)
+        else:
+            parser.add_argument("--" + f.name.replace("_", "-"), type=type(value), default=value)
+
+
+def config_from_args(args) -> ModelConfig:
+    return ModelConfig(**{f.name: getattr(args, f.name) for f in fields(ModelConfig)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Независимые реплики модели СМО")
+    add_config_arguments(parser, ModelConfig(tasks_per_source=10_000))
+    parser.add_argument("--replications", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--until-time", type=float, default=None)
+    parser.add_argument("--level", type=float, default=0.95)
+    args = parser.parse_args(argv)
+
+    summary = run_replications(config_from_args(args), args.replications, seed=args.seed,
+                               workers=args.workers, until_time=args.until_time, level=args.level)
+    events = sum(r.events for r in summary.results)
+    print(f"Реплик: {len(summary.results)}, событий: {events}, время: {summary.wall_time:.2f} с")
+    print(f"Доверительная вероятность: {summary.level}")
+    for source_id in sorted(summary.rejection_probability):
+        print(f"  И{source_id}: вероятность отказа {summary.rejection_probability[source_id]}, "
+              f"время в системе {summary.time_in_system[source_id]}")
+
+
+if __name__ == "__main__":
+    main()
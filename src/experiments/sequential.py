@@ -0,0 +1,306 @@
+# src/experiments/sequential.py
+"""
+Последовательная остановка: один длинный прогон продолжается, пока доверительный интервал
+каждой запрошенной метрики не станет уже заданной относительной полуширины.
+
+Прогон делится на микропорции по micro_batch обслуженных заявок (Dispatcher.run(max_completed=...)),
+для каждой метрики запоминаются приращения числителя и знаменателя (отказы/сгенерированные,
+время в системе/обслуженные и т.д.). Разгон отбрасывается по правилу MSER-5 - точка усечения,
+минимизирующая стандартную ошибку среднего по оставшимся группам из пяти микропорций, - а
+интервал строится методом средних по батчам: оставшиеся микропорции объединяются в batches
+батчей, оценка - отношение сумм, полуширина - по t-распределению с batches - 1 степенями свободы.
+Проверки выполняются в геометрически растущих точках, поэтому их суммарная стоимость O(n).
+
+Запуск: python -m src.experiments.sequential --precision 0.02 --metrics rejection system_time
+"""
+import argparse
+import math
+import time
+from dataclasses import dataclass, replace
+from statistics import fmean
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..config import Model, ModelConfig, build_model
+from ..metrics.confidence import student_t_quantile
+from ..metrics.time_weighted import TimeWeightedMetrics
+from .replication import add_config_arguments, config_from_args
+
+# Метрики: rejection - вероятность отказа, system_time / wait_time - среднее время в системе /
+# в буфере, utilization - загрузка приборов. Для первых трех можно указать источник: "rejection:2"
+METRICS = ("rejection", "system_time", "wait_time", "utilization")
+# Число заявок источника в режиме последовательной остановки: прогон ограничивает max_orders
+UNLIMITED_TASKS = 10 ** 12
+MSER_GROUP = 5
+
+
+@dataclass
+class SequentialEstimate:
+    metric: str
+    mean: float
+    half_width: float
+    batches: int
+    batch_size: int  # Микропорций в батче
+    lag1: float  # Автокорреляция соседних средних по батчам (близка к нулю, если батчи независимы)
+
+    @property
+    def relative_half_width(self) -> float:
+        if self.half_width == 0.0:
+            return 0.0
+        return self.half_width / abs(self.mean) if self.mean else math.inf
+
+    def __str__(self):
+        return f"{self.mean:.4f} ± {self.half_width:.4f} ({self.relative_half_width:.1%})"
+
+
+@dataclass
+class SequentialResult:
+    estimates: Dict[str, SequentialEstimate]
+    converged: bool
+    precision: float
+    level: float
+    orders: int  # Сгенерировано заявок за весь прогон
+    warmup_orders: int  # Из них в отброшенном разгоне
+    warmup_time: float
+    events: int
+    end_time: float
+    wall_time: float
+
+    def report(self) -> str:
+        status = "достигнута" if self.converged else "не достигнута"
+        lines = [f"Точность {self.precision:.1%} при доверительной вероятности {self.level}: {status}",
+                 f"Заявок: {self.orders}, из них в разгоне {self.warmup_orders} "
+                 f"(до момента {self.warmup_time:.2f}), событий: {self.events}, "
+                 f"модельное время: {self.end_time:.2f}, время прогона: {self.wall_time:.2f} с"]
+        for name, estimate in self.estimates.items():
+            lines.append(f"  {name}: {estimate}, батчей {estimate.batches} по {estimate.batch_size} "
+                         f"микропорций, автокорреляция {estimate.lag1:+.2f}")
+        return "\n".join(lines)
+
+
+def _parse_metric(name: str) -> Tuple[str, Optional[int]]:
+    metric, _, source = name.partition(":")
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric}, expected one of {', '.join(METRICS)}")
+    if source and metric == "utilization":
+        raise ValueError("Utilization is not defined per source")
+    return metric, int(source) if source else None
+
+
+def _cumulative(dispatcher, metric: str, source_id: Optional[int]) -> Tuple[float, float]:
+    """Накопленные числитель и знаменатель метрики с начала прогона."""
+    stats = dispatcher.stats
+
+    def total(key: str) -> float:
+        values = stats[key]
+        if source_id is not None:
+            return values.get(source_id, 0)
+        # Заглушки кольцевого буфера (источник -1) - не заказы
+        return sum(value for sid, value in values.items() if sid >= 0)
+
+    def completed_total(key: str) -> Tuple[float, float]:
+        # Только обслуженные заявки: total_time_in_system_by_source включает и время вытесненных
+        summaries = stats[key]
+        if source_id is not None:
+            selected = [summaries[source_id]] if source_id in summaries else []
+        else:
+            selected = [summary for sid, summary in summaries.items() if sid >= 0]
+        return sum(s.mean * s.count for s in selected), sum(s.count for s in selected)
+
+    if metric == "rejection":
+        return total("rejected_by_source"), total("generated_by_source")
+    if metric == "system_time":
+        return completed_total("system_times")
+    if metric == "wait_time":
+        return completed_total("wait_times")
+    busy = dispatcher.time_metrics.busy_devices
+    now = dispatcher.current_time
+    return busy.mean(now) * busy.duration(now), busy.duration(now) * len(dispatcher.device_manager.devices)
+
+
+def _ratio(numerator: float, denominator: float) -> float:
+    return numerator / denominator if denominator else 0.0
+
+
+def mser_truncation(values: Sequence[float]) -> int:
+    """
+    Точка усечения MSER: d, минимизирующее сумму квадратов отклонений values[d:] от их среднего,
+    деленную на (n - d)^2. Ищется в первой половине ряда; O(n) по суффиксным суммам.
+    """
+    n = len(values)
+    best_d, best = 0, math.inf
+    suffix_sum = suffix_squares = 0.0
+    sums = [0.0] * (n + 1)
+    squares = [0.0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        suffix_sum += values[i]
+        suffix_squares += values[i] * values[i]
+        sums[i], squares[i] = suffix_sum, suffix_squares
+    for d in range(n // 2 + 1):
+        m = n - d
+        statistic = (squares[d] - sums[d] * sums[d] / m) / (m * m)
+        if statistic < best:
+            best_d, best = d, statistic
+    return best_d
+
+
+def _batch_means(numerators: Sequence[float], denominators: Sequence[float], batches: int,
+                 level: float) -> Tuple[float, float, int, float]:
+    """Оценка (отношение сумм), полуширина, размер батча и автокорреляция средних по батчам."""
+    size = len(numerators) // batches
+    start = len(numerators) - size * batches  # Остаток отбрасывается из начала, ближе к разгону
+    values = [_ratio(sum(numerators[i:i + size]), sum(denominators[i:i + size]))
+              for i in range(start, len(numerators), size)]
+    mean = _ratio(sum(numerators[start:]), sum(denominators[start:]))
+    center = fmean(values)
+    deviations = [v - center for v in values]
+    variance = sum(d * d for d in deviations) / (batches - 1)
+    half_width = student_t_quantile(0.5 + level / 2.0, batches - 1) * math.sqrt(variance / batches)
+    lag1 = (sum(a * b for a, b in zip(deviations, deviations[1:])) / (variance * (batches - 1))
+            if variance > 0.0 else 0.0)
+    return mean, half_width, size, lag1
+
+
+class _Series:
+    """Приращения числителя и знаменателя метрики по микропорциям."""
+
+    def __init__(self, dispatcher, name: str):
+        self.name = name
+        self.metric, self.source_id = _parse_metric(name)
+        self.numerators: List[float] = []
+        self.denominators: List[float] = []
+        self._last = _cumulative(dispatcher, self.metric, self.source_id)
+
+    def record(self, dispatcher):
+        numerator, denominator = _cumulative(dispatcher, self.metric, self.source_id)
+        self.numerators.append(numerator - self._last[0])
+        self.denominators.append(denominator - self._last[1])
+        self._last = (numerator, denominator)
+
+    def mser_truncation(self) -> int:
+        """Точка усечения в микропорциях по правилу MSER-5."""
+        groups = len(self.numerators) // MSER_GROUP
+        values = [_ratio(sum(self.numerators[j * MSER_GROUP:(j + 1) * MSER_GROUP]),
+                         sum(self.denominators[j * MSER_GROUP:(j + 1) * MSER_GROUP]))
+                  for j in range(groups)]
+        return mser_truncation(values) * MSER_GROUP
+
+
+def _estimates_at(series: List[_Series], truncation: int, batches: int,
+                  level: float) -> Dict[str, SequentialEstimate]:
+    estimates = {}
+    for s in series:
+        mean, half_width, size, lag1 = _batch_means(s.numerators[truncation:], s.denominators[truncation:],
+                                                    batches, level)
+        estimates[s.name] = SequentialEstimate(s.name, mean, half_width, batches, size, lag1)
+    return estimates
+
+
+def _estimate(series: List[_Series], batches: int, level: float) -> Tuple[Optional[Dict[str, SequentialEstimate]], int]:
+    """Оценки после отбрасывания разгона; None, если разгон не закончился или данных мало."""
+    n = len(series[0].numerators)
+    truncations = [s.mser_truncation() for s in series]
+    truncation = max(truncations)
+    # Минимум MSER на границе поиска - ряд еще не вышел на установившийся режим
+    boundary = (n // MSER_GROUP) // 2 * MSER_GROUP
+    if any(0 < t >= boundary for t in truncations) or n - truncation < 2 * batches:
+        return None, truncation
+    return _estimates_at(series, truncation, batches, level), truncation
+
+
+def run_until_precision(model: Model, metrics: Sequence[str] = ("rejection", "system_time"),
+                        precision: float = 0.05, level: float = 0.95, batches: int = 20,
+                        micro_batch: int = 100, min_micro_batches: int = 200,
+                        max_orders: int = 10_000_000) -> SequentialResult:
+    """
+    Продолжает прогон модели, пока относительная полуширина интервала каждой метрики не станет
+    не больше precision, или пока не будет сгенерировано max_orders заявок (или не опустеет календарь).
+    """
+    dispatcher = model.dispatcher
+    if any(_parse_metric(name)[0] == "utilization" for name in metrics) and dispatcher.time_metrics is None:
+        TimeWeightedMetrics().attach(dispatcher)
+    series = [_Series(dispatcher, name) for name in metrics]
+
+    def orders() -> int:
+        return sum(dispatcher.stats["generated_by_source"].values())
+
+    # Сгенерировано заявок и модельное время в конце каждой микропорции (элемент 0 - начало)
+    marks: List[Tuple[int, float]] = [(orders(), dispatcher.current_time)]
+    started = time.perf_counter()
+    events = 0
+    check_at = min_micro_batches
+    estimates, truncation = None, 0
+    converged = False
+    while marks[-1][0] - marks[0][0] < max_orders:
+        target = dispatcher.completed_count + micro_batch
+        events += dispatcher.run(max_completed=target)
+        if dispatcher.completed_count < target:  # Календарь опустел
+            break
+        for s in series:
+            s.record(dispatcher)
+        marks.append((orders(), dispatcher.current_time))
+        if len(marks) - 1 >= check_at:
+            estimates, truncation = _estimate(series, batches, level)
+            if estimates is not None and all(e.relative_half_width <= precision for e in estimates.values()):
+                converged = True
+                break
+            check_at = int(check_at * 1.1) + 1
+    if not converged and len(marks) > 1:
+        estimates, truncation = _estimate(series, batches, level)
+        if estimates is None:
+            # Разгон не отделился: оценки по всему ряду, если хватает микропорций
+            truncation = 0
+            estimates = _estimates_at(series, 0, batches, level) if len(marks) - 1 >= 2 * batches else {}
+    return SequentialResult(
+        estimates=estimates or {},
+        converged=converged,
+        precision=precision,
+        level=level,
+        orders=marks[-1][0] - marks[0][0],
+        warmup_orders=marks[truncation][0] - marks[0][0],
+        warmup_time=marks[truncation][1],
+        events=events,
+        end_time=dispatcher.current_time,
+        wall_time=time.perf_counter() - started,
+    )
+
+
+def run_sequential(config: ModelConfig, seed: Optional[int] = None, **options) -> SequentialResult:
+    """Собирает модель с неограниченным числом заявок и прогоняет ее до заданной точности."""
+    model = build_model(replace(config, tasks_per_source=UNLIMITED_TASKS, arrival_trace=""), seed=seed)
+    return run_until_precision(model, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Прогон до заданной точности доверительных интервалов")
+    add_config_arguments(parser, ModelConfig(num_devices=2, buffer_size=5, generation_interval=1.2,
+                                             arrival="poisson"))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--metrics", nargs="+", default=["rejection", "system_time"],
+                        help=f"метрики ({', '.join(METRICS)}), для источника - имя:номер")
+    parser.add_argument("--precision", type=float, default=0.05, help="относительная полуширина интервала")
+    parser.add_argument("--level", type=float, default=0.95)
+    parser.add_argument("--batches", type=int, default=20)
+    parser.add_argument("--micro-batch", type=int, default=100, help="обслуженных заявок в микропорции")
+    parser.add_argument("--max-orders", type=int, default=10_000_000)
+    parser.add_argument("--compare-orders", type=int, default=0,
+                        help="для сравнения прогнать модель фиксированной длины с этим числом заявок")
+    args = parser.parse_args(argv)
+
+    config = config_from_args(args)
+    result = run_sequential(config, seed=args.seed, metrics=args.metrics, precision=args.precision,
+                            level=args.level, batches=args.batches, micro_batch=args.micro_batch,
+                            max_orders=args.max_orders)
+    print(result.report())
+    if args.compare_orders:
+        per_source = max(1, args.compare_orders // max(1, config.num_sources))
+        model = build_model(replace(config, tasks_per_source=per_source, arrival_trace=""), seed=args.seed)
+        started = time.perf_counter()
+        model.dispatcher.run()
+        fixed_wall = time.perf_counter() - started
+        print(f"Фиксированный прогон: {per_source * config.num_sources} заявок, {fixed_wall:.2f} с - "
+              f"в {per_source * config.num_sources / max(1, result.orders):.1f} раза больше заявок, "
+              f"в {fixed_wall / max(result.wall_time, 1e-9):.1f} раза дольше")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# src/experiments/splitting.py
+"""
+Оценка малой вероятности переполнения буфера (доли заявок, поступивших в полный буфер и
+вызвавших дисциплину вытеснения) многоуровневым расщеплением с фиксированным усилием.
+
+Экскурсия - участок траектории от подъема заполнения буфера до уровня levels[0] (после того как
+буфер опускался до lower) до следующего возвращения к lower. Тогда
+
+    переполнений на заявку = (экскурсий на заявку) * P(L2 | L1) * ... * P(Lm | Lm-1) * E[переполнений | Lm],
+
+где P(Lk+1 | Lk) - вероятность подняться от первого достижения Lk до Lk+1 раньше, чем опуститься
+до lower, а Lm = емкость буфера. Первый множитель не мал и оценивается обычным прогоном, который
+заодно собирает состояния входа на уровень L1. На каждом следующем уровне effort траекторий
+стартуют с клонов случайно выбранных состояний входа (снимок модели без генераторов, с продолжением
+на собственных потоках рабочей модели) и идут до Lk+1 или до lower. Произведение оценок несмещенно
+для фиксированного усилия; доверительный интервал строится по независимым повторениям всей схемы.
+
+Запуск: python -m src.experiments.splitting --num-devices 3 --buffer-size 10 --repetitions 10
+"""
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from statistics import NormalDist
+from typing import List, Optional, Sequence, Tuple
+
+from ..checkpoint import model_state, restore_model_state
+from ..config import Model, ModelConfig, build_model
+from ..metrics.confidence import confidence_interval
+from ..rng.streams import make_stream
+from .sequential import UNLIMITED_TASKS
+from .replication import add_config_arguments, config_from_args
+
+
+@dataclass
+class SplittingRun:
+    """Одно повторение схемы расщепления."""
+    estimate: float
+    excursions_per_order: float
+    level_probabilities: List[float]  # P(Lk+1 | Lk) для k = 1..m-1
+    overflows_per_entry: float  # Переполнений от входа на верхний уровень до возвращения к lower
+    orders: int  # Заявок в обычном прогоне первого этапа
+    crude_events: int
+    events: int  # Всего событий, включая траектории
+    truncated: int = 0  # Траекторий, оборванных по max_trajectory_events
+
+
+@dataclass
+class SplittingResult:
+    config: ModelConfig
+    levels: List[int]
+    lower: int
+    effort: int
+    level: float
+    mean: float
+    half_width: float
+    runs: List[SplittingRun] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    @property
+    def events(self) -> int:
+        return sum(run.events for run in self.runs)
+
+    def crude_events_needed(self) -> float:
+        """
+        Событий, которые понадобились бы обычному прогону для той же относительной полуширины
+        (биномиальная оценка без учета корреляции, т.е. снизу).
+        """
+        if not self.mean or not math.isfinite(self.half_width) or not self.half_width:
+            return math.nan
+        z = NormalDist().inv_cdf(0.5 + self.level / 2.0)
+        relative = self.half_width / self.mean
+        orders = z * z * (1.0 - self.mean) / (self.mean * relative * relative)
+        events_per_order = (sum(run.crude_events for run in self.runs)
+                            / max(1, sum(run.orders for run in self.runs)))
+        return orders * events_per_order
+
+    def report(self) -> str:
+        probabilities = [_mean_or_nan([run.level_probabilities[k] for run in self.runs])
+                         for k in range(len(self.levels) - 1)]
+        lines = [
+            f"Вероятность переполнения: {self.mean:.4e} ± {self.half_width:.4e} "
+            f"(доверительная вероятность {self.level}, повторений {len(self.runs)})",
+            f"Уровни {self.levels} (нижний {self.lower}), траекторий на уровень: {self.effort}",
+            f"  экскурсий на заявку: {_mean_or_nan([run.excursions_per_order for run in self.runs]):.4e}",
+            "  P(следующий уровень): " + ", ".join(f"{p:.3f}" for p in probabilities),
+            f"  переполнений с верхнего уровня: {_mean_or_nan([run.overflows_per_entry for run in self.runs]):.3f}",
+            f"Событий: {self.events:,}, время: {self.wall_time:.2f} с",
+        ]
+        needed = self.crude_events_needed()
+        if math.isfinite(needed):
+            gain = needed / max(1, self.events)
+            if gain > 1.0:
+                lines.append(f"Обычному прогону для той же точности нужно не меньше {needed:,.0f} событий "
+                             f"(в {gain:,.1f} раза больше)")
+            else:
+                # needed - оценка снизу, поэтому можно утверждать только отсутствие выигрыша
+                lines.append(f"Выигрыша нет: обычному прогону для той же точности могло хватить {needed:,.0f} "
+                             f"событий (доля {gain:.2f} от затраченных расщеплением)")
+        truncated = sum(run.truncated for run in self.runs)
+        if truncated:
+            lines.append(f"Внимание: {truncated} траекторий оборвано по ограничению числа событий")
+        return "\n".join(lines)
+
+
+def _mean_or_nan(values: Sequence[float]) -> float:
+    return sum(values) / len(values) if values else math.nan
+
+
+def _overflows(model: Model) -> int:
+    # Каждое поступление в полный буфер вытесняет ровно одну заявку (или заглушку кольца)
+    return sum(model.dispatcher.stats["rejected_by_source"].values())
+
+
+def _orders(model: Model) -> int:
+    return sum(count for sid, count in model.dispatcher.stats["generated_by_source"].items() if sid >= 0)
+
+
+def _crude_stage(model: Model, first_level: int, lower: int, events: int, effort: int,
+                 rng: random.Random) -> Tuple[int, int, int, List[dict]]:
+    """
+    Обычный прогон: число экскурсий, заявок и событий, а также до effort состояний входа
+    на первый уровень (равномерная выборка из всех входов, reservoir sampling).
+    """
+    dispatcher, buffer = model.dispatcher, model.buffer
+    step = dispatcher.run_step
+    orders_before = _orders(model)
+    armed = buffer.count <= lower
+    entries: List[dict] = []
+    excursions = processed = 0
+    while processed < events and step():
+        processed += 1
+        level = buffer.count
+        if armed:
+            if level >= first_level:
+                armed = False
+                excursions += 1
+                if len(entries) < effort:
+                    entries.append(model_state(model, include_rng=False))
+                else:
+                    slot = rng.randrange(excursions)
+                    if slot < effort:
+                        entries[slot] = model_state(model, include_rng=False)
+        elif level <= lower:
+            armed = True
+    return excursions, _orders(model) - orders_before, processed, entries
+
+
+def _trajectory(model: Model, state: dict, upper: Optional[int], lower: int,
+                max_events: int) -> Tuple[Optional[bool], int, int]:
+    """
+    Продолжение клона до уровня upper (None - только до lower). Возвращает (достигнут upper,
+    None - оборвано по числу событий), число переполнений и событий.
+    """
+    restore_model_state(model, state, restore_rng=False)
+    dispatcher, buffer = model.dispatcher, model.buffer
+    dispatcher.reset_stats()
+    step = dispatcher.run_step
+    limit = upper if upper is not None else math.inf
+    processed = 0
+    reached: Optional[bool] = None
+    while processed < max_events and step():
+        processed += 1
+        level = buffer.count
+        if level >= limit:
+            reached = True
+            break
+        if level <= lower:
+            reached = False
+            break
+    return reached, _overflows(model), processed
+
+
+def run_splitting_once(config: ModelConfig, levels: Sequence[int], lower: int = 0, effort: int = 1000,
+                       crude_events: int = 200_000, warmup_events: int = 10_000, seed: int = 0,
+                       repetition: int = 0, max_trajectory_events: int = 1_000_000) -> SplittingRun:
+    config = replace(config, tasks_per_source=UNLIMITED_TASKS, arrival_trace="")
+    crude = build_model(config, seed=seed, replication=2 * repetition)
+    worker = build_model(config, seed=seed, replication=2 * repetition + 1)
+    rng = make_stream(seed, "splitting", repetition)
+    crude.dispatcher.run(max_events=warmup_events)
+
+    excursions, orders, events, entries = _crude_stage(crude, levels[0], lower, crude_events, effort, rng)
+    run = SplittingRun(estimate=0.0, excursions_per_order=excursions / orders if orders else 0.0,
+                       level_probabilities=[], overflows_per_entry=0.0, orders=orders,
+                       crude_events=events, events=events)
+    for k in range(len(levels)):
+        upper = levels[k + 1] if k + 1 < len(levels) else None
+        if not entries:  # Уровень не достигнут: оценка нулевая
+            run.level_probabilities.extend([0.0] * (len(levels) - 1 - len(run.level_probabilities)))
+            return run
+        next_entries: List[dict] = []
+        successes = overflows = 0
+        for _ in range(effort):
+            reached, overflow_count, processed = _trajectory(worker, rng.choice(entries), upper, lower,
+                                                             max_trajectory_events)
+            run.events += processed
+            overflows += overflow_count
+            if reached is None:
+                run.truncated += 1
+            elif reached:
+                successes += 1
+                next_entries.append(model_state(worker, include_rng=False))
+        if upper is None:
+            run.overflows_per_entry = overflows / effort
+        else:
+            run.level_probabilities.append(successes / effort)
+        entries = next_entries
+    run.estimate = run.excursions_per_order * math.prod(run.level_probabilities) * run.overflows_per_entry
+    return run
+
+
+def _run_splitting_args(args) -> SplittingRun:
+    config, levels, options, repetition = args
+    return run_splitting_once(config, levels, repetition=repetition, **options)
+
+
+def default_levels(buffer_size: int, lower: int = 0) -> List[int]:
+    return list(range(lower + 1, buffer_size + 1))
+
+
+def run_splitting(config: ModelConfig, levels: Optional[Sequence[int]] = None, repetitions: int = 10,
+                  workers: Optional[int] = None, confidence: float = 0.95, lower: int = 0,
+                  **options) -> SplittingResult:
+    """Независимые повторения схемы расщепления и доверительный интервал по ним."""
+    levels = list(levels) if levels else default_levels(config.buffer_size, lower)
+    if levels != sorted(set(levels)) or levels[0] <= lower or levels[-1] != config.buffer_size:
+        raise ValueError(f"Levels must increase from above {lower} up to the buffer size {config.buffer_size}")
+    options["lower"] = lower
+    tasks = [(config, levels, options, r) for r in range(repetitions)]
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers == 1 or repetitions == 1:
+        runs = [_run_splitting_args(args) for args in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            runs = list(pool.map(_run_splitting_args, tasks))
+    mean, half_width = confidence_interval([run.estimate for run in runs], confidence)
+    return SplittingResult(config, levels, lower, options.get("effort", 1000), confidence, mean, half_width,
+                           runs, time.perf_counter() - started)
+
+
+def crude_estimate(config: ModelConfig, events: int, seed: int = 0, warmup_events: int = 10_000,
+                   confidence: float = 0.95) -> Tuple[float, float, int]:
+    """Обычный прогон для сверки: оценка, биномиальная полуширина и число поступлений."""
+    model = build_model(replace(config, tasks_per_source=UNLIMITED_TASKS, arrival_trace=""),
+                        seed=seed, replication=10 ** 6)
+    model.dispatcher.run(max_events=warmup_events)
+    model.dispatcher.reset_stats()
+    model.dispatcher.run(max_events=events)
+    orders = _orders(model)
+    p = _overflows(model) / orders if orders else math.nan
+    z = NormalDist().inv_cdf(0.5 + confidence / 2.0)
+    return p, z * math.sqrt(p * (1.0 - p) / orders) if orders else math.nan, orders
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Вероятность переполнения буфера многоуровневым расщеплением")
+    add_config_arguments(parser, ModelConfig(num_devices=3, buffer_size=10, generation_interval=1.0,
+                                             arrival="poisson", service_distribution="exponential"))
+    parser.add_argument("--levels", type=int, nargs="+", default=None,
+                        help="пороги заполнения буфера (по умолчанию каждый уровень до емкости)")
+    parser.add_argument("--lower", type=int, default=0, help="уровень, на котором экскурсия заканчивается")
+    parser.add_argument("--effort", type=int, default=1000, help="траекторий на уровень")
+    parser.add_argument("--crude-events", type=int, default=200_000, help="событий обычного прогона первого этапа")
+    parser.add_argument("--repetitions", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--level", type=float, default=0.95, help="доверительная вероятность")
+    parser.add_argument("--check-events", type=int, default=0,
+                        help="для сверки прогнать обычную модель с этим числом событий")
+    args = parser.parse_args(argv)
+
+    config = config_from_args(args)
+    result = run_splitting(config, args.levels, repetitions=args.repetitions, workers=args.workers,
+                           confidence=args.level, lower=args.lower, effort=args.effort,
+                           crude_events=args.crude_events, seed=args.seed)
+    print(result.report())
+    if args.check_events:
+        started = time.perf_counter()
+        p, half_width, orders = crude_estimate(config, args.check_events, seed=args.seed, confidence=args.level)
+        print(f"Обычный прогон: {p:.4e} ± {half_width:.4e} ({orders:,} заявок, {args.check_events:,} событий, "
+              f"{time.perf_counter() - started:.2f} с)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# src/experiments/sweep.py
+"""
+Перебор параметров модели по сетке с кэшем результатов на диске.
+Ключ кэша - хэш канонической конфигурации, зерна, условий прогона и версии кода,
+поэтому повторный перебор с пересекающейся сеткой считает только новые точки.
+Аналитический отбор (--prescreen) пропускает явно перегруженные и недогруженные точки
+и укорачивает прогон там, где точна модель M/M/c/K; в таблицу для каждой точки
+добавляется аналитическая оценка и ее расхождение с моделированием.
+Запуск: python -m src.experiments.sweep --grid buffer_size=3,5,10 --grid num_devices=1,2 --out sweep.csv
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, fields, replace
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from ..analytics.queueing import Prescreen, QueueEstimate, estimate
+from ..config import ModelConfig, build_model
+from ..metrics.streaming import StreamingSummary
+from .replication import add_config_arguments, config_from_args
+
+DEFAULT_CACHE_DIR = ".sim_cache"
+SRC_ROOT = Path(__file__).resolve().parent.parent
+
+
+@dataclass
+class SweepResult:
+    config: ModelConfig
+    seed: int
+    replications: int
+    until_time: Optional[float]
+    generated: int
+    rejected: int
+    completed: int
+    rejection_probability: float
+    utilization: float
+    mean_time_in_system: float
+    p95_time_in_system: float
+    events: int
+    end_time: float
+    cached: bool = False
+    # "simulation", "coarse" (укороченный прогон) или "analytic" (точка не моделировалась)
+    method: str = "simulation"
+    # Во сколько раз укорочен прогон точки "coarse"; config - запрошенная точка сетки
+    coarsen_factor: float = 1.0
+    analytic_method: str = ""
+    analytic_rejection_probability: float = math.nan
+    analytic_utilization: float = math.nan
+    analytic_mean_time_in_system: float = math.nan
+    analytic_mean_wait_us: float = math.nan
+
+    def attach_estimate(self, analytic: QueueEstimate):
+        self.analytic_method = analytic.method
+        self.analytic_rejection_probability = analytic.rejection_probability
+        self.analytic_utilization = analytic.utilization
+        self.analytic_mean_time_in_system = analytic.mean_time_in_system
+        self.analytic_mean_wait_us = analytic.mean_wait_us
+
+    def to_row(self) -> dict:
+        row = self.config.to_dict()
+        row.update({f.name: getattr(self, f.name) for f in fields(self) if f.name != "config"})
+        # Расхождение моделирования с аналитикой (для точек без моделирования - пусто)
+        simulated = self.method != "analytic"
+        row["rejection_divergence"] = (self.rejection_probability - self.analytic_rejection_probability
+                                       if simulated else math.nan)
+        row["utilization_divergence"] = self.utilization - self.analytic_utilization if simulated else math.nan
+        row["time_in_system_relative_error"] = (
+            self.mean_time_in_system / self.analytic_mean_time_in_system - 1.0
+            if simulated and self.analytic_mean_time_in_system > 0 else math.nan)
+        return row
+
+    @classmethod
+    def from_estimate(cls, config: ModelConfig, seed: int, replications: int, until_time: Optional[float],
+                      analytic: QueueEstimate) -> "SweepResult":
+        """Точка, для которой моделирование пропущено: метрики берутся из аналитической оценки."""
+        result = cls(
+            config=config, seed=seed, replications=0, until_time=until_time,
+            generated=0, rejected=0, completed=0,
+            rejection_probability=analytic.rejection_probability, utilization=analytic.utilization,
+            mean_time_in_system=analytic.mean_time_in_system, p95_time_in_system=math.nan,
+            events=0, end_time=math.nan, method="analytic",
+        )
+        result.attach_estimate(analytic)
+        return result
+
+
+def expand_grid(base: ModelConfig, grid: Dict[str, Sequence]) -> List[ModelConfig]:
+    """Декартово произведение значений параметров поверх базовой конфигурации."""
+    names = list(grid)
+    known = {f.name for f in fields(ModelConfig)}
+    for name in names:
+        if name not in known:
+            raise ValueError(f"Unknown model parameter: {name}")
+    return [replace(base, **dict(zip(names, values)))
+            for values in itertools.product(*(grid[name] for name in names))]
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """Хэш исходных текстов модели: изменение кода делает старые записи кэша недействительными."""
+    digest = hashlib.sha256()
+    for path in sorted(SRC_ROOT.rglob("*.py")):
+        digest.update(str(path.relative_to(SRC_ROOT)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def cache_key(config: ModelConfig, seed: int, replications: int, until_time: Optional[float]) -> str:
+    payload = {
+        "config": config.to_dict(),
+        "seed": seed,
+        "replications": replications,
+        "until_time": until_time,
+        "code": code_version(),
+    }
+    if config.arrival_trace:
+        # Трасса - внешний вход модели: учитываем ее размер и время изменения
+        stat = os.stat(config.arrival_trace)
+        payload["trace"] = [stat.st_size, stat.st_mtime_ns]
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def run_point(config: ModelConfig, seed: int, replications: int = 1,
+              until_time: Optional[float] = None) -> SweepResult:
+    """Прогоняет replications реплик одной точки сетки и объединяет их статистику."""
+    generated = rejected = completed = events = 0
+    busy_time = end_time = 0.0
+    system_times = StreamingSummary()
+    for r in range(replications):
+        model = build_model(config, seed=seed, replication=r)
+        dispatcher = model.dispatcher
+        events += dispatcher.run(until_time=until_time)
+        stats = dispatcher.stats
+        for source_id in model.order_source_ids:
+            generated += stats["generated_by_source"][source_id]
+            rejected += stats["rejected_by_source"][source_id]
+            completed += stats["completed_by_source"][source_id]
+            if source_id in stats["system_times"]:
+                system_times.merge(stats["system_times"][source_id])
+        # Занятость приборов считаем и по заглушкам буфера: прибор на них тоже тратит время
+        busy_time += sum(stats["total_service_time_by_source"].values())
+        end_time += dispatcher.current_time
+    capacity = config.num_devices * end_time
+    return SweepResult(
+        config=config, seed=seed, replications=replications, until_time=until_time,
+        generated=generated, rejected=rejected, completed=completed,
+        rejection_probability=rejected / generated if generated else float("nan"),
+        utilization=busy_time / capacity if capacity > 0 else float("nan"),
+        mean_time_in_system=system_times.mean if system_times.count else float("nan"),
+        p95_time_in_system=system_times.quantile(0.95) if system_times.count else float("nan"),
+        events=events, end_time=end_time / replications,
+    )
+
+
+def _run_point_args(args) -> SweepResult:
+    return run_point(*args)
+
+
+class ResultCache:
+    """Результаты точек в отдельных JSON-файлах <ключ>.json."""
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = Path(directory)
+
+    def get(self, key: str) -> Optional[SweepResult]:
+        path = self.directory / f"{key}.json"
+        try:
+            data = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        data["config"] = ModelConfig(**data["config"])
+        data["cached"] = True
+        return SweepResult(**data)
+
+    def put(self, key: str, result: SweepResult):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = asdict(result)
+        data["cached"] = False
+        # Запись через временный файл, чтобы прерванный перебор не оставил испорченных записей
+        tmp = self.directory / f"{key}.json.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(data))
+        os.replace(tmp, self.directory / f"{key}.json")
+
+
+def run_sweep(configs: Iterable[ModelConfig], seed: int = 0, replications: int = 1,
+              until_time: Optional[float] = None, workers: Optional[int] = None,
+              cache_dir: Optional[str] = DEFAULT_CACHE_DIR, prescreen: Optional[Prescreen] = None,
+              time_unit_us: float = 1.0) -> List[SweepResult]:
+    """
+    Считает все точки (из кэша или параллельно в пуле процессов) и возвращает результаты
+    в порядке точек. cache_dir=None отключает кэш; prescreen - правила аналитического отбора.
+    """
+    configs = list(configs)
+    # Для трасс аналитической оценки нет - такие точки всегда моделируются
+    estimates = [estimate(c, time_unit_us=time_unit_us) if not c.arrival_trace else None for c in configs]
+    decisions = [prescreen.decide(e) if prescreen is not None and e is not None else "simulate"
+                 for e in estimates]
+    results: List[Optional[SweepResult]] = [None] * len(configs)
+    run_configs = list(configs)
+    for i, decision in enumerate(decisions):
+        if decision == "skip":
+            results[i] = SweepResult.from_estimate(configs[i], seed, replications, until_time, estimates[i])
+        elif decision == "coarsen":
+            run_configs[i] = prescreen.coarsen(configs[i])
+
+    cache = ResultCache(cache_dir) if cache_dir is not None else None
+    keys = {i: cache_key(run_configs[i], seed, replications, until_time)
+            for i, result in enumerate(results) if result is None}
+    if cache:
+        for i, key in keys.items():
+            results[i] = cache.get(key)
+    pending = [i for i in keys if results[i] is None]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pending) <= 1:
+        for i in pending:
+            results[i] = run_point(run_configs[i], seed, replications, until_time)
+            if cache:
+                cache.put(keys[i], results[i])
+    elif pending:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            futures = {pool.submit(_run_point_args, (run_configs[i], seed, replications, until_time)): i
+                       for i in pending}
+            # Каждая точка сохраняется сразу, так что прерванный перебор не теряет посчитанное
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                if cache:
+                    cache.put(keys[i], results[i])
+
+    for i in keys:
+        if decisions[i] == "coarsen":
+            # В таблице - запрошенная точка, укорочение - отдельным столбцом
+            results[i].method = "coarse"
+            results[i].coarsen_factor = configs[i].tasks_per_source / run_configs[i].tasks_per_source
+            results[i].config = configs[i]
+        if estimates[i] is not None:
+            results[i].attach_estimate(estimates[i])
+    return results
+
+
+def write_csv(results: List[SweepResult], path: str):
+    rows = [result.to_row() for result in results]
+    if not rows:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _parse_value(kind: type, text: str):
+    text = text.strip()
+    if kind is bool:
+        # bool("False") истинно: логические значения разбираются по словам
+        if text.lower() in ("1", "true", "yes"):
+            return True
+        if text.lower() in ("0", "false", "no"):
+            return False
+        raise ValueError(f"Bad boolean value: {text}")
+    return kind(text)
+
+
+def parse_grid(specs: List[str]) -> Dict[str, list]:
+    """Разбирает параметры вида name=v1,v2,... с приведением к типу поля ModelConfig."""
+    types = {f.name: type(getattr(ModelConfig(), f.name)) for f in fields(ModelConfig)}
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip().replace("-", "_")
+        if name not in types or not values:
+            raise ValueError(f"Bad grid specification: {spec}")
+        grid[name] = [_parse_value(types[name], v) for v in values.split(",")]
+    return grid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перебор параметров модели СМО с кэшем результатов")
+    add_config_arguments(parser, ModelConfig(tasks_per_source=10_000))
+    parser.add_argument("--grid", action="append", default=[],
+                        help="перебираемый параметр: name=v1,v2,... (можно повторять)")
+    parser.add_argument("--replications", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--until-time", type=float, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="не читать и не писать кэш")
+    parser.add_argument("--out", default="sweep.csv", help="CSV-файл с результатами")
+    parser.add_argument("--prescreen", action="store_true",
+                        help="не моделировать точки, где аналитическая оценка надежна")
+    parser.add_argument("--overload-rho", type=float, default=Prescreen.overload_rho,
+                        help="загрузка, начиная с которой точка считается явно перегруженной")
+    parser.add_argument("--idle-rho", type=float, default=Prescreen.idle_rho,
+                        help="загрузка, ниже которой точка с пренебрежимыми отказами не моделируется")
+    parser.add_argument("--coarsen-factor", type=int, default=Prescreen.coarsen_factor,
+                        help="во сколько раз укорачивать прогон точек с точным решением M/M/c/K")
+    parser.add_argument("--time-unit-us", type=float, default=1.0,
+                        help="длительность единицы модельного времени в микросекундах")
+    args = parser.parse_args(argv)
+
+    configs = expand_grid(config_from_args(args), parse_grid(args.grid))
+    prescreen = (Prescreen(overload_rho=args.overload_rho, idle_rho=args.idle_rho,
+                           coarsen_factor=args.coarsen_factor) if args.prescreen else None)
+    started = time.perf_counter()
+    results = run_sweep(configs, seed=args.seed, replications=args.replications, until_time=args.until_time,
+                        workers=args.workers, cache_dir=None if args.no_cache else args.cache_dir,
+                        prescreen=prescreen, time_unit_us=args.time_unit_us)
+    write_csv(results, args.out)
+    cached = sum(result.cached for result in results)
+    analytic = sum(result.method == "analytic" for result in results)
+    print(f"Точек: {len(results)}, из кэша: {cached}, по аналитике: {analytic}, "
+          f"посчитано: {len(results) - cached - analytic}, время: {time.perf_counter() - started:.2f} с")
+    print(f"Результаты записаны в {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+# src/experiments/variance_reduction.py
+"""
+Сравнение двух конфигураций склада (например, 3 и 4 сборщика) с понижением дисперсии разности.
+
+  independent - независимые реплики A и B (база для сравнения);
+  crn         - общие случайные числа: A и B с одинаковыми номерами реплик получают одни и те же
+                потоки источников, а время обслуживания разыгрывается для каждой заявки
+                (ModelConfig.service_per_order), поэтому заказ требует одинакового времени при любом
+                числе приборов;
+  crn_antithetic - то же, но наблюдение - среднее реплики и ее антитетической пары (u -> 1 - u).
+
+К каждому методу дополнительно применяются контрольные переменные: наблюдаемые минус теоретические
+средние время обслуживания (среднее распределения) и, для пуассоновского потока, интенсивность
+поступлений - отдельно для A и B; коэффициенты - по регрессии на наблюдениях. Почти коллинеарные
+контрольные (при общих числах они у A и B совпадают) отбрасываются.
+
+Выигрыш метода - во сколько раз меньше заказов ему нужно для той же полуширины интервала, чем
+независимым репликам без контрольных переменных (дисперсия наблюдения, умноженная на его стоимость).
+
+Запуск: python -m src.experiments.variance_reduction --vary num_devices=3,4 --observations 30
+"""
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields, replace
+from statistics import NormalDist, fmean
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..config import ModelConfig, build_model
+from ..metrics.confidence import student_t_quantile
+from .replication import add_config_arguments, config_from_args
+
+METHODS = ("independent", "crn", "crn_antithetic")
+METRICS = ("rejection", "system_time")
+# Номера реплик второй конфигурации при независимых прогонах не пересекаются с первой
+_INDEPENDENT_OFFSET = 10 ** 6
+
+
+@dataclass
+class RunOutput:
+    metrics: Dict[str, float]
+    controls: Dict[str, float]  # Наблюдаемое минус теоретическое среднее, ожидание 0
+    orders: int
+
+
+@dataclass
+class MethodResult:
+    method: str
+    control_variates: bool
+    observations: int
+    runs_per_observation: int
+    orders_per_observation: float
+    level: float
+    mean: Dict[str, float] = field(default_factory=dict)
+    half_width: Dict[str, float] = field(default_factory=dict)
+    variance: Dict[str, float] = field(default_factory=dict)  # Дисперсия одного наблюдения
+    controls_used: int = 0
+
+    @property
+    def name(self) -> str:
+        return self.method + (" + cv" if self.control_variates else "")
+
+    def cost(self, metric: str) -> float:
+        """Дисперсия, умноженная на число заказов одного наблюдения: меньше - эффективнее."""
+        return self.variance[metric] * self.orders_per_observation
+
+    def orders_needed(self, metric: str, half_width: float) -> float:
+        z = NormalDist().inv_cdf(0.5 + self.level / 2.0)
+        return z * z * self.variance[metric] / (half_width * half_width) * self.orders_per_observation
+
+
+@dataclass
+class ComparisonResult:
+    config_a: ModelConfig
+    config_b: ModelConfig
+    results: List[MethodResult]
+    wall_time: float = 0.0
+
+    def efficiency(self, result: MethodResult, metric: str) -> float:
+        base = self.results[0].cost(metric)
+        own = result.cost(metric)
+        return base / own if own > 0 else math.inf
+
+    def report(self) -> str:
+        changes = [f"{f.name}: {getattr(self.config_a, f.name)} -> {getattr(self.config_b, f.name)}"
+                   for f in fields(ModelConfig) if getattr(self.config_a, f.name) != getattr(self.config_b, f.name)]
+        base = self.results[0]
+        lines = [f"Разность B - A ({', '.join(changes)}), наблюдений {base.observations}, "
+                 f"доверительная вероятность {base.level}",
+                 f"{'Метод':<24}" + "".join(f"{metric:>28}" for metric in METRICS)
+                 + f"{'прогонов':>10}" + "".join(f"{'выигрыш ' + metric:>22}" for metric in METRICS)]
+        for result in self.results:
+            lines.append(f"{result.name:<24}"
+                         + "".join(f"{result.mean[m]:>+14.5f} ± {result.half_width[m]:<11.5f}" for m in METRICS)
+                         + f"{result.runs_per_observation:>10}"
+                         + "".join(f"{self.efficiency(result, m):>21.1f}x" for m in METRICS))
+        best = max(self.results, key=lambda r: min(self.efficiency(r, m) for m in METRICS))
+        target = {m: base.half_width[m] for m in METRICS}
+        lines.append(f"Для полуширины независимых реплик ({', '.join(f'{m} ±{target[m]:.5f}' for m in METRICS)}) "
+                     f"методу {best.name} нужно "
+                     + ", ".join(f"{best.orders_needed(m, target[m]):,.0f} заказов вместо "
+                                 f"{base.orders_needed(m, target[m]):,.0f}" for m in METRICS))
+        lines.append(f"Время: {self.wall_time:.2f} с")
+        return "\n".join(lines)
+
+
+def simulate(config: ModelConfig, seed: int, replication: int, antithetic: bool = False,
+             warmup: float = 1000.0, horizon: float = 10000.0) -> RunOutput:
+    """Одна реплика: метрики за интервал (warmup, warmup + horizon] и контрольные переменные."""
+    model = build_model(config, seed=seed, replication=replication, antithetic=antithetic)
+    dispatcher = model.dispatcher
+    dispatcher.run(until_time=warmup)
+    dispatcher.reset_stats()
+    dispatcher.run(until_time=warmup + horizon)
+    stats = dispatcher.stats
+
+    def total(key: str) -> float:
+        # Заглушки кольцевого буфера (источник -1) - не заказы
+        return sum(value for sid, value in stats[key].items() if sid >= 0)
+
+    def completed_mean(key: str, default: float) -> float:
+        # Среднее по обслуженным заявкам; суммарные времена по источникам включают и вытесненные
+        summaries = [summary for sid, summary in stats[key].items() if sid >= 0]
+        count = sum(summary.count for summary in summaries)
+        return sum(summary.mean * summary.count for summary in summaries) / count if count else default
+
+    generated = total("generated_by_source")
+    metrics = {
+        "rejection": total("rejected_by_source") / generated if generated else 0.0,
+        "system_time": completed_mean("system_times", 0.0),
+    }
+    service_mean = (config.service_time_min + config.service_time_max) / 2
+    controls = {"service": completed_mean("service_times", service_mean) - service_mean}
+    if config.arrival == "poisson":
+        # Для пуассоновского потока ожидаемое число поступлений за интервал известно точно
+        controls["arrivals"] = generated / horizon - config.num_sources / config.generation_interval
+    return RunOutput(metrics, controls, int(generated))
+
+
+def _simulate_args(args) -> RunOutput:
+    return simulate(*args)
+
+
+def _average(outputs: Sequence[RunOutput]) -> RunOutput:
+    return RunOutput({m: fmean(o.metrics[m] for o in outputs) for m in outputs[0].metrics},
+                     {c: fmean(o.controls[c] for o in outputs) for c in outputs[0].controls},
+                     sum(o.orders for o in outputs))
+
+
+def _solve(matrix: List[List[float]], rhs: List[float]) -> List[float]:
+    """Решение линейной системы методом Гаусса с выбором главного элемента."""
+    n = len(rhs)
+    a = [row[:] + [value] for row, value in zip(matrix, rhs)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        for r in range(col + 1, n):
+            factor = a[r][col] / a[col][col]
+            for c in range(col, n + 1):
+                a[r][c] -= factor * a[col][c]
+    x = [0.0] * n
+    for r in range(n - 1, -1, -1):
+        x[r] = (a[r][n] - sum(a[r][c] * x[c] for c in range(r + 1, n))) / a[r][r]
+    return x
+
+
+def _independent_columns(columns: List[List[float]], tolerance: float = 1e-6) -> List[int]:
+    """Номера столбцов, которые не выражаются через предыдущие (Грам-Шмидт по центрированным)."""
+    basis: List[List[float]] = []
+    kept = []
+    for index, column in enumerate(columns):
+        center = fmean(column)
+        residual = [x - center for x in column]
+        norm = math.sqrt(sum(x * x for x in residual))
+        for q in basis:
+            projection = sum(a * b for a, b in zip(residual, q))
+            residual = [a - projection * b for a, b in zip(residual, q)]
+        residual_norm = math.sqrt(sum(x * x for x in residual))
+        if norm > 0.0 and residual_norm > tolerance * norm:
+            basis.append([x / residual_norm for x in residual])
+            kept.append(index)
+    return kept
+
+
+def control_variate_estimate(values: Sequence[float], controls: List[List[float]],
+                             level: float = 0.95) -> Tuple[float, float, float, int]:
+    """
+    Оценка с контрольными переменными (ожидание каждой равно 0): среднее, полуширина,
+    дисперсия скорректированного наблюдения и число использованных контрольных.
+    """
+    n = len(values)
+    columns = [controls[i] for i in _independent_columns(controls)]
+    columns = columns[:max(0, n - 3)]  # Хотя бы две степени свободы на остаток
+    q = len(columns)
+    mean_y = fmean(values)
+    centered_y = [y - mean_y for y in values]
+    means = [fmean(column) for column in columns]
+    centered = [[x - m for x in column] for column, m in zip(columns, means)]
+    beta = _solve([[sum(a * b for a, b in zip(ci, cj)) for cj in centered] for ci in centered],
+                  [sum(a * b for a, b in zip(ci, centered_y)) for ci in centered]) if q else []
+    adjusted = [values[k] - sum(b * column[k] for b, column in zip(beta, columns)) for k in range(n)]
+    estimate = fmean(adjusted)
+    variance = sum((y - estimate) ** 2 for y in adjusted) / (n - 1 - q)
+    half_width = student_t_quantile(0.5 + level / 2.0, n - 1 - q) * math.sqrt(variance / n)
+    return estimate, half_width, variance, q
+
+
+def _method_runs(method: str, config_a: ModelConfig, config_b: ModelConfig, seed: int, observation: int,
+                 warmup: float, horizon: float) -> Tuple[List[tuple], List[tuple]]:
+    """Аргументы simulate для прогонов A и B одного наблюдения."""
+    if method == "independent":
+        return ([(config_a, seed, observation, False, warmup, horizon)],
+                [(config_b, seed, _INDEPENDENT_OFFSET + observation, False, warmup, horizon)])
+    antithetic = [False, True] if method == "crn_antithetic" else [False]
+    # Общие числа: у A и B одинаковые номера реплик (отдельный диапазон от независимых прогонов)
+    replication = 2 * _INDEPENDENT_OFFSET + observation
+    return ([(config_a, seed, replication, flag, warmup, horizon) for flag in antithetic],
+            [(config_b, seed, replication, flag, warmup, horizon) for flag in antithetic])
+
+
+def compare(config_a: ModelConfig, config_b: ModelConfig, observations: int = 30, seed: int = 0,
+            methods: Sequence[str] = METHODS, warmup: float = 1000.0, horizon: float = 10000.0,
+            level: float = 0.95, workers: Optional[int] = None) -> ComparisonResult:
+    """Оценивает разность метрик B - A каждым методом, с контрольными переменными и без."""
+    # Время обслуживания, привязанное к заявке, нужно для общих чисел; распределение выхода от него
+    # не зависит, поэтому оно включается для всех методов
+    config_a = replace(config_a, service_per_order=True, aggregate_sources=False, arrival_trace="")
+    config_b = replace(config_b, service_per_order=True, aggregate_sources=False, arrival_trace="")
+    plan = []  # (метод, наблюдение, прогоны A, прогоны B)
+    for method in methods:
+        for observation in range(observations):
+            runs_a, runs_b = _method_runs(method, config_a, config_b, seed, observation, warmup, horizon)
+            plan.append((method, observation, runs_a, runs_b))
+    tasks = [args for _, _, runs_a, runs_b in plan for args in runs_a + runs_b]
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers == 1:
+        outputs = [_simulate_args(args) for args in tasks]
+    else:
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outputs = list(pool.map(_simulate_args, tasks, chunksize=chunksize))
+
+    results = []
+    position = 0
+    for method in methods:
+        differences: Dict[str, List[float]] = {m: [] for m in METRICS}
+        control_columns: Dict[str, List[float]] = {}
+        orders = runs = 0
+        for plan_method, _, runs_a, runs_b in plan:
+            if plan_method != method:
+                continue
+            a = _average(outputs[position:position + len(runs_a)])
+            position += len(runs_a)
+            b = _average(outputs[position:position + len(runs_b)])
+            position += len(runs_b)
+            for metric in METRICS:
+                differences[metric].append(b.metrics[metric] - a.metrics[metric])
+            for name in a.controls:
+                control_columns.setdefault(f"{name}_a", []).append(a.controls[name])
+                control_columns.setdefault(f"{name}_b", []).append(b.controls[name])
+            orders += a.orders + b.orders
+            runs = len(runs_a) + len(runs_b)
+        for use_controls in (False, True):
+            result = MethodResult(method, use_controls, observations, runs, orders / observations, level)
+            for metric in METRICS:
+                columns = list(control_columns.values()) if use_controls else []
+                mean, half_width, variance, used = control_variate_estimate(differences[metric], columns, level)
+                result.mean[metric], result.half_width[metric] = mean, half_width
+                result.variance[metric] = variance
+                result.controls_used = max(result.controls_used, used)
+            results.append(result)
+    return ComparisonResult(config_a, config_b, results, time.perf_counter() - started)
+
+
+def _parse_vary(text: str, base: ModelConfig) -> Tuple[ModelConfig, ModelConfig]:
+    name, _, values = text.partition("=")
+    name = name.replace("-", "_")
+    if name not in {f.name for f in fields(ModelConfig)}:
+        raise ValueError(f"Unknown config field {name}")
+    kind = type(getattr(base, name))
+    first, second = values.split(",")
+    return replace(base, **{name: kind(first)}), replace(base, **{name: kind(second)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение двух конфигураций с понижением дисперсии")
+    add_config_arguments(parser, ModelConfig(num_sources=2, num_devices=3, buffer_size=5, generation_interval=1.6,
+                                             arrival="poisson", tasks_per_source=10 ** 9))
+    parser.add_argument("--vary", default="num_devices=3,4",
+                        help="параметр и два его значения (конфигурации A и B), например buffer_size=10,12")
+    parser.add_argument("--observations", type=int, default=30)
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=list(METHODS))
+    parser.add_argument("--warmup", type=float, default=1000.0)
+    parser.add_argument("--horizon", type=float, default=10000.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--level", type=float, default=0.95)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    config_a, config_b = _parse_vary(args.vary, config_from_args(args))
+    result = compare(config_a, config_b, args.observations, seed=args.seed, methods=args.methods,
+                     warmup=args.warmup, horizon=args.horizon, level=args.level, workers=args.workers)
+    print(result.report())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,5 +2,6 @@
 from .i_source import ITaskSource
 from .i_device import IDevice
 from .i_buffer import IBuffer
+from .i_event_calendar import IEventCalendar
 
-__all__ = ["ITaskSource", "IDevice", "IBuffer"]
\ No newline at end of file
+__all__ = ["ITaskSource", "IDevice", "IBuffer", "IEventCalendar"]
\ No newline at end of file
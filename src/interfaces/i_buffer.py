@@ -1,16 +1,20 @@
 # src/interfaces/i_buffer.py
 from abc import ABC, abstractmethod
 from typing import Optional
-from ..models.task import Task
+from ..models.task_table import TaskHandle
 
 class IBuffer(ABC):
+    # True - apply_replacement_policy получает поступившую заявку и сам ставит ее в буфер
+    # (или отказывает ей); False - место вытесненной занимает заглушка, поступившая теряется
+    places_arrival = False
+
     @abstractmethod
-    def enqueue(self, task: Task, current_time: float) -> bool:
+    def enqueue(self, task: TaskHandle, current_time: float) -> bool:
         """Возвращает True, если задача помещена успешно."""
         pass
 
     @abstractmethod
-    def dequeue(self, current_time: float) -> Optional[Task]:
+    def dequeue(self, current_time: float) -> Optional[TaskHandle]:
         """Возвращает задачу, выбранную из буфера."""
         pass
 
@@ -23,8 +27,9 @@ class IBuffer(ABC):
         pass
 
     @abstractmethod
-    def apply_replacement_policy(self, current_time: float) -> Optional[Task]:
-        """Возвращает вытесненную задачу."""
+    def apply_replacement_policy(self, current_time: float,
+                                 task: Optional[TaskHandle] = None) -> Optional[TaskHandle]:
+        """Возвращает вытесненную задачу (при places_arrival это может быть поступившая task)."""
         pass
 
     @abstractmethod
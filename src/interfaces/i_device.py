@@ -1,7 +1,7 @@
 # src/interfaces/i_device.py
 from abc import ABC, abstractmethod
 from typing import Optional
-from ..models.task import Task
+from ..models.task_table import TaskHandle
 
 class IDevice(ABC):
     @abstractmethod
@@ -9,11 +9,11 @@ class IDevice(ABC):
         pass
 
     @abstractmethod
-    def assign_task(self, task: Task, current_time: float) -> float:
+    def assign_task(self, task: TaskHandle, current_time: float) -> float:
         pass
 
     @abstractmethod
-    def complete_task(self) -> Task:
+    def complete_task(self) -> TaskHandle:
         pass
 
     @abstractmethod
@@ -0,0 +1,32 @@
+# src/interfaces/i_event_calendar.py
+from abc import ABC, abstractmethod
+from typing import Iterable, Optional, Tuple
+from ..models.enums import EventType
+
+# Запись календаря: (время, уникальный номер события, тип, данные)
+EventEntry = Tuple[float, int, EventType, Optional[object]]
+
+
+class IEventCalendar(ABC):
+    @abstractmethod
+    def push(self, entry: EventEntry):
+        pass
+
+    @abstractmethod
+    def pop(self) -> EventEntry:
+        """Извлекает событие с наименьшей парой (время, номер)."""
+        pass
+
+    @abstractmethod
+    def peek(self) -> EventEntry:
+        """Возвращает ближайшее событие, не извлекая его."""
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def entries(self) -> Iterable[EventEntry]:
+        """Все запланированные события в произвольном порядке."""
+        pass
@@ -1,11 +1,11 @@
 # src/interfaces/i_source.py
 from abc import ABC, abstractmethod
 from typing import Optional
-from ..models.task import Task
+from ..models.task_table import TaskHandle
 
 class ITaskSource(ABC):
     @abstractmethod
-    def generate_task(self, current_time: float) -> Optional[Task]:
+    def generate_task(self, current_time: float) -> Optional[TaskHandle]:
         pass
 
     @abstractmethod
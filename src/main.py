@@ -1,66 +1,208 @@
 # src/main.py
-from .components import Source, Buffer, Device, DeviceManager, Dispatcher
-from .models import TaskStatus
+import argparse
+import time
 
+from . import checkpoint
+from .analytics.queueing import divergence, estimate
+from .components import BUFFER_DISCIPLINES, Dispatcher
+from .config import ModelConfig, build_model
+from .experiments.sequential import UNLIMITED_TASKS, run_until_precision
+from .metrics.profiler import Profiler
+from .metrics.streaming import StreamingSummary
+from .metrics.time_weighted import TimeWeightedMetrics
+from .traces.events import EventTraceWriter
 
-def main():
-    print("=== Запуск пошаговой модели СМО ===")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Модель СМО склада интернет-магазина")
+    parser.add_argument("--batch", action="store_true",
+                        help="пакетный прогон без пошагового ввода и печати событий")
+    parser.add_argument("--until-time", type=float, default=None,
+                        help="остановить моделирование по достижении модельного времени")
+    parser.add_argument("--max-completed", type=int, default=None,
+                        help="остановить моделирование после обслуживания заданного числа заявок")
+    parser.add_argument("-v", "--verbose", type=int, default=None,
+                        help="уровень подробности (по умолчанию 1 в пошаговом режиме и 0 в пакетном)")
+    parser.add_argument("--sources", type=int, default=1, help="число источников")
+    parser.add_argument("--devices", type=int, default=1, help="число приборов")
+    parser.add_argument("--buffer-size", type=int, default=3, help="размер буфера")
+    parser.add_argument("--buffer-discipline", choices=list(BUFFER_DISCIPLINES), default="ring",
+                        help="дисциплина буфера (ring - исходная Д10З1/Д10О1/Д2Б1)")
+    parser.add_argument("--interval", type=float, default=2.0, help="интервал генерации заявок")
+    parser.add_argument("--service-min", type=float, default=1.0, help="минимальное время обслуживания")
+    parser.add_argument("--service-max", type=float, default=3.0, help="максимальное время обслуживания")
+    parser.add_argument("--tasks-per-source", type=int, default=5,
+                        help="число заявок, генерируемых каждым источником")
+    parser.add_argument("--arrival", choices=["fixed", "poisson"], default="fixed",
+                        help="закон поступления заявок")
+    parser.add_argument("--aggregate-sources", action="store_true",
+                        help="все источники - потоки одного агрегированного источника (одно событие в календаре)")
+    parser.add_argument("--trace", default="",
+                        help="файл трассы поступлений: воспроизвести журнал заказов вместо источников")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="зерно для независимых потоков случайных чисел источников и приборов")
+    parser.add_argument("--calendar", choices=["heap", "calendar", "ladder"], default="heap",
+                        help="структура календаря событий")
+    parser.add_argument("--analytic", action="store_true",
+                        help="вывести аналитическую оценку M/M/c/K или M/G/c/K и ее расхождение с моделью")
+    parser.add_argument("--time-unit-us", type=float, default=1.0,
+                        help="длительность единицы модельного времени в микросекундах")
+    parser.add_argument("--load-checkpoint", default=None,
+                        help="продолжить моделирование из снимка (параметры модели могут отличаться)")
+    parser.add_argument("--reset-stats", action="store_true",
+                        help="после загрузки снимка начать статистику заново")
+    parser.add_argument("--save-checkpoint", default=None,
+                        help="сохранить снимок состояния модели после прогона")
+    # Профилировщик и трасса событий подменяют один и тот же цикл прогона
+    instrumentation = parser.add_mutually_exclusive_group()
+    instrumentation.add_argument("--profile", action="store_true",
+                                 help="профилировать пакетный прогон: время по типам событий и вызовам компонентов")
+    parser.add_argument("--profile-stacks", default=None,
+                        help="файл свернутых стеков для flamegraph (вместе с --profile)")
+    instrumentation.add_argument("--event-trace", default=None,
+                                 help="записать двоичную трассу событий пакетного прогона "
+                                      "(анализ - python -m src.traces); замедляет прогон примерно на 40%%")
+    parser.add_argument("--time-metrics", action="store_true",
+                        help="средние по времени: заполнение буфера, загрузка приборов, размер календаря")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="пакетный прогон до этой относительной полуширины доверительных интервалов "
+                             "(разгон отбрасывается автоматически, --tasks-per-source не ограничивает прогон)")
+    parser.add_argument("--precision-metrics", nargs="+", default=["rejection", "system_time"],
+                        help="метрики для --precision: rejection, system_time, wait_time, utilization")
+    parser.add_argument("--max-steps", type=int, default=50,
+                        help="ограничение на число шагов в пошаговом режиме")
+    args = parser.parse_args(argv)
+    # Инструменты подключаются только к пакетному прогону: без --batch они молча не работали бы
+    if (args.profile or args.event_trace) and not args.batch:
+        parser.error("--profile and --event-trace require --batch")
+    if args.profile_stacks and not args.profile:
+        parser.error("--profile-stacks requires --profile")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    verbose = args.verbose if args.verbose is not None else (0 if args.batch else 1)
+
+    if args.batch:
+        print("=== Запуск пакетной модели СМО ===")
+    else:
+        print("=== Запуск пошаговой модели СМО ===")
 
     # Настройка параметров модели
-    NUM_SOURCES = 1
-    NUM_DEVICES = 1
-    BUFFER_SIZE = 3
-    GENERATION_INTERVAL = 2.0
-    SERVICE_TIME_MIN = 1.0
-    SERVICE_TIME_MAX = 3.0
-    NUM_TASKS_TO_GENERATE_PER_SOURCE = 5
-
-    # Создание компонентов
-    sources = [Source(i + 1, generation_interval=GENERATION_INTERVAL) for i in range(NUM_SOURCES)]
-    buffer = Buffer(max_size=BUFFER_SIZE, buffer_type="ring")
-    device_manager = DeviceManager()
-
-    for i in range(NUM_DEVICES):
-        device = Device(device_id=i + 1, service_time_min=SERVICE_TIME_MIN, service_time_max=SERVICE_TIME_MAX)
-        device_manager.add_device(device)
-
-    dispatcher = Dispatcher(buffer, device_manager)
-
-    # Инициализация событий
-    dispatcher.initialize_sources(sources, NUM_TASKS_TO_GENERATE_PER_SOURCE)
-
-    # Запуск пошагового моделирования
-    step_count = 0
-    max_steps = 50  # Ограничение на количество шагов для отладки
-    while dispatcher.run_step() and step_count < max_steps:
-        step_count += 1
-        input("Нажмите Enter для следующего шага...")
+    config = ModelConfig(
+        num_sources=args.sources,
+        num_devices=args.devices,
+        buffer_size=args.buffer_size,
+        buffer_discipline=args.buffer_discipline,
+        generation_interval=args.interval,
+        service_time_min=args.service_min,
+        service_time_max=args.service_max,
+        tasks_per_source=UNLIMITED_TASKS if args.precision and args.batch else args.tasks_per_source,
+        arrival=args.arrival,
+        calendar=args.calendar,
+        arrival_trace=args.trace,
+        aggregate_sources=args.aggregate_sources,
+    )
+
+    # Создание компонентов и инициализация событий
+    model = build_model(config, seed=args.seed, verbose=verbose)
+    if args.load_checkpoint:
+        # Точное продолжение сохраненного прогона, если не меняются параметры и зерно
+        checkpoint.restore(model, checkpoint.load(args.load_checkpoint))
+        if args.reset_stats:
+            model.dispatcher.reset_stats()
+    dispatcher = model.dispatcher
+
+    profiler = Profiler().attach(dispatcher) if args.profile else None
+    tracer = EventTraceWriter(args.event_trace).attach(dispatcher) if args.event_trace else None
+    time_metrics = TimeWeightedMetrics().attach(dispatcher) if args.time_metrics else None
+    if args.batch:
+        started = time.perf_counter()
+        if args.precision:
+            sequential = run_until_precision(model, args.precision_metrics, precision=args.precision)
+            step_count = sequential.events
+        else:
+            sequential = None
+            step_count = dispatcher.run(until_time=args.until_time, max_completed=args.max_completed)
+        elapsed = time.perf_counter() - started
+        if tracer is not None:
+            tracer.close()
+    else:
+        # Запуск пошагового моделирования
+        step_count = 0
+        max_steps = args.max_steps  # Ограничение на количество шагов для отладки
+        while dispatcher.run_step() and step_count < max_steps:
+            step_count += 1
+            input("Нажмите Enter для следующего шага...")
 
     print("\n=== Моделирование завершено ===")
     print(f"Всего выполнено шагов: {step_count}")
-    print("\nФинальная статистика (частичная):")
-    print(f"Сгенерировано заявок: {dict(dispatcher.stats['generated_by_source'])}")
-    print(f"Отказано заявок: {dict(dispatcher.stats['rejected_by_source'])}")
-    print(f"Среднее время в системе: ", end="")
-    for src_id in dispatcher.stats["total_time_in_system_by_source"]:
-        total_time = dispatcher.stats["total_time_in_system_by_source"][src_id]
-        count = dispatcher.stats["generated_by_source"][src_id]
-        avg_time = total_time / count if count > 0 else 0
-        print(f"И{src_id}: {avg_time:.2f} ", end="")
-    print("\nСреднее время в буфере: ", end="")
-    for src_id in dispatcher.stats["total_time_in_buffer_by_source"]:
-        total_time = dispatcher.stats["total_time_in_buffer_by_source"][src_id]
-        count = dispatcher.stats["generated_by_source"][src_id]
-        avg_time = total_time / count if count > 0 else 0
-        print(f"И{src_id}: {avg_time:.2f} ", end="")
-    print("\nСреднее время обслуживания: ", end="")
-    for src_id in dispatcher.stats["total_service_time_by_source"]:
-        total_time = dispatcher.stats["total_service_time_by_source"][src_id]
-        count = dispatcher.stats["generated_by_source"][src_id]
-        avg_time = total_time / count if count > 0 else 0
-        print(f"И{src_id}: {avg_time:.2f} ", end="")
-    print("\n---")
+    if args.batch:
+        rate = step_count / elapsed if elapsed > 0 else float("inf")
+        print(f"Модельное время: {dispatcher.current_time:.2f}")
+        print(f"Время прогона: {elapsed:.3f} с, событий в секунду: {rate:,.0f}")
+    print_final_report(dispatcher)
+    if args.batch and sequential is not None:
+        print(sequential.report())
+    if time_metrics is not None:
+        print(time_metrics.report(dispatcher.current_time))
+    if profiler is not None:
+        print("\nПрофиль прогона:")
+        print(profiler.summary_table())
+        if args.profile_stacks:
+            profiler.write_collapsed(args.profile_stacks)
+            print(f"Свернутые стеки записаны в {args.profile_stacks}")
+    if args.save_checkpoint:
+        checkpoint.save(model, args.save_checkpoint)
+        print(f"Снимок состояния сохранен в {args.save_checkpoint}")
+    if args.analytic and not config.arrival_trace:
+        print_analytic_report(config, dispatcher, args.time_unit_us)
+
+
+def print_final_report(dispatcher: Dispatcher):
+    stats = dispatcher.stats
+    print("\nФинальная статистика:")
+    print(f"Сгенерировано заявок: {dict(stats['generated_by_source'])}")
+    print(f"Отказано заявок: {dict(stats['rejected_by_source'])}")
+    print(f"Обслужено заявок: {dict(stats['completed_by_source'])}")
+    # Средние считаются по обслуженным заявкам, квантили - по потоковым оценкам
+    for title, key in (("Время в системе", "system_times"),
+                       ("Время в буфере", "wait_times"),
+                       ("Время обслуживания", "service_times")):
+        print(f"{title}:")
+        for src_id in sorted(stats[key]):
+            summary = stats[key][src_id]
+            quantiles = summary.percentiles()
+            print(f"  И{src_id}: среднее {summary.mean:.2f}, СКО {summary.std:.2f}, "
+                  f"p50 {quantiles['p50']:.2f}, p95 {quantiles['p95']:.2f}, p99 {quantiles['p99']:.2f} "
+                  f"(n={summary.count})")
+    print("---")
+
+
+def print_analytic_report(config: ModelConfig, dispatcher: Dispatcher, time_unit_us: float = 1.0):
+    analytic = estimate(config, time_unit_us=time_unit_us)
+    stats = dispatcher.stats
+    source_ids = list(stats["generated_by_source"])
+    generated = sum(stats["generated_by_source"][sid] for sid in source_ids)
+    rejected = sum(stats["rejected_by_source"][sid] for sid in source_ids)
+    system_times = StreamingSummary()
+    for sid in source_ids:
+        if sid in stats["system_times"]:
+            system_times.merge(stats["system_times"][sid])
+    capacity = config.num_devices * dispatcher.current_time
+    simulated = (rejected / generated if generated else float("nan"),
+                 sum(stats["total_service_time_by_source"].values()) / capacity if capacity > 0 else float("nan"),
+                 system_times.mean if system_times.count else float("nan"))
+    print(f"Аналитическая оценка ({analytic.method}, c={analytic.servers}, K={analytic.capacity}, "
+          f"ρ={analytic.rho:.3f}):")
+    print(f"  Вероятность отказа: {analytic.rejection_probability:.4f} (модель {simulated[0]:.4f})")
+    print(f"  Загрузка приборов: {analytic.utilization:.4f} (модель {simulated[1]:.4f})")
+    print(f"  Время в системе: {analytic.mean_time_in_system:.4f} (модель {simulated[2]:.4f})")
+    print(f"  Среднее ожидание: {analytic.mean_wait_us:.2f} мкс")
+    for name, value in divergence(analytic, *simulated).items():
+        print(f"  {name}: {value:+.4f}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,9 @@
+# src/metrics/__init__.py
+from .streaming import RunningMoments, TDigest, Histogram, StreamingSummary, merge_stats, copy_stats
+from .confidence import confidence_interval, student_t_quantile
+from .profiler import Profiler
+from .time_weighted import LevelTimeIntegral, TimeWeightedMetrics
+
+__all__ = ["RunningMoments", "TDigest", "Histogram", "StreamingSummary", "merge_stats", "copy_stats",
+           "confidence_interval", "student_t_quantile", "Profiler",
+           "LevelTimeIntegral", "TimeWeightedMetrics"]
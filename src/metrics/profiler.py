@@ -0,0 +1,197 @@
+# src/metrics/profiler.py
+"""
+Профилирование прогона по запросу. Профилировщик подключается к диспетчеру
+(profiler.attach(dispatcher)); тогда run() переходит на отдельный инструментированный цикл,
+а вызовы компонентов (буфер, менеджер приборов, приборы, календарь) оборачиваются
+таймерами на уровне экземпляров. Без профилировщика основной цикл не меняется.
+
+Собирается:
+  - число событий каждого типа и гистограмма длительности обработчиков (по степеням двойки, нс);
+  - длительность вызовов компонентов внутри обработчиков;
+  - выборочные показатели: длина календаря, заполнение буфера, число занятых приборов.
+Выгрузка - сводная таблица (summary_table) и "свернутые стеки" для flamegraph.pl / speedscope
+(collapsed_stacks): строка "dispatcher;СОБЫТИЕ;компонент.метод <нс>".
+"""
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from .streaming import RunningMoments
+
+HISTOGRAM_BUCKETS = 64
+
+
+class LatencyHistogram:
+    """Число измерений и гистограмма по степеням двойки: корзина b - длительность в [2^(b-1), 2^b) нс."""
+    __slots__ = ("count", "total_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, ns: int):
+        self.count += 1
+        self.total_ns += ns
+        self.buckets[ns.bit_length() if ns < 1 << (HISTOGRAM_BUCKETS - 1) else HISTOGRAM_BUCKETS - 1] += 1
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.count if self.count else 0.0
+
+    def quantile_ns(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает квантиль q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return float(1 << bucket)
+        return float(1 << (HISTOGRAM_BUCKETS - 1))
+
+
+class Profiler:
+    def __init__(self, sample_every: int = 64):
+        # Показатели очередей снимаются раз в sample_every событий
+        self.sample_every = sample_every
+        self.events: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.calls: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.gauges: Dict[str, RunningMoments] = defaultdict(RunningMoments)
+        # Собственное время по стекам (событие, вызов компонента) для flamegraph
+        self.stacks: Dict[Tuple[str, ...], int] = defaultdict(int)
+        self.wall_ns = 0
+        self.dispatcher = None
+        self._wrapped: List[Tuple[object, str]] = []
+        # Время вызовов компонентов внутри текущего обработчика и его тип события
+        self._child_ns = 0
+        self._current = "calendar"
+
+    def attach(self, dispatcher):
+        """Подключает профилировщик к диспетчеру и оборачивает вызовы его компонентов."""
+        if self.dispatcher is not None:
+            raise RuntimeError("Profiler is already attached")
+        if getattr(dispatcher, "tracer", None) is not None:
+            raise RuntimeError("Event tracing and profiling cannot be combined in one run")
+        self.dispatcher = dispatcher
+        dispatcher.profiler = self
+        self._wrap(dispatcher.buffer, "buffer", ("enqueue", "dequeue", "apply_replacement_policy"))
+        self._wrap(dispatcher.device_manager, "device_manager", ("find_free_device",))
+        for device in dispatcher.device_manager.devices:
+            self._wrap(device, "device", ("assign_task", "complete_task"))
+        self._wrap(dispatcher.event_calendar, "calendar", ("push",))
+        return self
+
+    def detach(self):
+        for obj, name in self._wrapped:
+            # Обертка - атрибут экземпляра, после удаления снова виден метод класса
+            delattr(obj, name)
+        self._wrapped = []
+        if self.dispatcher is not None:
+            self.dispatcher.profiler = None
+            self.dispatcher = None
+
+    def _wrap(self, obj, label: str, names):
+        for name in names:
+            method = getattr(obj, name)
+            setattr(obj, name, self._timer(f"{label}.{name}", method))
+            self._wrapped.append((obj, name))
+
+    def _timer(self, name: str, method):
+        clock = time.perf_counter_ns
+        calls = self.calls[name]
+        stacks = self.stacks
+
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = clock() - started
+                calls.add(elapsed)
+                self._child_ns += elapsed
+                stacks[(self._current, name)] += elapsed
+        return timed
+
+    def run(self, dispatcher, time_limit: float, completed_limit: float, events_limit: float,
+            check_time: bool) -> int:
+        """Инструментированный вариант Dispatcher.run с теми же условиями остановки."""
+        calendar = dispatcher.event_calendar
+        handlers = dispatcher._handlers
+        buffer = dispatcher.buffer
+        device_manager = dispatcher.device_manager
+        clock = time.perf_counter_ns
+        events = self.events
+        stacks = self.stacks
+        calendar_len = self.gauges["calendar_length"]
+        buffer_occupancy = self.gauges["buffer_occupancy"]
+        busy_devices = self.gauges["busy_devices"]
+        pop_calls = self.calls["calendar.pop"]
+        sample_every = self.sample_every
+        calendar_size = dispatcher.calendar_size
+
+        processed = 0
+        run_started = clock()
+        while processed < events_limit and dispatcher.completed_count < completed_limit:
+            if check_time and calendar and calendar.peek_time() > time_limit:
+                dispatcher.current_time = time_limit
+                break
+            if processed % sample_every == 0:
+                calendar_len.add(len(calendar))
+                buffer_occupancy.add(getattr(buffer, "count", 0))
+                busy_devices.add(device_manager.busy_count)
+            started = clock()
+            try:
+                event_time, _, event_type, event_data = calendar.pop()
+            except IndexError:  # Календарь пуст
+                break
+            elapsed = clock() - started
+            pop_calls.add(elapsed)
+            stacks[("calendar.pop",)] += elapsed
+
+            dispatcher.current_time = event_time
+            name = event_type.name
+            self._current = name
+            self._child_ns = 0
+            started = clock()
+            handlers[event_type](event_data)
+            elapsed = clock() - started
+            events[name].add(elapsed)
+            # Собственное время обработчика - без вызовов компонентов
+            stacks[(name,)] += elapsed - self._child_ns
+            self._current = "calendar"
+            if calendar_size is not None:
+                calendar_size.update(event_time, len(calendar))
+            processed += 1
+        self.wall_ns += clock() - run_started
+        return processed
+
+    def summary_table(self) -> str:
+        lines = []
+        total = sum(h.total_ns for h in self.events.values()) or 1
+        lines.append(f"{'Событие':<28} {'число':>10} {'сред., нс':>10} {'p50≤':>8} {'p99≤':>8} {'доля':>7}")
+        for name, h in sorted(self.events.items(), key=lambda item: -item[1].total_ns):
+            lines.append(f"{name:<28} {h.count:>10} {h.mean_ns:>10.0f} {h.quantile_ns(0.5):>8.0f} "
+                         f"{h.quantile_ns(0.99):>8.0f} {h.total_ns / total:>7.1%}")
+        lines.append("")
+        lines.append(f"{'Вызов компонента':<36} {'число':>10} {'сред., нс':>10} {'p99≤':>8} {'всего, мс':>10}")
+        for name, h in sorted(self.calls.items(), key=lambda item: -item[1].total_ns):
+            lines.append(f"{name:<36} {h.count:>10} {h.mean_ns:>10.0f} {h.quantile_ns(0.99):>8.0f} "
+                         f"{h.total_ns / 1e6:>10.1f}")
+        lines.append("")
+        lines.append(f"{'Показатель (выборочно)':<28} {'среднее':>10} {'СКО':>10} {'макс.':>10}")
+        for name, gauge in self.gauges.items():
+            lines.append(f"{name:<28} {gauge.mean:>10.2f} {gauge.std:>10.2f} {gauge.max:>10.0f}")
+        lines.append("")
+        lines.append(f"Время инструментированного цикла: {self.wall_ns / 1e6:.1f} мс")
+        return "\n".join(lines)
+
+    def collapsed_stacks(self, root: str = "dispatcher") -> str:
+        """Свернутые стеки (собственное время в нс) для flamegraph.pl, speedscope и т.п."""
+        return "\n".join(f"{';'.join((root,) + stack)} {ns}"
+                         for stack, ns in sorted(self.stacks.items()) if ns > 0) + "\n"
+
+    def write_collapsed(self, path: str, root: str = "dispatcher"):
+        with open(path, "w") as f:
+            f.write(self.collapsed_stacks(root))
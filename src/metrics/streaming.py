@@ -0,0 +1,323 @@
+# src/metrics/streaming.py
+"""
+Потоковые накопители статистики с памятью O(1) на источник независимо от длины прогона.
+Все накопители можно объединять (merge), чтобы сводить результаты отдельных прогонов.
+"""
+import math
+from array import array
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+
+class RunningMoments:
+    """Среднее и дисперсия по Уэлфорду; объединение - по формуле Чана."""
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def merge(self, other: "RunningMoments"):
+        if not other.count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "RunningMoments":
+        clone = RunningMoments()
+        clone.count, clone.mean, clone.m2, clone.min, clone.max = self.count, self.mean, self.m2, self.min, self.max
+        return clone
+
+
+class TDigest:
+    """
+    Сливающийся t-digest (Dunning) для квантилей: не более ~compression центроидов,
+    новые значения копятся в буфере и вливаются пачками.
+    """
+
+    def __init__(self, compression: float = 200.0):
+        self.compression = compression
+        self._means: List[float] = []
+        self._weights: List[float] = []
+        self._buffer: List[float] = []
+        self._buffer_limit = int(5 * compression)
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x: float):
+        self._buffer.append(x)
+        self.count += 1
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k: float) -> float:
+        return (math.sin(min(max(k * 2 * math.pi / self.compression, -math.pi / 2), math.pi / 2)) + 1) / 2
+
+    def _compress(self, extra: Iterable[Tuple[float, float]] = ()):
+        points = list(zip(self._means, self._weights))
+        points.extend((x, 1.0) for x in self._buffer)
+        points.extend(extra)
+        self._buffer = []
+        if not points:
+            return
+        points.sort()
+        total = sum(w for _, w in points)
+        means: List[float] = []
+        weights: List[float] = []
+        weight_before = 0.0
+        current_mean, current_weight = points[0]
+        weight_limit = total * self._k_inverse(self._k(0.0) + 1)
+        for mean, weight in points[1:]:
+            if weight_before + current_weight + weight <= weight_limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                means.append(current_mean)
+                weights.append(current_weight)
+                weight_before += current_weight
+                weight_limit = total * self._k_inverse(self._k(weight_before / total) + 1)
+                current_mean, current_weight = mean, weight
+        means.append(current_mean)
+        weights.append(current_weight)
+        self._means, self._weights = means, weights
+
+    def merge(self, other: "TDigest"):
+        other_points = list(zip(other._means, other._weights))
+        other_points.extend((x, 1.0) for x in other._buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(other_points)
+
+    def copy(self) -> "TDigest":
+        """Точная копия, включая еще не влитые значения буфера."""
+        clone = TDigest(self.compression)
+        clone._means, clone._weights, clone._buffer = list(self._means), list(self._weights), list(self._buffer)
+        clone.count, clone.min, clone.max = self.count, self.min, self.max
+        return clone
+
+    def quantile(self, q: float) -> float:
+        if self._buffer:
+            self._compress()
+        if not self._means:
+            return math.nan
+        means, weights = self._means, self._weights
+        total = sum(weights)
+        target = q * total
+        # Центры центроидов на оси накопленного веса
+        cumulative = 0.0
+        previous_center, previous_mean = 0.0, self.min
+        for mean, weight in zip(means, weights):
+            center = cumulative + weight / 2
+            if target <= center:
+                if center == previous_center:
+                    return mean
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+        if total == previous_center:
+            return self.max
+        fraction = (target - previous_center) / (total - previous_center)
+        return previous_mean + fraction * (self.max - previous_mean)
+
+    @property
+    def centroid_count(self) -> int:
+        return len(self._means)
+
+
+class Histogram:
+    """
+    Гистограмма с равными корзинами на [low, high). Значение не меньше high не теряется в overflow:
+    диапазон удваивается со слиянием соседних корзин, пока значение не поместится.
+    Значения ниже low считаются в underflow.
+    """
+
+    def __init__(self, low: float = 0.0, high: float = 100.0, bins: int = 200):
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.width = (high - low) / bins
+        self.counts = array("q", [0]) * bins
+        self.underflow = 0
+        self.overflow = 0  # Только в снимках, записанных до расширения диапазона
+
+    def add(self, x: float):
+        if x < self.low:
+            self.underflow += 1
+            return
+        if x >= self.high:
+            self._grow(x)
+        self.counts[min(int((x - self.low) / self.width), self.bins - 1)] += 1
+
+    def _grow(self, x: float):
+        """Удваивает диапазон, пока x не окажется внутри [low, high)."""
+        counts, bins = self.counts, self.bins
+        while x >= self.high:
+            for i in range(bins):
+                j = 2 * i
+                counts[i] = (counts[j] + (counts[j + 1] if j + 1 < bins else 0)) if j < bins else 0
+            self.width *= 2
+            self.high = self.low + self.width * bins
+
+    def merge(self, other: "Histogram"):
+        if (other.low, other.bins) != (self.low, self.bins):
+            raise ValueError("Cannot merge histograms with different bin layouts")
+        if other.high < self.high:
+            other = other.copy()
+            other._grow(self.high - self.width / 2)
+        elif other.high > self.high:
+            self._grow(other.high - other.width / 2)
+        if not math.isclose(other.high, self.high):
+            raise ValueError("Cannot merge histograms with different bin layouts")
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    def copy(self) -> "Histogram":
+        clone = Histogram(self.low, self.high, self.bins)
+        clone.counts = array("q", self.counts)
+        clone.underflow, clone.overflow = self.underflow, self.overflow
+        return clone
+
+    def bin_edges(self) -> List[float]:
+        return [self.low + i * self.width for i in range(self.bins + 1)]
+
+
+class StreamingSummary:
+    """Моменты, квантили и гистограмма одной величины (время ожидания, обслуживания и т.п.)."""
+
+    def __init__(self, hist_low: float = 0.0, hist_high: float = 100.0, hist_bins: int = 200,
+                 compression: float = 200.0):
+        self.moments = RunningMoments()
+        self.digest = TDigest(compression)
+        self.histogram = Histogram(hist_low, hist_high, hist_bins)
+
+    def add(self, x: float):
+        # Горячий путь: обновления трех накопителей записаны без вложенных вызовов
+        moments = self.moments
+        moments.count += 1
+        delta = x - moments.mean
+        moments.mean += delta / moments.count
+        moments.m2 += delta * (x - moments.mean)
+        if x < moments.min:
+            moments.min = x
+        if x > moments.max:
+            moments.max = x
+
+        digest = self.digest
+        digest.count += 1
+        digest.min = moments.min
+        digest.max = moments.max
+        buffer = digest._buffer
+        buffer.append(x)
+        if len(buffer) >= digest._buffer_limit:
+            digest._compress()
+
+        histogram = self.histogram
+        if x < histogram.low:
+            histogram.underflow += 1
+            return
+        if x >= histogram.high:
+            histogram._grow(x)
+        histogram.counts[min(int((x - histogram.low) / histogram.width), histogram.bins - 1)] += 1
+
+    def merge(self, other: "StreamingSummary"):
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+        self.histogram.merge(other.histogram)
+
+    def copy(self) -> "StreamingSummary":
+        clone = StreamingSummary.__new__(StreamingSummary)
+        clone.moments, clone.digest, clone.histogram = self.moments.copy(), self.digest.copy(), self.histogram.copy()
+        return clone
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    @property
+    def mean(self) -> float:
+        return self.moments.mean
+
+    @property
+    def std(self) -> float:
+        return self.moments.std
+
+    def quantile(self, q: float) -> float:
+        return self.digest.quantile(q)
+
+    def percentiles(self) -> Dict[str, float]:
+        return {"p50": self.quantile(0.5), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+
+def merge_stats(target: dict, other: dict) -> dict:
+    """
+    Добавляет статистику диспетчера other к target (оба - словари Dispatcher.stats)
+    и возвращает target. Счетчики складываются, потоковые накопители объединяются.
+    """
+    for key, per_source in other.items():
+        merged = target.setdefault(key, {})
+        for source_id, value in per_source.items():
+            if isinstance(value, StreamingSummary):
+                if source_id in merged:
+                    merged[source_id].merge(value)
+                else:
+                    merged[source_id] = value.copy()
+            else:
+                merged[source_id] = merged.get(source_id, 0) + value
+    return target
+
+
+def copy_stats(stats: dict) -> dict:
+    """
+    Независимая копия статистики диспетчера: новые словари (defaultdict сохраняют фабрику)
+    и копии потоковых накопителей. Дешевле copy.deepcopy в несколько раз.
+    """
+    copied = {}
+    for key, per_source in stats.items():
+        target = defaultdict(per_source.default_factory) if isinstance(per_source, defaultdict) else {}
+        for source_id, value in per_source.items():
+            target[source_id] = value.copy() if isinstance(value, StreamingSummary) else value
+        copied[key] = target
+    return copied
+
@@ -0,0 +1,147 @@
+# src/metrics/time_weighted.py
+"""
+Средние по времени: загрузка приборов, заполнение буфера и его распределение, вероятность
+занятости всех приборов, размер календаря событий.
+
+Каждая величина - LevelTimeIntegral: компоненты сообщают новый уровень при каждом изменении
+(Buffer.occupancy, Device.busy, DeviceManager.occupancy, Dispatcher.calendar_size), а интеграл
+накапливает время пребывания на каждом уровне - O(1) на изменение. Пока метрики не подключены,
+эти атрибуты равны None и компоненты их не трогают.
+
+    metrics = TimeWeightedMetrics().attach(model.dispatcher)
+    model.dispatcher.run(until_time=10_000)
+    print(metrics.report(model.dispatcher.current_time))
+"""
+from typing import Dict, List, Optional
+
+
+class LevelTimeIntegral:
+    """
+    Интеграл по времени целочисленного уровня: время на каждом уровне и площадь под графиком.
+    Список уровней растет до наибольшего достигнутого уровня.
+    """
+    __slots__ = ("level", "start_time", "last_time", "area", "time_at_level", "max_level")
+
+    def __init__(self, start_time: float = 0.0, level: int = 0):
+        self.level = level
+        self.max_level = level
+        self.reset(start_time)
+
+    def reset(self, now: float):
+        self.start_time = now
+        self.last_time = now
+        self.area = 0.0
+        self.time_at_level: List[float] = [0.0] * (self.level + 1)
+        self.max_level = self.level
+
+    def update(self, now: float, level: int):
+        current = self.level
+        dt = now - self.last_time
+        if dt > 0.0:
+            times = self.time_at_level
+            if current >= len(times):
+                times.extend([0.0] * (current + 1 - len(times)))
+            times[current] += dt
+            self.area += current * dt
+            self.last_time = now
+        self.level = level
+        if level > self.max_level:
+            self.max_level = level
+
+    def duration(self, now: Optional[float] = None) -> float:
+        return (self.last_time if now is None else max(now, self.last_time)) - self.start_time
+
+    def mean(self, now: Optional[float] = None) -> float:
+        duration = self.duration(now)
+        if duration <= 0.0:
+            return float(self.level)
+        tail = duration - (self.last_time - self.start_time)
+        return (self.area + self.level * tail) / duration
+
+    def distribution(self, now: Optional[float] = None) -> List[float]:
+        """Доля времени на каждом уровне 0..max_level."""
+        duration = self.duration(now)
+        times = list(self.time_at_level) + [0.0] * (self.max_level + 1 - len(self.time_at_level))
+        times[self.level] += duration - (self.last_time - self.start_time)
+        if duration <= 0.0:
+            return [1.0 if level == self.level else 0.0 for level in range(len(times))]
+        return [t / duration for t in times]
+
+    def probability(self, level: int, now: Optional[float] = None) -> float:
+        distribution = self.distribution(now)
+        return distribution[level] if level < len(distribution) else 0.0
+
+
+class TimeWeightedMetrics:
+    """Набор интегралов модели; подключается к диспетчеру и обнуляется вместе с его статистикой."""
+
+    def __init__(self):
+        self.dispatcher = None
+        self.buffer: Optional[LevelTimeIntegral] = None
+        self.busy_devices: Optional[LevelTimeIntegral] = None
+        self.calendar: Optional[LevelTimeIntegral] = None
+        self.devices: Dict[int, LevelTimeIntegral] = {}
+
+    def attach(self, dispatcher):
+        now = dispatcher.current_time
+        self.dispatcher = dispatcher
+        dispatcher.time_metrics = self
+        self.buffer = dispatcher.buffer.occupancy = LevelTimeIntegral(now, dispatcher.buffer.count)
+        manager = dispatcher.device_manager
+        self.busy_devices = manager.occupancy = LevelTimeIntegral(now, manager.busy_count)
+        self.calendar = dispatcher.calendar_size = LevelTimeIntegral(now, len(dispatcher.event_calendar))
+        self.devices = {}
+        for device in manager.devices:
+            device.busy = self.devices[device.get_id()] = LevelTimeIntegral(now, 0 if device.is_free() else 1)
+        return self
+
+    def detach(self):
+        dispatcher = self.dispatcher
+        if dispatcher is None:
+            return
+        dispatcher.buffer.occupancy = None
+        dispatcher.device_manager.occupancy = None
+        dispatcher.calendar_size = None
+        for device in dispatcher.device_manager.devices:
+            device.busy = None
+        dispatcher.time_metrics = None
+        self.dispatcher = None
+
+    def integrals(self) -> List[LevelTimeIntegral]:
+        return [self.buffer, self.busy_devices, self.calendar, *self.devices.values()]
+
+    def reset(self, now: float):
+        """Начинает накопление заново (например, после разгона)."""
+        for integral in self.integrals():
+            integral.reset(now)
+
+    def as_dict(self, now: float) -> dict:
+        num_devices = len(self.devices)
+        return {
+            "horizon": self.buffer.duration(now),
+            "buffer_mean": self.buffer.mean(now),
+            "buffer_distribution": self.buffer.distribution(now),
+            "buffer_full_probability": self.buffer.probability(self.dispatcher.buffer.max_size, now),
+            "device_utilization": {device_id: integral.mean(now) for device_id, integral in self.devices.items()},
+            "busy_devices_mean": self.busy_devices.mean(now),
+            "all_busy_probability": self.busy_devices.probability(num_devices, now) if num_devices else 0.0,
+            "calendar_mean": self.calendar.mean(now),
+            "calendar_max": self.calendar.max_level,
+        }
+
+    def report(self, now: float) -> str:
+        data = self.as_dict(now)
+        distribution = data["buffer_distribution"]
+        lines = [
+            f"Средние по времени (интервал {data['horizon']:.2f}):",
+            f"  Заявок в буфере: среднее {data['buffer_mean']:.3f}, "
+            f"вероятность заполнения {data['buffer_full_probability']:.4f}",
+            "  Распределение заполнения: " + ", ".join(f"{level}: {p:.4f}" for level, p in enumerate(distribution)
+                                                      if p > 0.0),
+            f"  Занятых приборов: среднее {data['busy_devices_mean']:.3f}, "
+            f"все заняты с вероятностью {data['all_busy_probability']:.4f}",
+            "  Загрузка приборов: " + ", ".join(f"П{device_id}: {u:.4f}"
+                                                 for device_id, u in sorted(data["device_utilization"].items())),
+            f"  Событий в календаре: среднее {data['calendar_mean']:.2f}, максимум {data['calendar_max']}",
+        ]
+        return "\n".join(lines)
@@ -1,5 +1,6 @@
 # src/models/__init__.py
 from .task import Task
+from .task_table import TaskTable, TaskHandle
 from .enums import TaskStatus, EventType
 
-__all__ = ["Task", "TaskStatus", "EventType"]
\ No newline at end of file
+__all__ = ["Task", "TaskTable", "TaskHandle", "TaskStatus", "EventType"]
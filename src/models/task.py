@@ -1,21 +1,71 @@
 # src/models/task.py
-from dataclasses import dataclass
 from typing import Optional
 from .enums import TaskStatus
+from .task_table import TaskTable, TaskHandle, STATUS_BY_CODE, CODE_BY_STATUS
+
+
+def _optional_time(value: float) -> Optional[float]:
+    return None if value != value else value  # NaN - время не задано
+
 
-@dataclass
 class Task:
-    id: int
-    source_id: int
-    timestamp: float
-    status: TaskStatus = TaskStatus.PENDING
-    time_assigned_to_device: Optional[float] = None
-    time_left_buffer: Optional[float] = None
-    time_completed: Optional[float] = None
+    """
+    Представление одной строки TaskTable с прежним набором атрибутов заявки.
+    Данные хранятся в таблице, объект только ссылается на строку.
+    """
+    __slots__ = ("table", "handle")
+
+    def __init__(self, table: TaskTable, handle: TaskHandle):
+        self.table = table
+        self.handle = handle
+
+    @property
+    def id(self) -> int:
+        return self.table.local_id[self.handle]
+
+    @property
+    def source_id(self) -> int:
+        return self.table.source_id[self.handle]
+
+    @property
+    def timestamp(self) -> float:
+        return self.table.timestamp[self.handle]
+
+    @property
+    def status(self) -> TaskStatus:
+        return STATUS_BY_CODE[self.table.status[self.handle]]
+
+    @status.setter
+    def status(self, value: TaskStatus):
+        self.table.status[self.handle] = CODE_BY_STATUS[value]
+
+    @property
+    def time_assigned_to_device(self) -> Optional[float]:
+        return _optional_time(self.table.time_assigned_to_device[self.handle])
+
+    @property
+    def time_left_buffer(self) -> Optional[float]:
+        return _optional_time(self.table.time_left_buffer[self.handle])
+
+    @property
+    def time_completed(self) -> Optional[float]:
+        return _optional_time(self.table.time_completed[self.handle])
+
+    @property
+    def service_demand(self) -> Optional[float]:
+        return _optional_time(self.table.service_demand[self.handle])
 
     def __hash__(self):
-        return self.id
+        return hash((id(self.table), self.handle))
+
+    def __eq__(self, other):
+        return isinstance(other, Task) and self.table is other.table and self.handle == other.handle
 
     def __lt__(self, other):
         # Для приоритетной очереди, сортировка по времени поступления (FIFO)
-        return self.timestamp < other.timestamp
\ No newline at end of file
+        return self.timestamp < other.timestamp
+
+    def __repr__(self):
+        return (f"Task(id={self.id}, source_id={self.source_id}, timestamp={self.timestamp}, "
+                f"status={self.status!r}, time_assigned_to_device={self.time_assigned_to_device}, "
+                f"time_left_buffer={self.time_left_buffer}, time_completed={self.time_completed})")
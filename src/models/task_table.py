@@ -0,0 +1,95 @@
+# src/models/task_table.py
+from array import array
+from typing import Iterator, List
+from .enums import TaskStatus
+
+# Дескриптор заявки - номер строки в таблице, уникальный среди заявок в системе
+TaskHandle = int
+
+# Компактные коды статусов (хранятся в таблице одним байтом)
+STATUS_PENDING = 0
+STATUS_BUFFERED = 1
+STATUS_ASSIGNED = 2
+STATUS_COMPLETED = 3
+STATUS_BY_CODE = (TaskStatus.PENDING, TaskStatus.BUFFERED, TaskStatus.ASSIGNED, TaskStatus.COMPLETED)
+CODE_BY_STATUS = {status: code for code, status in enumerate(STATUS_BY_CODE)}
+
+# Отсутствующая отметка времени (вместо None)
+NO_TIME = float("nan")
+
+
+class TaskTable:
+    """
+    Таблица заявок в виде столбцов (struct-of-arrays). Строка освобождается, когда
+    заявка покидает систему, и переиспользуется для следующих заявок, поэтому память
+    пропорциональна числу заявок, одновременно находящихся в системе.
+    """
+
+    def __init__(self):
+        self.local_id = array("q")  # Номер заявки внутри источника
+        self.source_id = array("q")
+        self.timestamp = array("d")
+        self.status = array("b")
+        self.time_assigned_to_device = array("d")
+        self.time_left_buffer = array("d")
+        self.time_completed = array("d")
+        # Требуемое время обслуживания из трассы заказов; NO_TIME - разыгрывается прибором
+        self.service_demand = array("d")
+        self._free: List[TaskHandle] = []
+
+    def create(self, local_id: int, source_id: int, timestamp: float,
+               status: int = STATUS_PENDING, service_demand: float = NO_TIME) -> TaskHandle:
+        if self._free:
+            handle = self._free.pop()
+            self.local_id[handle] = local_id
+            self.source_id[handle] = source_id
+            self.timestamp[handle] = timestamp
+            self.status[handle] = status
+            self.time_assigned_to_device[handle] = NO_TIME
+            self.time_left_buffer[handle] = NO_TIME
+            self.time_completed[handle] = NO_TIME
+            self.service_demand[handle] = service_demand
+            return handle
+        handle = len(self.timestamp)
+        self.local_id.append(local_id)
+        self.source_id.append(source_id)
+        self.timestamp.append(timestamp)
+        self.status.append(status)
+        self.time_assigned_to_device.append(NO_TIME)
+        self.time_left_buffer.append(NO_TIME)
+        self.time_completed.append(NO_TIME)
+        self.service_demand.append(service_demand)
+        return handle
+
+    def release(self, handle: TaskHandle):
+        self._free.append(handle)
+
+    def __len__(self) -> int:
+        """Число заявок, находящихся в системе."""
+        return len(self.timestamp) - len(self._free)
+
+    @property
+    def capacity(self) -> int:
+        return len(self.timestamp)
+
+    def live_handles(self) -> Iterator[TaskHandle]:
+        free = set(self._free)
+        return (handle for handle in range(len(self.timestamp)) if handle not in free)
+
+    COLUMNS = ("local_id", "source_id", "timestamp", "status", "time_assigned_to_device",
+               "time_left_buffer", "time_completed", "service_demand")
+
+    def snapshot_state(self) -> dict:
+        return {"columns": {name: getattr(self, name).tobytes() for name in self.COLUMNS},
+                "free": list(self._free)}
+
+    def restore_state(self, state: dict):
+        for name in self.COLUMNS:
+            column = array(getattr(self, name).typecode)
+            column.frombytes(state["columns"][name])
+            setattr(self, name, column)
+        self._free = list(state["free"])
+
+    def view(self, handle: TaskHandle) -> "Task":
+        from .task import Task
+        return Task(self, handle)
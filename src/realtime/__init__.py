@@ -0,0 +1,4 @@
+# src/realtime/__init__.py
+from .shadow import ShadowRunner, create_shadow, produce, tcp_producer
+
+__all__ = ["ShadowRunner", "create_shadow", "produce", "tcp_producer"]
@@ -0,0 +1,4 @@
+# src/realtime/__main__.py
+from .shadow import main
+
+main()
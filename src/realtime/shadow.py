@@ -0,0 +1,227 @@
+# src/realtime/shadow.py
+"""
+Теневой режим: модель идет параллельно живому складу. Заказы поступают извне
+(asyncio.Queue, TCP-сокет или подставной генератор) и передаются в модель через
+ExternalSource, а сборщики (приборы) обслуживают их в масштабированном реальном времени.
+
+Модельное время связано с реальным: model = (wall - wall_start) * speedup / time_unit,
+где time_unit - секунд реального времени в единице модельного при speedup = 1.
+Диспетчер обрабатывает события порциями не больше max_events_per_slice и между порциями
+отдает управление циклу событий, поэтому прием заказов не блокируется даже при всплесках.
+Если модель не успевает за часами, отставание (часы минус модельное время) попадает в отчет.
+
+Запуск с подставным генератором: python -m src.realtime --speedup 60 --duration 10 --rate 2000
+Прием по TCP (по строке на заказ, в строке - необязательное время обслуживания):
+python -m src.realtime --listen 127.0.0.1:7070 --rate 0 --duration 60
+"""
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import replace
+from typing import Callable, Optional
+
+from ..components import ExternalSource
+from ..config import Model, ModelConfig, build_model
+from ..experiments.replication import add_config_arguments, config_from_args
+from ..metrics.streaming import RunningMoments
+from ..models.task_table import NO_TIME
+
+
+class ShadowRunner:
+    def __init__(self, model: Model, source: ExternalSource, speedup: float = 1.0,
+                 time_unit: float = 1.0, max_events_per_slice: int = 5000, idle_poll: float = 0.05):
+        self.model = model
+        self.dispatcher = model.dispatcher
+        self.source = source
+        self.speedup = speedup
+        self.time_unit = time_unit
+        self.max_events_per_slice = max_events_per_slice
+        # Наибольшая пауза без событий: за это время проверяется условие остановки
+        self.idle_poll = idle_poll
+        self.wall_start = time.perf_counter()
+        self.model_start = self.dispatcher.current_time
+        self.received = 0
+        self.malformed = 0  # Строки TCP с нечисловым временем обслуживания (отброшены)
+        self.events = 0
+        self.slices = 0
+        self.behind_slices = 0  # Порции, после которых остались просроченные события
+        # Отставание модели от часов после каждой порции, единицы модельного времени
+        self.lag = RunningMoments()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def model_now(self) -> float:
+        return self.model_start + (time.perf_counter() - self.wall_start) * self.speedup / self.time_unit
+
+    def wall_seconds(self, model_duration: float) -> float:
+        return model_duration * self.time_unit / self.speedup
+
+    def submit(self, service_demand: float = NO_TIME):
+        """Принимает заказ в текущий момент модельного времени."""
+        self.received += 1
+        model_time = max(self.model_now(), self.dispatcher.current_time)
+        if self.source.submit(model_time, service_demand):
+            self.dispatcher.wake_source(self.source)
+        self._wakeup.set()
+
+    def stop(self):
+        self._stopping = True
+        self._wakeup.set()
+
+    async def run(self, duration: Optional[float] = None):
+        """Продвигает модель вслед за часами; duration - секунд реального времени (None - до stop())."""
+        dispatcher = self.dispatcher
+        calendar = dispatcher.event_calendar
+        deadline = None if duration is None else time.perf_counter() + duration
+        while not self._stopping and (deadline is None or time.perf_counter() < deadline):
+            target = self.model_now()
+            self.events += dispatcher.run(until_time=target, max_events=self.max_events_per_slice)
+            self.slices += 1
+            calendar = dispatcher.event_calendar  # Может смениться при восстановлении снимка
+            if calendar and calendar.peek_time() <= target:
+                # Порция исчерпана раньше, чем модель догнала часы
+                self.behind_slices += 1
+                self.lag.add(target - dispatcher.current_time)
+                await asyncio.sleep(0)
+                continue
+            self.lag.add(0.0)
+            next_time = calendar.peek_time() if calendar else float("inf")
+            timeout = min(self.idle_poll, max(0.0, self.wall_seconds(next_time - self.model_now())))
+            if deadline is not None:
+                timeout = min(timeout, max(0.0, deadline - time.perf_counter()))
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def consume(self, queue: asyncio.Queue):
+        """Заказы из очереди: элемент - время обслуживания или None (разыгрывается прибором)."""
+        while True:
+            demand = await queue.get()
+            self.submit(NO_TIME if demand is None else demand)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Заказы из TCP-соединения: по строке на заказ, в строке - необязательное время обслуживания."""
+        try:
+            async for line in reader:
+                line = line.strip()
+                try:
+                    demand = float(line) if line else NO_TIME
+                except ValueError:
+                    # Испорченная строка не должна рвать соединение производителя
+                    self.malformed += 1
+                    continue
+                self.submit(demand)
+        finally:
+            writer.close()
+
+    def report(self) -> str:
+        dispatcher = self.dispatcher
+        latency = self.source.latency
+        stats = dispatcher.stats
+        wall = time.perf_counter() - self.wall_start
+        lines = [
+            f"Реальное время: {wall:.2f} с, модельное: {dispatcher.current_time - self.model_start:.2f} "
+            f"(ускорение {self.speedup:g})",
+            f"Заказов принято: {self.received}, поступило в модель: {latency.count}, "
+            f"обслужено: {sum(stats['completed_by_source'].values())}, "
+            f"отказов: {sum(stats['rejected_by_source'].values())}",
+            f"Событий: {self.events}, порций: {self.slices}, с отставанием: {self.behind_slices}",
+            f"Задержка заказа до модели: среднее {latency.mean_ns / 1e6:.2f} мс, "
+            f"p99 <= {latency.quantile_ns(0.99) / 1e6:.2f} мс",
+        ]
+        if self.malformed:
+            lines.append(f"Отброшено строк с нечисловым временем обслуживания: {self.malformed}")
+        if self.lag.count:
+            lines.append(f"Отставание модели от часов: среднее {self.wall_seconds(self.lag.mean) * 1e3:.2f} мс, "
+                         f"макс. {self.wall_seconds(self.lag.max) * 1e3:.2f} мс реального времени")
+        return "\n".join(lines)
+
+
+def create_shadow(config: ModelConfig, seed: Optional[int] = None, **options) -> ShadowRunner:
+    """Модель по config без генерирующих источников и с одним внешним источником."""
+    model = build_model(replace(config, num_sources=0, arrival_trace=""), seed=seed)
+    source = ExternalSource(1, model.dispatcher.tasks)
+    model.sources.append(source)
+    model.dispatcher.wake_source(source)
+    return ShadowRunner(model, source, **options)
+
+
+async def produce(submit: Callable[[float], None], rate: float, duration: float, burst_size: int = 0,
+                  burst_every: float = 1.0, seed: int = 1):
+    """
+    Подставной производитель заказов: пуассоновский поток интенсивности rate в секунду
+    реального времени и, если burst_size > 0, всплески по burst_size заказов раз в burst_every секунд.
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    next_arrival = started + (rng.expovariate(rate) if rate > 0 else float("inf"))
+    next_burst = started + burst_every if burst_size > 0 else float("inf")
+    end = started + duration
+    while True:
+        now = time.perf_counter()
+        if now >= end:
+            return
+        # Заказы, чье время уже наступило, отправляются пачкой, как при реальном всплеске
+        while next_arrival <= now:
+            submit(NO_TIME)
+            next_arrival += rng.expovariate(rate)
+        if next_burst <= now:
+            for _ in range(burst_size):
+                submit(NO_TIME)
+            next_burst += burst_every
+        await asyncio.sleep(max(0.0, min(next_arrival, next_burst, end) - time.perf_counter()))
+
+
+async def tcp_producer(host: str, port: int, rate: float, duration: float, burst_size: int = 0,
+                       burst_every: float = 1.0, seed: int = 1):
+    """Тот же подставной производитель, но заказы отправляются строками в TCP-сокет."""
+    _, writer = await asyncio.open_connection(host, port)
+    await produce(lambda demand: writer.write(b"\n"), rate, duration, burst_size, burst_every, seed)
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def _main(args):
+    config = config_from_args(args)
+    runner = create_shadow(config, seed=args.seed, speedup=args.speedup, time_unit=args.time_unit,
+                           max_events_per_slice=args.max_events_per_slice)
+    tasks = []
+    server = None
+    if args.listen:
+        host, port = args.listen.rsplit(":", 1)
+        server = await asyncio.start_server(runner.handle_connection, host, int(port))
+        print(f"Прием заказов по TCP на {args.listen}")
+        if args.rate > 0 or args.burst_size > 0:
+            tasks.append(asyncio.create_task(tcp_producer(host, int(port), args.rate, args.duration,
+                                                          args.burst_size, args.burst_every, args.seed)))
+    elif args.rate > 0 or args.burst_size > 0:
+        tasks.append(asyncio.create_task(produce(runner.submit, args.rate, args.duration,
+                                                 args.burst_size, args.burst_every, args.seed)))
+    await runner.run(args.duration)
+    for task in tasks:
+        task.cancel()
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    print(runner.report())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Теневой режим модели склада в реальном времени")
+    add_config_arguments(parser, ModelConfig(num_devices=4, buffer_size=100))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--speedup", type=float, default=1.0, help="во сколько раз модель идет быстрее часов")
+    parser.add_argument("--time-unit", type=float, default=1.0,
+                        help="секунд реального времени в единице модельного при ускорении 1")
+    parser.add_argument("--duration", type=float, default=10.0, help="длительность, секунд реального времени")
+    parser.add_argument("--max-events-per-slice", type=int, default=5000)
+    parser.add_argument("--listen", default="", help="принимать заказы по TCP на ХОСТ:ПОРТ")
+    parser.add_argument("--rate", type=float, default=100.0,
+                        help="подставной производитель: заказов в секунду реального времени (0 - выключен)")
+    parser.add_argument("--burst-size", type=int, default=0, help="подставной производитель: размер всплеска")
+    parser.add_argument("--burst-every", type=float, default=1.0, help="секунд между всплесками")
+    asyncio.run(_main(parser.parse_args(argv)))
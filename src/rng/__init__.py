@@ -0,0 +1,4 @@
+# src/rng/__init__.py
+from .streams import derive_seed, make_stream
+
+__all__ = ["derive_seed", "make_stream"]
@@ -0,0 +1,21 @@
+# src/rng/streams.py
+"""
+Независимые потоки случайных чисел: у каждого компонента каждой реплики свой генератор,
+зерно которого выводится из общего зерна и "пути" компонента, например
+(seed, "replication", 3, "device", 2). Так прогоны воспроизводимы и не зависят от того,
+в каком процессе и в каком порядке выполняются.
+"""
+import hashlib
+import random
+from typing import Union
+
+Key = Union[int, str]
+
+
+def derive_seed(seed: int, *path: Key) -> int:
+    digest = hashlib.blake2b(repr((seed,) + path).encode(), digest_size=16).digest()
+    return int.from_bytes(digest, "little")
+
+
+def make_stream(seed: int, *path: Key) -> random.Random:
+    return random.Random(derive_seed(seed, *path))
@@ -0,0 +1,236 @@
+# src/rng/variates.py
+"""
+Потоки случайных величин с предварительной генерацией блоками. Каждое значение получается
+обратным преобразованием фиксированного числа равномерных чисел генератора потока, поэтому
+последовательность значений при заданном зерне не зависит от размера блока.
+"""
+import itertools
+import math
+import random
+from abc import ABC, abstractmethod
+from functools import partial
+from typing import Callable, List, Optional, Sequence
+
+# Заменитель нуля для логарифма в антитетических преобразованиях
+_TINY = 5e-324
+
+
+class Distribution(ABC):
+    # Сколько равномерных чисел расходуется на одно значение
+    uniforms_per_value = 1
+
+    @property
+    @abstractmethod
+    def mean(self) -> float:
+        pass
+
+    @property
+    @abstractmethod
+    def scv(self) -> float:
+        """Квадрат коэффициента вариации (дисперсия / квадрат среднего)."""
+        pass
+
+    @abstractmethod
+    def fill(self, uniform, n: int, antithetic: bool = False) -> List[float]:
+        """Возвращает n значений; uniform() - равномерное число на [0, 1)."""
+        pass
+
+    def sampler(self, rng) -> Callable[[], float]:
+        """Функция, выдающая по одному значению без буферизации."""
+        uniform = rng.random
+        return lambda: self.fill(uniform, 1)[0]
+
+
+class Deterministic(Distribution):
+    uniforms_per_value = 0
+
+    def __init__(self, value: float):
+        self.value = value
+
+    @property
+    def mean(self) -> float:
+        return self.value
+
+    @property
+    def scv(self) -> float:
+        return 0.0
+
+    def fill(self, uniform, n: int, antithetic: bool = False) -> List[float]:
+        return [self.value] * n
+
+    def sampler(self, rng) -> Callable[[], float]:
+        return itertools.repeat(self.value).__next__
+
+
+class Uniform(Distribution):
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+
+    @property
+    def mean(self) -> float:
+        return (self.low + self.high) / 2
+
+    @property
+    def scv(self) -> float:
+        mean = self.mean
+        return (self.high - self.low) ** 2 / 12 / mean ** 2 if mean else 0.0
+
+    def fill(self, uniform, n: int, antithetic: bool = False) -> List[float]:
+        low, width = self.low, self.high - self.low
+        if antithetic:
+            return [low + width * (1.0 - uniform()) for _ in range(n)]
+        return [low + width * uniform() for _ in range(n)]
+
+    def sampler(self, rng) -> Callable[[], float]:
+        return partial(rng.uniform, self.low, self.high)
+
+
+class Exponential(Distribution):
+    def __init__(self, mean: float):
+        self._mean = mean
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def scv(self) -> float:
+        return 1.0
+
+    def fill(self, uniform, n: int, antithetic: bool = False) -> List[float]:
+        log, scale = math.log, -self._mean
+        if antithetic:
+            return [scale * log(uniform() or _TINY) for _ in range(n)]
+        return [scale * log(1.0 - uniform()) for _ in range(n)]
+
+
+class Erlang(Distribution):
+    def __init__(self, k: int, mean: float):
+        self.k = k
+        self._mean = mean
+        self.uniforms_per_value = k
+
+    @property
+    def mean(self) -> float:
+        return self._mean
+
+    @property
+    def scv(self) -> float:
+        return 1.0 / self.k
+
+    def fill(self, uniform, n: int, antithetic: bool = False) -> List[float]:
+        log, scale, k = math.log, -self._mean / self.k, self.k
+        values = []
+        for _ in range(n):
+            product = 1.0
+            for _ in range(k):
+                product *= (uniform() or _TINY) if antithetic else 1.0 - uniform()
+            values.append(scale * log(product or _TINY))
+        return values
+
+
+class Empirical(Distribution):
+    """Эмпирическое распределение по выборке (обратная ступенчатая функция распределения)."""
+
+    def __init__(self, sample: Sequence[float]):
+        if not sample:
+            raise ValueError("Empirical distribution needs a non-empty sample")
+        self.values = sorted(sample)
+
+    @property
+    def mean(self) -> float:
+        return sum(self.values) / len(self.values)
+
+    @property
+    def scv(self) -> float:
+        mean = self.mean
+        if not mean:
+            return 0.0
+        return sum((x - mean) ** 2 for x in self.values) / len(self.values) / mean ** 2
+
+    def fill(self, uniform, n: int, antithetic: bool = False) -> List[float]:
+        values, size = self.values, len(self.values)
+        if antithetic:
+            return [values[min(int((1.0 - uniform()) * size), size - 1)] for _ in range(n)]
+        return [values[int(uniform() * size)] for _ in range(n)]
+
+
+class VariateStream:
+    """
+    Поток значений распределения: блок из block_size значений генерируется за раз,
+    а next_value - это __next__ итератора по готовому блоку (вызов без интерпретатора).
+    В конце блока next_value бросает StopIteration; тогда нужно вызвать draw() и заново
+    взять next_value:
+
+        try:
+            x = next_value()
+        except StopIteration:
+            x = stream.draw()
+            next_value = stream.next_value
+    """
+
+    def __init__(self, distribution: Distribution, rng: Optional[random.Random] = None,
+                 block_size: int = 4096, antithetic: bool = False):
+        self.distribution = distribution
+        self.rng = rng
+        self.block_size = block_size
+        self.antithetic = antithetic
+        self._block: List[float] = []
+        self._iterator = iter(self._block)
+        if rng is None:
+            # Без собственного генератора берем общий модуль random по одному значению,
+            # чтобы не менять порядок расхода общих случайных чисел
+            self.next_value = distribution.sampler(random)
+        else:
+            self.next_value = self._iterator.__next__
+
+    def draw(self) -> float:
+        try:
+            return self.next_value()
+        except StopIteration:
+            self._block = self.distribution.fill(self.rng.random, self.block_size, self.antithetic)
+            self._iterator = iter(self._block)
+            self.next_value = self._iterator.__next__
+            return self.next_value()
+
+    def snapshot_state(self) -> Optional[tuple]:
+        """
+        Состояние генератора и еще не выданные значения текущего блока; None для общего
+        генератора модуля random (его состояние сохраняется отдельно, один раз на модель).
+        """
+        if self.rng is None:
+            return None
+        pending = list(self._iterator)
+        # Чтение исчерпало итератор - продолжаем с копии оставшихся значений
+        self._set_block(pending)
+        return self.rng.getstate(), pending
+
+    def restore_state(self, state: Optional[tuple]):
+        if state is None or self.rng is None:
+            return
+        rng_state, pending = state
+        self.rng.setstate(rng_state)
+        self._set_block(list(pending))
+
+    def _set_block(self, values: List[float]):
+        self._block = values
+        self._iterator = iter(values)
+        self.next_value = self._iterator.__next__
+
+    @property
+    def mean(self) -> float:
+        return self.distribution.mean
+
+
+def make_distribution(kind: str, mean: float, low: Optional[float] = None, high: Optional[float] = None,
+                      k: int = 2) -> Distribution:
+    if kind == "fixed":
+        return Deterministic(mean)
+    if kind == "uniform":
+        return Uniform(low if low is not None else 0.0, high if high is not None else 2 * mean)
+    if kind in ("exponential", "poisson"):
+        return Exponential(mean)
+    if kind == "erlang":
+        return Erlang(k, mean)
+    raise NotImplementedError(f"Distribution {kind} not implemented")
@@ -0,0 +1,6 @@
+# src/traces/__init__.py
+from .arrivals import ArrivalTrace, ArrivalTraceWriter, csv_to_trace
+from .events import EventTrace, EventTraceWriter, order_timelines, rejection_causes
+
+__all__ = ["ArrivalTrace", "ArrivalTraceWriter", "csv_to_trace",
+           "EventTrace", "EventTraceWriter", "order_timelines", "rejection_causes"]
@@ -0,0 +1,10 @@
+# src/traces/__main__.py
+import sys
+
+from . import arrivals, events
+
+# Файл трассы событий прогона - анализ, иначе - преобразование CSV в трассу поступлений
+if len(sys.argv) > 1 and events.is_event_trace(sys.argv[1]):
+    events.main()
+else:
+    arrivals.main()
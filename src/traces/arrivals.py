@@ -0,0 +1,150 @@
+# src/traces/arrivals.py
+"""
+Двоичный столбцовый файл трассы поступлений:
+
+    заголовок (64 байта): магия b"OSARRIV\\0", версия, флаги, число записей
+    float64[count]  - моменты поступления (неубывающие)
+    float64[count]  - требуемое время обслуживания (если установлен флаг HAS_DEMAND)
+
+Файл читается через mmap: столбцы не загружаются в память, страницы подгружаются ОС
+по мере продвижения по трассе. Конвертация из CSV:
+python -m src.traces orders.csv orders.trace --time-column ts --demand-column pick_time
+"""
+import argparse
+import csv
+import mmap
+import os
+import struct
+import tempfile
+from array import array
+from typing import Optional
+
+MAGIC = b"OSARRIV\0"
+VERSION = 1
+FLAG_HAS_DEMAND = 1
+HEADER = struct.Struct("<8sIIQ")
+HEADER_SIZE = 64
+CHUNK = 1 << 16
+
+
+class ArrivalTrace:
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < HEADER_SIZE:
+            raise ValueError(f"{path}: not an arrival trace")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flags, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not an arrival trace")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported trace version {version}")
+        self.count = count
+        self.has_demand = bool(flags & FLAG_HAS_DEMAND)
+        column_bytes = 8 * count
+        expected = HEADER_SIZE + column_bytes * (2 if self.has_demand else 1)
+        if size < expected:
+            raise ValueError(f"{path}: truncated trace ({size} < {expected} bytes)")
+        view = memoryview(self._mmap)
+        self.timestamps = view[HEADER_SIZE:HEADER_SIZE + column_bytes].cast("d")
+        self.demands = (view[HEADER_SIZE + column_bytes:HEADER_SIZE + 2 * column_bytes].cast("d")
+                        if self.has_demand else None)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        self.timestamps.release()
+        if self.demands is not None:
+            self.demands.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ArrivalTraceWriter:
+    """Потоковая запись трассы: столбцы копятся блоками, второй столбец - во временном файле."""
+
+    def __init__(self, path: str, has_demand: bool = False):
+        self.path = path
+        self.has_demand = has_demand
+        self.count = 0
+        self._last_time = float("-inf")
+        self._file = open(path, "wb")
+        self._file.write(bytes(HEADER_SIZE))
+        self._times = array("d")
+        self._demands = array("d")
+        self._demand_file = tempfile.TemporaryFile() if has_demand else None
+
+    def append(self, timestamp: float, demand: Optional[float] = None):
+        if timestamp < self._last_time:
+            raise ValueError(f"Arrival times must be non-decreasing: {timestamp} after {self._last_time}")
+        self._last_time = timestamp
+        self._times.append(timestamp)
+        if self.has_demand:
+            self._demands.append(demand if demand is not None else float("nan"))
+        self.count += 1
+        if len(self._times) >= CHUNK:
+            self._flush()
+
+    def _flush(self):
+        self._times.tofile(self._file)
+        self._times = array("d")
+        if self.has_demand:
+            self._demands.tofile(self._demand_file)
+            self._demands = array("d")
+
+    def close(self):
+        self._flush()
+        if self.has_demand:
+            self._demand_file.seek(0)
+            while True:
+                chunk = self._demand_file.read(8 * CHUNK)
+                if not chunk:
+                    break
+                self._file.write(chunk)
+            self._demand_file.close()
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, FLAG_HAS_DEMAND if self.has_demand else 0, self.count))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def csv_to_trace(csv_path: str, trace_path: str, time_column: str = "timestamp",
+                 demand_column: Optional[str] = None, time_scale: float = 1.0) -> int:
+    """Конвертирует CSV с отсортированными по времени заказами в трассу; возвращает число записей."""
+    with open(csv_path, newline="") as source, \
+            ArrivalTraceWriter(trace_path, has_demand=demand_column is not None) as writer:
+        for row in csv.DictReader(source):
+            demand = row.get(demand_column) if demand_column else None
+            writer.append(float(row[time_column]) * time_scale,
+                          float(demand) * time_scale if demand not in (None, "") else None)
+        return writer.count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Конвертация CSV с заказами в трассу поступлений")
+    parser.add_argument("csv_path")
+    parser.add_argument("trace_path")
+    parser.add_argument("--time-column", default="timestamp")
+    parser.add_argument("--demand-column", default=None)
+    parser.add_argument("--time-scale", type=float, default=1.0,
+                        help="множитель перевода времени из CSV в модельное")
+    args = parser.parse_args(argv)
+    count = csv_to_trace(args.csv_path, args.trace_path, args.time_column, args.demand_column, args.time_scale)
+    print(f"Записано заявок: {count}")
+
+
+if __name__ == "__main__":
+    main()
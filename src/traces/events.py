@@ -0,0 +1,337 @@
+# src/traces/events.py
+"""
+Двоичная столбцовая трасса событий прогона вместо текстового журнала.
+
+Каждое событие - строка фиксированной ширины: время, код типа события, дескриптор
+заявки, источник и номер заявки, прибор, ячейка буфера, статус заявки после обработки
+(-1 - нет значения). Строки записываются по индексу в заранее выделенные типизированные
+массивы блока (без создания объектов на событие) и сбрасываются в файл столбцами,
+блоками по chunk_size строк:
+
+    заголовок: магия b"OSEVTRC\\0", версия, длина JSON-описания, JSON (типы событий, столбцы)
+    блок:      b"CHNK", число строк n, затем столбцы блока подряд (от широких к узким),
+               выравнивание до 8 байт
+
+Запись не бесплатна: на событие остаются чтение строки заявки и запись 5-8 полей на Python,
+поэтому прогон с трассой заметно медленнее (около +40% на миллионе событий при 8 источниках
+и 4 приборах). Для замеров скорости трасса не включается.
+
+Чтение - через mmap: блоки отдаются как memoryview без копирования.
+Анализ: python -m src.traces run.evt --order 1:42 --rejections 10
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from array import array
+from collections import Counter, deque
+from typing import Deque, Dict, Iterator, List, Optional, Set, Tuple
+
+from ..models.enums import EventType
+from ..models.task_table import STATUS_BY_CODE
+
+MAGIC = b"OSEVTRC\0"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+CHUNK_HEADER = struct.Struct("<4sI")
+CHUNK_MAGIC = b"CHNK"
+# Столбцы в порядке записи; широкие впереди, чтобы столбцы блока оставались выровненными
+COLUMNS = (("time", "d"), ("task", "q"), ("local_id", "q"), ("source_id", "i"),
+           ("device_id", "i"), ("slot", "i"), ("event", "b"), ("status", "b"))
+EVENT_TYPES = list(EventType)
+EVENT_CODES = {event_type: code for code, event_type in enumerate(EVENT_TYPES)}
+
+OrderKey = Tuple[int, int]  # (источник, номер заявки)
+
+
+def is_event_trace(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class EventTraceWriter:
+    """
+    Запись трассы прогона. После attach(dispatcher) метод run() диспетчера переходит
+    на цикл с записью событий; close() сбрасывает остаток и закрывает файл.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 1 << 16):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.count = 0
+        self.dispatcher = None
+        self._file = open(path, "wb")
+        description = json.dumps({"events": [et.name for et in EVENT_TYPES],
+                                  "columns": [list(column) for column in COLUMNS]}).encode()
+        description += b" " * (-(HEADER.size + len(description)) % 8)
+        self._file.write(HEADER.pack(MAGIC, VERSION, len(description)) + description)
+        # Столбцы текущего блока, выделенные один раз; перед каждым блоком заполняются -1,
+        # поэтому событие записывает только свои поля
+        self._empty = {code: array(code, [-1]) * chunk_size for _, code in COLUMNS}
+        self._columns = [array(code, self._empty[code]) for _, code in COLUMNS]
+        self._filled = 0  # Число строк текущего блока
+
+    def attach(self, dispatcher):
+        if dispatcher.profiler is not None:
+            raise RuntimeError("Event tracing and profiling cannot be combined in one run")
+        self.dispatcher = dispatcher
+        dispatcher.tracer = self
+        return self
+
+    def detach(self):
+        if self.dispatcher is not None:
+            self.dispatcher.tracer = None
+            self.dispatcher = None
+
+    def run(self, dispatcher, time_limit: float, completed_limit: float, events_limit: float,
+            check_time: bool) -> int:
+        """Вариант Dispatcher.run с записью каждого события после его обработки."""
+        calendar = dispatcher.event_calendar
+        # Обработчик и код события - одним поиском в словаре
+        handlers = {event_type: (handler, EVENT_CODES[event_type])
+                    for event_type, handler in dispatcher._handlers.items()}
+        buffer = dispatcher.buffer
+        tasks = dispatcher.tasks
+        source_ids, local_ids, statuses = tasks.source_id, tasks.local_id, tasks.status
+        pop = calendar.pop
+        size = self.chunk_size
+        calendar_size = dispatcher.calendar_size
+        times, task_col, local_col, source_col, device_col, slot_col, event_col, status_col = self._columns
+        row = self._filled
+
+        processed = 0
+        while processed < events_limit and dispatcher.completed_count < completed_limit:
+            if check_time and calendar and calendar.peek_time() > time_limit:
+                dispatcher.current_time = time_limit
+                break
+            try:
+                event_time, _, event_type, data = pop()
+            except IndexError:  # Календарь пуст
+                break
+            dispatcher.current_time = event_time
+            buffer.last_slot = -1
+            handler, code = handlers[event_type]
+            handler(data)
+            if calendar_size is not None:
+                calendar_size.update(event_time, len(calendar))
+
+            # Данные события: дескриптор, (дескриптор, прибор), (источник, остаток) или прибор.
+            # Строка таблицы читается после обработчика: освобожденная строка еще хранит данные
+            times[row] = event_time
+            event_col[row] = code
+            slot_col[row] = buffer.last_slot
+            kind = type(data)
+            if kind is int:
+                task_col[row] = data
+                local_col[row] = local_ids[data]
+                source_col[row] = source_ids[data]
+                status_col[row] = statuses[data]
+            elif kind is tuple:
+                handle = data[0]
+                if type(handle) is int:
+                    task_col[row] = handle
+                    local_col[row] = local_ids[handle]
+                    source_col[row] = source_ids[handle]
+                    device_col[row] = data[1].get_id()
+                    status_col[row] = statuses[handle]
+                else:  # Генерация: (источник, остаток)
+                    source_col[row] = handle.id
+            else:  # Освобождение прибора
+                device_col[row] = data.get_id()
+            row += 1
+            if row == size:
+                self._filled = row
+                self._flush()
+                row = 0
+            processed += 1
+        self._filled = row
+        return processed
+
+    def _flush(self):
+        n = self._filled
+        if not n:
+            return
+        f = self._file
+        f.write(CHUNK_HEADER.pack(CHUNK_MAGIC, n))
+        written = 0
+        for column in self._columns:
+            f.write(memoryview(column)[:n])
+            written += n * column.itemsize
+            # Следующий блок начинается с -1 во всех полях
+            column[:n] = self._empty[column.typecode][:n]
+        f.write(b"\0" * (-written % 8))
+        self.count += n
+        self._filled = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._flush()
+        self._file.close()
+        self.detach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventTrace:
+    """Чтение трассы событий через mmap; столбцы блоков - memoryview без копирования."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        if os.fstat(self._file.fileno()).st_size < HEADER.size:
+            raise ValueError(f"{path}: not an event trace")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, description_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not an event trace")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported event trace version {version}")
+        description = json.loads(bytes(self._mmap[HEADER.size:HEADER.size + description_size]))
+        self.event_names: List[str] = description["events"]
+        self.columns: List[Tuple[str, str]] = [tuple(column) for column in description["columns"]]
+        # Оглавление блоков: (смещение данных, число строк)
+        self._chunks: List[Tuple[int, int]] = []
+        offset = HEADER.size + description_size
+        size = len(self._mmap)
+        while offset + CHUNK_HEADER.size <= size:
+            magic, count = CHUNK_HEADER.unpack_from(self._mmap, offset)
+            if magic != CHUNK_MAGIC:
+                raise ValueError(f"{path}: corrupted chunk at offset {offset}")
+            offset += CHUNK_HEADER.size
+            self._chunks.append((offset, count))
+            width = sum(array(code).itemsize for _, code in self.columns) * count
+            offset += width + (-width % 8)
+        self.count = sum(count for _, count in self._chunks)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def chunks(self) -> Iterator[Dict[str, memoryview]]:
+        view = memoryview(self._mmap)
+        for offset, count in self._chunks:
+            columns = {}
+            for name, code in self.columns:
+                width = array(code).itemsize * count
+                columns[name] = view[offset:offset + width].cast(code)
+                offset += width
+            yield columns
+
+    def rows(self) -> Iterator[tuple]:
+        """Строки (время, событие, дескриптор, источник, номер заявки, прибор, ячейка, статус)."""
+        names = self.event_names
+        for chunk in self.chunks():
+            yield from zip(chunk["time"], (names[code] for code in chunk["event"]), chunk["task"],
+                           chunk["source_id"], chunk["local_id"], chunk["device_id"], chunk["slot"],
+                           chunk["status"])
+
+    def counts_by_event(self) -> Dict[str, int]:
+        counts = Counter()
+        for chunk in self.chunks():
+            counts.update(chunk["event"].tobytes())
+        return {self.event_names[code]: count for code, count in sorted(counts.items())}
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def order_timelines(trace: EventTrace, orders: Optional[Set[OrderKey]] = None,
+                    sources: Optional[Set[int]] = None) -> Dict[OrderKey, List[tuple]]:
+    """
+    Хронология заявок: (источник, номер) -> [(время, событие, прибор, ячейка, статус)].
+    Заглушки буфера (источник -1) не различимы между собой и пропускаются.
+    """
+    timelines: Dict[OrderKey, List[tuple]] = {}
+    for time, event, _, source, local, device, slot, status in trace.rows():
+        if local < 0 or source < 0:
+            continue
+        key = (source, local)
+        if orders is not None and key not in orders:
+            continue
+        if sources is not None and source not in sources:
+            continue
+        status_name = STATUS_BY_CODE[status].value if status >= 0 else None
+        timelines.setdefault(key, []).append((time, event, device if device >= 0 else None,
+                                              slot if slot >= 0 else None, status_name))
+    return timelines
+
+
+def rejection_causes(trace: EventTrace, limit: Optional[int] = None) -> List[dict]:
+    """
+    Причины отказов: какое поступление в полный буфер вытеснило какую заявку и из какой ячейки.
+    У каждого поступления ровно одно последующее событие того же момента - постановка в буфер
+    или вытеснение (при Д10О1 вытесняется заявка под указателем, при других дисциплинах
+    отказ может получить и сама поступившая). Такие события выполняются в порядке
+    поступлений, поэтому сопоставляются очередью.
+    """
+    arrive = trace.event_names.index(EventType.TASK_ARRIVES_AT_DISPATCHER.name)
+    entered = trace.event_names.index(EventType.TASK_ENTERED_BUFFER.name)
+    replaced = trace.event_names.index(EventType.TASK_REPLACED_IN_BUFFER.name)
+    arrivals: Deque[tuple] = deque()
+    causes = []
+    for chunk in trace.chunks():
+        events, handles = chunk["event"], chunk["task"]
+        for i in range(len(events)):
+            code = events[i]
+            if code == arrive:
+                arrivals.append((handles[i], chunk["source_id"][i], chunk["local_id"][i], chunk["slot"][i]))
+            elif code == entered:
+                if arrivals and arrivals[0][0] == handles[i]:
+                    arrivals.popleft()
+            elif code == replaced:
+                # Трасса могла начаться после поступления - тогда причина неизвестна
+                _, source, local, slot = arrivals.popleft() if arrivals else (-1, -1, -1, -1)
+                causes.append({
+                    "time": chunk["time"][i],
+                    "rejected": (chunk["source_id"][i], chunk["local_id"][i]),
+                    "slot": slot,
+                    "arriving": (source, local),
+                    "placeholder": chunk["source_id"][i] < 0,
+                })
+                if limit is not None and len(causes) >= limit:
+                    return causes
+    return causes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Анализ двоичной трассы событий прогона")
+    parser.add_argument("path")
+    parser.add_argument("--order", action="append", default=[],
+                        help="хронология заявки ИСТОЧНИК:НОМЕР (можно повторять)")
+    parser.add_argument("--rejections", type=int, default=0, help="показать первые N отказов с причинами")
+    args = parser.parse_args(argv)
+
+    with EventTrace(args.path) as trace:
+        print(f"Событий: {len(trace)}")
+        for name, count in trace.counts_by_event().items():
+            print(f"  {name}: {count}")
+        if args.order:
+            orders = {tuple(int(part) for part in spec.split(":")) for spec in args.order}
+            for key, timeline in sorted(order_timelines(trace, orders).items()):
+                print(f"Заявка {key[1]} источника {key[0]}:")
+                for time, event, device, slot, status in timeline:
+                    print(f"  {time:.4f} {event} прибор={device} ячейка={slot} статус={status}")
+        if args.rejections:
+            for cause in rejection_causes(trace, args.rejections):
+                victim = "заглушка" if cause["placeholder"] else f"заявка {cause['rejected']}"
+                print(f"  {cause['time']:.4f}: {victim} вытеснена из ячейки {cause['slot']} "
+                      f"поступлением {cause['arriving']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# tests/test_aggregate_source.py
+"""Агрегированный источник: статистика по исходным потокам и независимость от размера блока."""
+import math
+from dataclasses import replace
+
+import pytest
+
+from src import checkpoint
+from src.config import ModelConfig, build_model
+from src.experiments.replication import run_replications
+from src.experiments.sweep import run_point
+
+AGGREGATE = ModelConfig(num_sources=3, num_devices=2, buffer_size=5, generation_interval=2.0,
+                        arrival="poisson", tasks_per_source=2000, aggregate_sources=True)
+
+
+def _per_source(config: ModelConfig, seed: int = 1):
+    model = build_model(config, seed=seed)
+    model.dispatcher.run()
+    stats = model.dispatcher.stats
+    return {key: dict(sorted(stats[key].items())) for key in ("generated_by_source", "rejected_by_source")}
+
+
+@pytest.mark.parametrize("arrival", ["poisson", "erlang"])
+def test_results_do_not_depend_on_block_size(arrival):
+    config = replace(AGGREGATE, arrival=arrival)
+    expected = _per_source(replace(config, variate_block_size=4096))
+    for block_size in (1, 7, 256):
+        assert _per_source(replace(config, variate_block_size=block_size)) == expected
+
+
+def test_order_source_ids_are_the_aggregated_streams():
+    assert build_model(AGGREGATE, seed=1).order_source_ids == [1, 2, 3]
+    assert build_model(replace(AGGREGATE, aggregate_sources=False), seed=1).order_source_ids == [1, 2, 3]
+
+
+def test_replications_keep_per_source_statistics():
+    summary = run_replications(AGGREGATE, 4, workers=1)
+    assert sorted(summary.rejection_probability) == [1, 2, 3]
+    for source_id in (1, 2, 3):
+        assert summary.rejection_probability[source_id].n == 4
+        assert not math.isnan(summary.time_in_system[source_id].mean)
+    # Заявки распределены по потокам, общий лимит - tasks_per_source на поток
+    total = sum(sum(r.generated.values()) for r in summary.results)
+    assert total == 4 * 3 * AGGREGATE.tasks_per_source
+
+
+def test_sweep_point_counts_aggregated_orders():
+    result = run_point(AGGREGATE, seed=0)
+    plain = run_point(replace(AGGREGATE, aggregate_sources=False), seed=0)
+    assert result.generated == plain.generated == 3 * AGGREGATE.tasks_per_source
+    assert 0.0 < result.rejection_probability < 1.0
+    assert result.rejection_probability == pytest.approx(plain.rejection_probability, abs=0.03)
+
+
+def test_checkpoint_round_trip_continues_identically():
+    config = replace(AGGREGATE, tasks_per_source=10 ** 6)
+    model = build_model(config, seed=2)
+    model.dispatcher.run(max_events=3000)
+    restored = checkpoint.restore(build_model(config, seed=2), checkpoint.snapshot(model))
+    model.dispatcher.run(max_events=3000)
+    restored.dispatcher.run(max_events=3000)
+    assert dict(restored.dispatcher.stats["generated_by_source"]) == dict(model.dispatcher.stats["generated_by_source"])
+    assert restored.dispatcher.current_time == model.dispatcher.current_time
@@ -0,0 +1,46 @@
+# tests/test_checkpoint.py
+"""Состояние модели в памяти не связано с моделью, из которой оно снято, и с продолжениями из него."""
+from src import checkpoint
+from src.config import ModelConfig, build_model
+
+CONFIG = ModelConfig(num_sources=3, num_devices=2, buffer_size=5, generation_interval=1.0,
+                     arrival="poisson", tasks_per_source=10 ** 6)
+
+
+def _completed(state: dict) -> int:
+    return sum(state["dispatcher"]["stats"]["completed_by_source"].values())
+
+
+def test_state_does_not_follow_running_model():
+    model = build_model(CONFIG, seed=1)
+    model.dispatcher.run(max_events=500)
+    state = checkpoint.model_state(model)
+    completed = _completed(state)
+    model.dispatcher.run(max_events=500)
+    assert _completed(state) == completed
+    assert model.dispatcher.completed_count > completed
+
+
+def test_restored_models_do_not_share_stats():
+    model = build_model(CONFIG, seed=1)
+    model.dispatcher.run(max_events=500)
+    state = checkpoint.model_state(model)
+    first = checkpoint.restore_model_state(build_model(CONFIG, seed=1), state)
+    second = checkpoint.restore_model_state(build_model(CONFIG, seed=1), state)
+    assert first.dispatcher.stats is not second.dispatcher.stats
+    first.dispatcher.run(max_events=500)
+    assert second.dispatcher.stats["completed_by_source"] == model.dispatcher.stats["completed_by_source"]
+    second.dispatcher.run(max_events=500)
+    # Одинаковое состояние и генераторы - одинаковое продолжение
+    assert _completed(checkpoint.model_state(first)) == _completed(checkpoint.model_state(second))
+
+
+def test_in_memory_and_pickled_continuations_agree():
+    model = build_model(CONFIG, seed=2)
+    model.dispatcher.run(max_events=300)
+    data = checkpoint.snapshot(model)
+    restored = checkpoint.restore(build_model(CONFIG, seed=2), data)
+    model.dispatcher.run(max_events=1000)
+    restored.dispatcher.run(max_events=1000)
+    assert restored.dispatcher.current_time == model.dispatcher.current_time
+    assert restored.dispatcher.stats["completed_by_source"] == model.dispatcher.stats["completed_by_source"]
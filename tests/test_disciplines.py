@@ -0,0 +1,218 @@
+# tests/test_disciplines.py
+"""
+Дисциплины QueueBuffer и PriorityBuffer против простых эталонов на списках (полный проход
+на каждую операцию) и их поведение в модели.
+"""
+import random
+from typing import List, Optional
+
+import pytest
+
+from src.components import BUFFER_DISCIPLINES, PriorityBuffer, QueueBuffer, create_buffer
+from src.config import ModelConfig, build_model
+from src.models.task_table import STATUS_ASSIGNED, STATUS_BUFFERED, TaskTable
+
+
+class _ReferenceQueue:
+    """Список от самой старой заявки к самой новой."""
+
+    def __init__(self, max_size: int, selection: str, replacement: str):
+        self.max_size, self.selection, self.replacement = max_size, selection, replacement
+        self.items: List[int] = []
+        self.sources: dict = {}
+
+    def enqueue(self, task: int) -> bool:
+        if len(self.items) == self.max_size:
+            return False
+        self.items.append(task)
+        return True
+
+    def dequeue(self) -> Optional[int]:
+        if not self.items:
+            return None
+        return self.items.pop(0) if self.selection == "fifo" else self.items.pop()
+
+    def reject(self, task: Optional[int]) -> Optional[int]:
+        if task is not None and (self.replacement == "newest" or not self.items):
+            return task
+        if not self.items:
+            return None
+        rejected = self.items.pop(0) if self.replacement == "oldest" else self.items.pop()
+        if task is not None:
+            self.items.append(task)
+        return rejected
+
+
+class _ReferencePriority:
+    """Список в порядке поступления; источник заявки - ее приоритет (меньше - выше)."""
+
+    def __init__(self, max_size: int, packet: bool, sources: dict):
+        self.max_size, self.packet, self.sources = max_size, packet, sources
+        self.items: List[int] = []
+        self.packet_source: Optional[int] = None
+
+    def enqueue(self, task: int) -> bool:
+        if len(self.items) == self.max_size:
+            return False
+        self.items.append(task)
+        return True
+
+    def dequeue(self) -> Optional[int]:
+        if not self.items:
+            return None
+        source = self.packet_source
+        if source is None or not any(self.sources[t] == source for t in self.items):
+            source = min(self.sources[t] for t in self.items)
+            if self.packet:
+                self.packet_source = source
+        task = next(t for t in self.items if self.sources[t] == source)
+        self.items.remove(task)
+        return task
+
+    def reject(self, task: Optional[int]) -> Optional[int]:
+        lowest = max((self.sources[t] for t in self.items), default=None)
+        if task is not None and (lowest is None or self.sources[task] >= lowest):
+            return task
+        if lowest is None:
+            return None
+        rejected = [t for t in self.items if self.sources[t] == lowest][-1]
+        self.items.remove(rejected)
+        if task is not None:
+            self.items.append(task)
+        return rejected
+
+
+def _contents(buffer) -> List[int]:
+    if isinstance(buffer, QueueBuffer):
+        return list(buffer.queue)
+    return sorted(task for queue in buffer.queues.values() for task in queue)
+
+
+def _replay(buffer, reference, table: TaskTable, rng: random.Random, sort_contents: bool):
+    now = 0.0
+    for step in range(1500):
+        now += rng.choice([0.0, 0.5, 1.0])
+        operation = rng.random()
+        if operation < 0.55:
+            task = table.create(step, rng.randint(1, 4), now)
+            reference.sources[task] = table.source_id[task]
+            if buffer.is_full():
+                # Как в диспетчере: поступление в полный буфер решается дисциплиной
+                rejected = buffer.apply_replacement_policy(now, task)
+                assert rejected == reference.reject(task)
+                assert table.status[rejected] == STATUS_ASSIGNED
+                assert table.time_completed[rejected] == now
+            else:
+                assert buffer.enqueue(task, now) == reference.enqueue(task)
+                assert table.status[task] == STATUS_BUFFERED
+        elif operation < 0.6:
+            # Вытеснение без поступившей заявки
+            rejected = buffer.apply_replacement_policy(now)
+            assert rejected == reference.reject(None)
+            if rejected is not None:
+                assert table.status[rejected] == STATUS_ASSIGNED
+        else:
+            taken = buffer.dequeue(now)
+            assert taken == reference.dequeue()
+            if taken is not None:
+                assert table.time_left_buffer[taken] == now
+        expected = sorted(reference.items) if sort_contents else reference.items
+        assert _contents(buffer) == expected
+        assert buffer.count == len(reference.items)
+        assert buffer.is_full() == (len(reference.items) == buffer.max_size)
+        assert buffer.is_empty() == (not reference.items)
+
+
+@pytest.mark.parametrize("selection", ["fifo", "lifo"])
+@pytest.mark.parametrize("replacement", ["newest", "oldest"])
+@pytest.mark.parametrize("size", [1, 2, 5, 40])
+def test_queue_buffer_matches_reference(selection, replacement, size):
+    table = TaskTable()
+    _replay(QueueBuffer(size, selection, replacement, task_table=table), _ReferenceQueue(size, selection, replacement),
+            table, random.Random(size), sort_contents=False)
+
+
+@pytest.mark.parametrize("packet", [False, True])
+@pytest.mark.parametrize("size", [1, 2, 5, 40])
+def test_priority_buffer_matches_reference(packet, size):
+    table = TaskTable()
+    _replay(PriorityBuffer(size, packet=packet, task_table=table), _ReferencePriority(size, packet, {}), table,
+            random.Random(size + 100), sort_contents=True)
+
+
+def test_fifo_and_lifo_selection_order():
+    table = TaskTable()
+    fifo, lifo = QueueBuffer(3, "fifo", task_table=table), QueueBuffer(3, "lifo", task_table=table)
+    handles = [table.create(i, 1, float(i)) for i in range(3)]
+    for handle in handles:
+        fifo.enqueue(handle, 0.0)
+        lifo.enqueue(handle, 0.0)
+    assert [fifo.dequeue(1.0) for _ in range(3)] == handles
+    assert [lifo.dequeue(1.0) for _ in range(3)] == handles[::-1]
+
+
+def test_priority_packet_serves_source_until_empty():
+    table = TaskTable()
+    plain, packet = PriorityBuffer(10, task_table=table), PriorityBuffer(10, packet=True, task_table=table)
+    two = [table.create(i, 2, 0.0) for i in range(2)]
+    for buffer in (plain, packet):
+        for handle in two:
+            buffer.enqueue(handle, 0.0)
+    assert plain.dequeue(1.0) == two[0] and packet.dequeue(1.0) == two[0]
+    # Пришла заявка более приоритетного источника: обычный выбор берет ее, пакетный дорабатывает источник 2
+    one = table.create(9, 1, 1.0)
+    plain.enqueue(one, 1.0)
+    packet.enqueue(one, 1.0)
+    assert plain.dequeue(2.0) == one
+    assert packet.dequeue(2.0) == two[1]
+    assert packet.dequeue(3.0) == one
+
+
+def test_priority_rejects_lowest_priority_including_arrival():
+    table = TaskTable()
+    buffer = PriorityBuffer(2, task_table=table)
+    low, high = table.create(1, 3, 0.0), table.create(2, 1, 0.0)
+    buffer.enqueue(low, 0.0)
+    buffer.enqueue(high, 0.0)
+    arriving_low = table.create(3, 4, 1.0)
+    assert buffer.apply_replacement_policy(1.0, arriving_low) == arriving_low
+    arriving_high = table.create(4, 2, 1.0)
+    assert buffer.apply_replacement_policy(1.0, arriving_high) == low
+    assert _contents(buffer) == sorted([high, arriving_high])
+
+
+@pytest.mark.parametrize("discipline", sorted(BUFFER_DISCIPLINES))
+def test_model_conserves_orders(discipline):
+    config = ModelConfig(num_sources=3, num_devices=2, buffer_size=4, generation_interval=1.0, arrival="poisson",
+                         tasks_per_source=3000, buffer_discipline=discipline)
+    model = build_model(config, seed=1)
+    model.dispatcher.run()
+    stats = model.dispatcher.stats
+    real = [1, 2, 3]
+    generated = sum(stats["generated_by_source"][sid] for sid in real)
+    rejected = sum(stats["rejected_by_source"][sid] for sid in real)
+    completed = sum(stats["completed_by_source"][sid] for sid in real)
+    assert generated == 9000
+    assert rejected > 0
+    if discipline == "ring":
+        # Заглушки кольца занимают места вытесненных, часть обслуженных - заглушки
+        assert completed + rejected <= generated
+    else:
+        assert completed + rejected == generated
+        assert len(model.dispatcher.tasks) == 0
+
+
+def test_priority_favours_high_priority_sources():
+    config = ModelConfig(num_sources=3, num_devices=1, buffer_size=5, generation_interval=2.0, arrival="poisson",
+                         tasks_per_source=5000, buffer_discipline="priority")
+    dispatcher = build_model(config, seed=2).dispatcher
+    dispatcher.run()
+    rejected = dispatcher.stats["rejected_by_source"]
+    assert rejected[1] < rejected[2] < rejected[3]
+
+
+def test_unknown_discipline():
+    with pytest.raises(NotImplementedError):
+        create_buffer("random", 3)
+    with pytest.raises(NotImplementedError):
+        QueueBuffer(3, selection="random")
@@ -0,0 +1,72 @@
+# tests/test_event_calendar.py
+"""Все структуры календаря событий выдают события в том же порядке, что и единая двоичная куча."""
+import heapq
+import random
+
+import pytest
+
+from src.components.event_calendar import EVENT_CALENDARS, FutureEventList, create_event_calendar
+
+KINDS = sorted(EVENT_CALENDARS)
+
+
+def _next_time(rng: random.Random, now: float) -> float:
+    mode = rng.random()
+    if mode < 0.3:
+        return now  # Нулевая задержка - событие попадает в FIFO-полосу
+    if mode < 0.55:
+        return now + rng.expovariate(1.0)
+    if mode < 0.8:
+        return now + rng.choice([0.5, 1.0, 2.0, 3.0])  # Совпадающие моменты времени
+    return now + rng.uniform(0.0, 1000.0) * rng.random() ** 3  # Редкие далекие события
+
+
+@pytest.mark.parametrize("kind", KINDS)
+@pytest.mark.parametrize("seed", range(6))
+def test_future_event_list_matches_heapq(kind, seed):
+    rng = random.Random(seed)
+    events, reference = FutureEventList(kind), []
+    counter = 0
+    now = 0.0
+    for _ in range(rng.choice([200, 5000, 20000])):
+        if reference and rng.random() < 0.48:
+            expected = heapq.heappop(reference)
+            assert events.pop() == expected
+            now = expected[0]
+            if reference:
+                assert events.peek() == reference[0]
+        else:
+            entry = (_next_time(rng, now), counter, None, None)
+            counter += 1
+            events.push(entry)
+            heapq.heappush(reference, entry)
+        assert len(events) == len(reference)
+    while reference:
+        assert events.pop() == heapq.heappop(reference)
+    assert len(events) == 0
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_backend_matches_heapq(kind):
+    rng = random.Random(7)
+    calendar, reference = create_event_calendar(kind), []
+    counter = 0
+    now = 0.0
+    for _ in range(20000):
+        if reference and rng.random() < 0.5:
+            expected = heapq.heappop(reference)
+            assert calendar.pop() == expected
+            now = expected[0]
+        else:
+            entry = (_next_time(rng, now), counter, None, None)
+            counter += 1
+            calendar.push(entry)
+            heapq.heappush(reference, entry)
+    assert sorted(calendar.entries()) == sorted(reference)
+    while reference:
+        assert calendar.pop() == heapq.heappop(reference)
+
+
+def test_unknown_backend():
+    with pytest.raises(NotImplementedError):
+        FutureEventList("splay")
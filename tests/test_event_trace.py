@@ -0,0 +1,77 @@
+# tests/test_event_trace.py
+"""Трасса событий: запись и чтение дают те же события, хронологии заявок не путаются при переиспользовании строк."""
+from collections import Counter
+
+import pytest
+
+from src.config import ModelConfig, build_model
+from src.models.enums import EventType
+from src.traces.events import EventTrace, EventTraceWriter, order_timelines, rejection_causes
+
+CONFIG = ModelConfig(num_sources=3, num_devices=2, buffer_size=4, generation_interval=1.0, arrival="poisson",
+                     tasks_per_source=10 ** 9)
+
+
+@pytest.fixture
+def traced_run(tmp_path):
+    """Прогон с трассой (маленькие блоки, несколько вызовов run) и журнал событий, снятый обработчиками."""
+    dispatcher = build_model(CONFIG, seed=4).dispatcher
+    journal = []
+    tasks = dispatcher.tasks
+
+    def logged(event_type, handler):
+        def wrapper(data):
+            handle = data if type(data) is int else data[0] if type(data) is tuple else None
+            key = (tasks.source_id[handle], tasks.local_id[handle]) if type(handle) is int else None
+            handler(data)
+            journal.append((dispatcher.current_time, event_type.name, key))
+        return wrapper
+
+    dispatcher._handlers = {et: logged(et, h) for et, h in dispatcher._handlers.items()}
+    path = str(tmp_path / "run.evt")
+    writer = EventTraceWriter(path, chunk_size=97).attach(dispatcher)
+    processed = dispatcher.run(max_events=2000) + dispatcher.run(max_events=1234)
+    writer.close()
+    return path, processed, journal, dispatcher
+
+
+def test_round_trip_preserves_events(traced_run):
+    path, processed, journal, _ = traced_run
+    with EventTrace(path) as trace:
+        assert len(trace) == processed == len(journal)
+        rows = list(trace.rows())
+    for row, (time, event, key) in zip(rows, journal):
+        assert row[0] == time and row[1] == event
+        if key is not None:
+            assert (row[3], row[4]) == key
+
+
+def test_handles_are_reused_but_timelines_stay_separate(traced_run):
+    path, _, journal, dispatcher = traced_run
+    with EventTrace(path) as trace:
+        handles = Counter(handle for _, event, handle, *_ in trace.rows()
+                          if event == EventType.TASK_ARRIVES_AT_DISPATCHER.name)
+        timelines = order_timelines(trace)
+    # Строк таблицы намного меньше, чем заявок, - одни и те же дескрипторы у разных заявок
+    assert max(handles.values()) > 10
+    expected = {}
+    for time, event, key in journal:
+        if key is not None and key[0] >= 0:
+            expected.setdefault(key, []).append((time, event))
+    assert {key: [(t, e) for t, e, *_ in timeline] for key, timeline in timelines.items()} == expected
+    for key, timeline in timelines.items():
+        events = [event for _, event, *_ in timeline]
+        assert events[0] == EventType.TASK_ARRIVES_AT_DISPATCHER.name
+        assert events.count(EventType.TASK_ARRIVES_AT_DISPATCHER.name) == 1
+        assert events.count(EventType.TASK_COMPLETED_BY_DEVICE.name) <= 1
+    completed = sum(1 for timeline in timelines.values()
+                    if timeline[-1][1] == EventType.TASK_COMPLETED_BY_DEVICE.name)
+    assert completed == sum(v for sid, v in dispatcher.stats["completed_by_source"].items() if sid >= 0)
+
+
+def test_rejection_causes_match_rejections(traced_run):
+    path, _, _, dispatcher = traced_run
+    with EventTrace(path) as trace:
+        causes = rejection_causes(trace)
+    assert len(causes) == sum(dispatcher.stats["rejected_by_source"].values())
+    assert all(cause["arriving"][0] > 0 for cause in causes)
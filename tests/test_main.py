@@ -0,0 +1,25 @@
+# tests/test_main.py
+"""Разбор аргументов командной строки модели: инструменты прогона требуют пакетного режима."""
+import pytest
+
+from src.main import main, parse_args
+
+
+@pytest.mark.parametrize("argv", [["--profile"], ["--event-trace", "run.trace"], ["--batch", "--profile-stacks", "s"],
+                                  ["--batch", "--profile", "--event-trace", "run.trace"]])
+def test_rejects_instrumentation_without_batch(argv, capsys):
+    with pytest.raises(SystemExit) as error:
+        parse_args(argv)
+    assert error.value.code == 2
+    assert "--" in capsys.readouterr().err
+
+
+def test_accepts_instrumentation_with_batch():
+    assert parse_args(["--batch", "--profile", "--profile-stacks", "s"]).profile
+    assert parse_args(["--batch", "--event-trace", "run.trace"]).event_trace == "run.trace"
+
+
+def test_batch_event_trace_written(tmp_path):
+    path = tmp_path / "run.trace"
+    main(["--batch", "--tasks-per-source", "50", "--seed", "1", "--event-trace", str(path)])
+    assert path.stat().st_size > 0
@@ -0,0 +1,44 @@
+# tests/test_sequential.py
+"""Последовательная остановка оценивает время только по обслуженным заявкам."""
+import pytest
+
+from src.config import ModelConfig, build_model
+from src.experiments.sequential import UNLIMITED_TASKS, _Series, mser_truncation, run_until_precision
+
+# Буфер мал, поэтому много заявок вытесняется: время вытесненных не должно попадать в среднее
+LOSSY = ModelConfig(num_devices=1, buffer_size=3, generation_interval=0.8, arrival="poisson",
+                    tasks_per_source=UNLIMITED_TASKS)
+
+
+def _completed_mean(stats, key):
+    summaries = [s for sid, s in stats[key].items() if sid >= 0]
+    return sum(s.mean * s.count for s in summaries) / sum(s.count for s in summaries)
+
+
+@pytest.mark.parametrize("metric, key", [("system_time", "system_times"), ("wait_time", "wait_times")])
+def test_series_sums_match_completed_orders(metric, key):
+    model = build_model(LOSSY, seed=1)
+    series = _Series(model.dispatcher, metric)
+    for _ in range(50):
+        model.dispatcher.run(max_completed=model.dispatcher.completed_count + 100)
+        series.record(model.dispatcher)
+    stats = model.dispatcher.stats
+    assert sum(series.denominators) == sum(s.count for sid, s in stats[key].items() if sid >= 0)
+    assert sum(series.numerators) / sum(series.denominators) == pytest.approx(_completed_mean(stats, key))
+
+
+def test_estimate_matches_completed_only_mean():
+    model = build_model(LOSSY, seed=1)
+    result = run_until_precision(model, ["rejection", "system_time", "wait_time"], precision=0.02)
+    assert result.converged
+    stats = model.dispatcher.stats
+    assert sum(stats["rejected_by_source"].values()) > 0.1 * sum(stats["generated_by_source"].values())
+    for metric, key in (("system_time", "system_times"), ("wait_time", "wait_times")):
+        estimate = result.estimates[metric]
+        # Разгон отброшен, поэтому допуск - полуширина интервала с запасом
+        assert abs(estimate.mean - _completed_mean(stats, key)) <= 3 * estimate.half_width
+
+
+def test_mser_truncates_initial_transient():
+    values = [10.0, 8.0, 6.0, 4.0] + [1.0, 1.2, 0.8, 1.1, 0.9] * 10
+    assert 3 <= mser_truncation(values) <= 5
@@ -0,0 +1,69 @@
+# tests/test_splitting.py
+"""
+Многоуровневое расщепление: оценка вероятности переполнения против точного решения M/M/c/K
+и текст отчета о выигрыше.
+"""
+import math
+
+import pytest
+
+from src.analytics.queueing import estimate
+from src.config import ModelConfig
+from src.experiments.splitting import SplittingResult, SplittingRun, default_levels, run_splitting
+
+MM1 = ModelConfig(num_devices=1, buffer_size=3, generation_interval=4.0, arrival="poisson",
+                  service_distribution="exponential", buffer_discipline="fifo_reject_newest")
+
+
+def test_estimate_matches_mmck():
+    # ρ = 0.5, K = 4: P(отказ) = (1 - ρ) ρ^4 / (1 - ρ^5)
+    exact = estimate(MM1).rejection_probability
+    assert exact == pytest.approx(0.5 * 0.5 ** 4 / (1 - 0.5 ** 5))
+    result = run_splitting(MM1, repetitions=6, workers=1, effort=200, crude_events=20_000, warmup_events=1000)
+    assert len(result.runs) == 6
+    assert abs(result.mean - exact) <= max(result.half_width, 0.2 * exact)
+    for run in result.runs:
+        assert len(run.level_probabilities) == 2
+        assert run.estimate == pytest.approx(run.excursions_per_order * math.prod(run.level_probabilities)
+                                             * run.overflows_per_entry)
+        assert run.truncated == 0
+
+
+def test_repetitions_are_reproducible():
+    options = dict(repetitions=2, workers=1, effort=50, crude_events=5000, warmup_events=500, seed=3)
+    first, second = run_splitting(MM1, **options), run_splitting(MM1, **options)
+    assert [run.estimate for run in first.runs] == [run.estimate for run in second.runs]
+
+
+def test_levels_validation():
+    assert default_levels(4, lower=1) == [2, 3, 4]
+    for levels in ([1, 2], [2, 1, 3], [0, 3]):
+        with pytest.raises(ValueError):
+            run_splitting(MM1, levels, repetitions=1, workers=1)
+
+
+def _result(mean, half_width, events, crude_events=1000, orders=500):
+    run = SplittingRun(estimate=mean, excursions_per_order=0.5, level_probabilities=[0.1, 0.2],
+                       overflows_per_entry=1.0, orders=orders, crude_events=crude_events, events=events)
+    return SplittingResult(MM1, [1, 2, 3], 0, 100, 0.95, mean, half_width, [run])
+
+
+def test_report_states_gain():
+    result = _result(1e-5, 1e-6, events=10_000)
+    needed = result.crude_events_needed()
+    assert needed > result.events
+    assert f"(в {needed / result.events:,.1f} раза больше)" in result.report()
+
+
+def test_report_without_gain():
+    # Вероятность не мала: обычному прогону хватило бы меньше событий, чем потратило расщепление
+    result = _result(0.1, 0.05, events=200_000)
+    assert result.crude_events_needed() < result.events
+    report = result.report()
+    assert "раза больше" not in report
+    assert "Выигрыша нет" in report
+
+
+def test_report_without_interval():
+    report = _result(0.0, 0.0, events=1000).report()
+    assert "раза больше" not in report and "Выигрыша нет" not in report
@@ -0,0 +1,179 @@
+# tests/test_streaming.py
+"""
+Потоковые накопители: квантили t-digest против точных по отсортированной выборке,
+объединение (merge) против накопителя по всей выборке, гистограмма с расширением диапазона.
+"""
+import math
+import random
+from collections import defaultdict
+
+import pytest
+
+from src.metrics import Histogram, RunningMoments, StreamingSummary, TDigest, copy_stats, merge_stats
+
+QUANTILES = (0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99)
+
+
+def _exact_quantile(values, q):
+    ordered = sorted(values)
+    position = q * (len(ordered) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (position - lower) * (ordered[upper] - ordered[lower])
+
+
+def _exponential(seed, n, mean=3.0):
+    rng = random.Random(seed)
+    return [rng.expovariate(1 / mean) for _ in range(n)]
+
+
+def _rank_error(values, estimate, q):
+    """Ошибка квантиля в долях ранга: t-digest гарантирует именно ее, а не абсолютную."""
+    return abs(sum(1 for v in values if v <= estimate) / len(values) - q)
+
+
+@pytest.mark.parametrize("distribution", ["exponential", "uniform", "lognormal"])
+def test_tdigest_quantiles_match_exact(distribution):
+    rng = random.Random(1)
+    sample = {"exponential": lambda: rng.expovariate(0.5), "uniform": lambda: rng.uniform(2.0, 7.0),
+              "lognormal": lambda: rng.lognormvariate(0.0, 1.0)}[distribution]
+    values = [sample() for _ in range(50_000)]
+    digest = TDigest()
+    for value in values:
+        digest.add(value)
+    assert digest.count == len(values)
+    assert digest.centroid_count <= digest.compression
+    for q in QUANTILES:
+        # Хвостовые квантили точнее средних: размер центроида ~ q(1-q)
+        assert _rank_error(values, digest.quantile(q), q) <= 0.003 + 0.02 * q * (1 - q)
+        assert digest.quantile(q) == pytest.approx(_exact_quantile(values, q), rel=0.03, abs=0.01)
+    assert digest.quantile(0.0) == min(values)
+    assert digest.quantile(1.0) == max(values)
+
+
+def test_tdigest_merge_matches_single_digest():
+    parts = [_exponential(seed, n) for seed, n in enumerate([30_000, 7, 1000, 12_000, 0])]
+    merged = TDigest()
+    for part in parts:
+        digest = TDigest()
+        for value in part:
+            digest.add(value)
+        merged.merge(digest)
+    values = [v for part in parts for v in part]
+    assert merged.count == len(values)
+    assert (merged.min, merged.max) == (min(values), max(values))
+    for q in QUANTILES:
+        assert _rank_error(values, merged.quantile(q), q) <= 0.003 + 0.02 * q * (1 - q)
+
+
+def test_tdigest_small_and_empty():
+    digest = TDigest()
+    assert math.isnan(digest.quantile(0.5))
+    for value in (4.0, 1.0, 3.0, 2.0):
+        digest.add(value)
+    # Меньше буфера: каждое значение - свой центроид, квантили - интерполяция по рангу
+    assert digest.quantile(0.0) == 1.0
+    assert digest.quantile(0.5) == pytest.approx(2.5)
+    assert digest.quantile(1.0) == 4.0
+
+
+def test_running_moments_merge_matches_single_pass():
+    values = _exponential(2, 5000)
+    whole, left, right = RunningMoments(), RunningMoments(), RunningMoments()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i < 1234 else right).add(value)
+    left.merge(right)
+    mean = sum(values) / len(values)
+    assert left.count == whole.count == len(values)
+    assert left.mean == pytest.approx(mean, rel=1e-12)
+    assert left.variance == pytest.approx(sum((v - mean) ** 2 for v in values) / (len(values) - 1), rel=1e-9)
+    assert (left.min, left.max) == (min(values), max(values))
+
+
+def test_histogram_counts_bins():
+    histogram = Histogram(0.0, 10.0, 10)
+    for value in (-1.0, 0.0, 0.5, 9.99, 3.0, 3.7):
+        histogram.add(value)
+    assert histogram.underflow == 1
+    assert list(histogram.counts) == [2, 0, 0, 2, 0, 0, 0, 0, 0, 1]
+    assert histogram.bin_edges()[:3] == [0.0, 1.0, 2.0]
+
+
+def test_histogram_grows_instead_of_clipping():
+    values = _exponential(3, 20_000, mean=40.0)  # Заметная доля значений больше 100
+    histogram = Histogram()
+    for value in values:
+        histogram.add(value)
+    assert histogram.high > max(values)
+    assert histogram.overflow == 0
+    assert sum(histogram.counts) == len(values)
+    edges = histogram.bin_edges()
+    expected = [0] * histogram.bins
+    for value in values:
+        expected[int(value / histogram.width)] += 1
+    assert list(histogram.counts) == expected
+    assert edges[-1] == pytest.approx(histogram.high)
+
+
+def test_histogram_merge_aligns_grown_ranges():
+    narrow, wide, reference = Histogram(), Histogram(), Histogram()
+    for value in _exponential(4, 3000, mean=10.0):
+        narrow.add(value)
+        reference.add(value)
+    for value in _exponential(5, 3000, mean=200.0):
+        wide.add(value)
+        reference.add(value)
+    assert narrow.high < wide.high
+    merged = narrow.copy()
+    merged.merge(wide)
+    other_way = wide.copy()
+    other_way.merge(narrow)
+    for histogram in (merged, other_way):
+        assert histogram.high == reference.high
+        assert list(histogram.counts) == list(reference.counts)
+    assert narrow.high < wide.high  # Копия narrow при слиянии не изменилась
+    with pytest.raises(ValueError):
+        Histogram(0.0, 100.0, 200).merge(Histogram(0.0, 30.0, 200))
+
+
+def test_summary_merge_and_copy():
+    left_values, right_values = _exponential(6, 4000), _exponential(7, 6000, mean=150.0)
+    left, right, whole = StreamingSummary(), StreamingSummary(), StreamingSummary()
+    for value in left_values:
+        left.add(value)
+        whole.add(value)
+    for value in right_values:
+        right.add(value)
+        whole.add(value)
+    snapshot = left.copy()
+    left.merge(right)
+    values = left_values + right_values
+    assert left.count == len(values)
+    assert left.mean == pytest.approx(whole.mean, rel=1e-12)
+    assert list(left.histogram.counts) == list(whole.histogram.counts)
+    for q in QUANTILES:
+        assert _rank_error(values, left.quantile(q), q) <= 0.003 + 0.02 * q * (1 - q)
+    # Копия не зависит от оригинала
+    assert snapshot.count == len(left_values)
+    assert snapshot.quantile(0.5) == pytest.approx(_exact_quantile(left_values, 0.5), rel=0.03)
+
+
+def test_merge_and_copy_stats():
+    def stats(values):
+        result = {"generated_by_source": defaultdict(int), "system_times": defaultdict(StreamingSummary)}
+        for source_id, value in values:
+            result["generated_by_source"][source_id] += 1
+            result["system_times"][source_id].add(value)
+        return result
+
+    first, second = stats([(1, 1.0), (2, 5.0)]), stats([(1, 3.0), (3, 250.0)])
+    copied = copy_stats(first)
+    merged = merge_stats(copy_stats(first), second)
+    assert dict(merged["generated_by_source"]) == {1: 2, 2: 1, 3: 1}
+    assert merged["system_times"][1].mean == 2.0
+    assert merged["system_times"][3].histogram.high > 250.0
+    # Источник 3 скопирован, а не разделен с second
+    assert merged["system_times"][3] is not second["system_times"][3]
+    assert copied["system_times"][1].count == first["system_times"][1].count == 1
+    assert copied["generated_by_source"][4] == 0  # Фабрика defaultdict сохранена
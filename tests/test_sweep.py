@@ -0,0 +1,93 @@
+# tests/test_sweep.py
+"""
+Разбор сетки перебора (parse_grid, expand_grid) и аналитические значения M/M/c/K,
+по которым перебор отсеивает точки.
+"""
+import math
+
+import pytest
+
+from src.analytics.queueing import estimate, mgck, mmck
+from src.config import ModelConfig
+from src.experiments.sweep import expand_grid, parse_grid
+
+
+def test_parse_grid_types():
+    grid = parse_grid(["num-devices=1,2, 3", "generation_interval=0.5,2", "arrival=poisson,fixed"])
+    assert grid == {"num_devices": [1, 2, 3], "generation_interval": [0.5, 2.0], "arrival": ["poisson", "fixed"]}
+    assert all(isinstance(v, int) for v in grid["num_devices"])
+    assert all(isinstance(v, float) for v in grid["generation_interval"])
+
+
+@pytest.mark.parametrize("text, value", [("True", True), ("false", False), ("1", True), ("0", False),
+                                         ("yes", True), ("No", False)])
+def test_parse_grid_booleans(text, value):
+    assert parse_grid([f"aggregate_sources={text}"]) == {"aggregate_sources": [value]}
+
+
+@pytest.mark.parametrize("spec", ["aggregate_sources=maybe", "unknown=1", "num_devices=", "num_devices=two"])
+def test_parse_grid_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_grid([spec])
+
+
+def test_expand_grid():
+    configs = expand_grid(ModelConfig(buffer_size=7), parse_grid(["num_devices=1,2", "service_per_order=false,true"]))
+    assert [(c.num_devices, c.service_per_order) for c in configs] == [(1, False), (1, True), (2, False), (2, True)]
+    assert all(c.buffer_size == 7 for c in configs)
+    with pytest.raises(ValueError):
+        expand_grid(ModelConfig(), {"unknown": [1]})
+
+
+@pytest.mark.parametrize("rho", [0.3, 1.0, 1.7])
+@pytest.mark.parametrize("capacity", [1, 4, 10])
+def test_mm1k_closed_form(rho, capacity):
+    result = mmck(rho, 1.0, 1, capacity)
+    if rho == 1.0:
+        probabilities = [1.0 / (capacity + 1)] * (capacity + 1)
+    else:
+        probabilities = [(1 - rho) * rho ** n / (1 - rho ** (capacity + 1)) for n in range(capacity + 1)]
+    mean_in_system = sum(n * p for n, p in enumerate(probabilities))
+    throughput = rho * (1 - probabilities[-1])
+    assert result.exact
+    assert result.rejection_probability == pytest.approx(probabilities[-1], rel=1e-12)
+    assert result.utilization == pytest.approx(1 - probabilities[0], rel=1e-12)
+    assert result.mean_in_system == pytest.approx(mean_in_system, rel=1e-12)
+    # Формула Литтла
+    assert result.mean_time_in_system == pytest.approx(mean_in_system / throughput, rel=1e-12)
+
+
+@pytest.mark.parametrize("servers, offered_load", [(1, 0.5), (2, 1.0), (5, 4.2)])
+def test_erlang_b(servers, offered_load):
+    # M/M/c/c: формула Эрланга B
+    terms = [offered_load ** n / math.factorial(n) for n in range(servers + 1)]
+    result = mmck(offered_load / 2.0, 2.0, servers, servers)
+    assert result.rejection_probability == pytest.approx(terms[-1] / sum(terms), rel=1e-12)
+    assert result.mean_in_queue == 0.0 and result.mean_wait == 0.0
+
+
+def test_mm2k_queue_length():
+    # M/M/2/4, λ = 1, E[S] = 1: p(n) ∝ 1, 1, 1/2, 1/4, 1/8
+    weights = [1.0, 1.0, 0.5, 0.25, 0.125]
+    total = sum(weights)
+    result = mmck(1.0, 1.0, 2, 4)
+    assert result.rejection_probability == pytest.approx(0.125 / total)
+    assert result.mean_in_queue == pytest.approx((0.25 + 2 * 0.125) / total)
+    assert result.rho == 0.5
+
+
+def test_estimate_uses_exact_for_markovian_config():
+    config = ModelConfig(num_sources=2, num_devices=2, buffer_size=3, generation_interval=4.0, arrival="poisson",
+                         service_distribution="exponential")
+    result = estimate(config)
+    assert result.method == "exact"
+    reference = mmck(0.5, 2.0, 2, 5)
+    assert result.rejection_probability == pytest.approx(reference.rejection_probability, rel=1e-12)
+    # С единичными коэффициентами вариации оба приближения совпадают с точным решением
+    for method in ("allen_cunneen", "diffusion"):
+        approximate = mgck(0.5, 2.0, 2, 5, method=method)
+        assert approximate.rejection_probability == pytest.approx(reference.rejection_probability, rel=1e-12)
+        assert approximate.mean_wait == pytest.approx(reference.mean_wait, rel=1e-12)
+    assert estimate(config, method="diffusion").method == "diffusion"
+    with pytest.raises(ValueError):
+        mmck(1.0, 1.0, 3, 2)
@@ -0,0 +1,90 @@
+# tests/test_time_weighted.py
+"""
+LevelTimeIntegral на ступенчатой функции, посчитанной вручную, в том числе с отбрасыванием
+разгона (reset), и средние по времени всей модели против суммарного времени обслуживания.
+"""
+import pytest
+
+from src.config import ModelConfig, build_model
+from src.metrics.time_weighted import LevelTimeIntegral, TimeWeightedMetrics
+
+# Уровень 0 с t=0; 2 с t=1; 1 и сразу 4 в t=3 (уровень 1 длится 0); 0 с t=6. Наблюдение до t=10.
+STEPS = [(1.0, 2), (3.0, 1), (3.0, 4), (6.0, 0)]
+
+
+def _integral(steps, start=0.0):
+    integral = LevelTimeIntegral(start)
+    for now, level in steps:
+        integral.update(now, level)
+    return integral
+
+
+def test_step_function():
+    integral = _integral(STEPS)
+    # Площадь: 2 * (3 - 1) + 4 * (6 - 3) = 16
+    assert integral.area == pytest.approx(16.0)
+    assert integral.duration(10.0) == pytest.approx(10.0)
+    assert integral.mean(10.0) == pytest.approx(1.6)
+    assert integral.distribution(10.0) == pytest.approx([0.5, 0.0, 0.2, 0.0, 0.3])
+    assert integral.probability(4, 10.0) == pytest.approx(0.3)
+    assert integral.probability(7, 10.0) == 0.0
+    assert integral.max_level == 4
+    # Без now - до последнего изменения: хвост на уровне 0 не учитывается
+    assert integral.duration() == pytest.approx(6.0)
+    assert integral.mean() == pytest.approx(16.0 / 6.0)
+
+
+def test_tail_at_current_level():
+    integral = _integral(STEPS[:3])
+    # Уровень 4 держится с t=3 до момента наблюдения t=5
+    assert integral.mean(5.0) == pytest.approx((2 * 2 + 4 * 2) / 5.0)
+    assert integral.distribution(5.0) == pytest.approx([0.2, 0.0, 0.4, 0.0, 0.4])
+
+
+def test_reset_drops_warmup():
+    integral = _integral(STEPS[:1])
+    # Разгон до t=2 отброшен: остаются уровень 2 на [2, 3), 4 на [3, 6), 0 на [6, 10)
+    integral.reset(2.0)
+    assert integral.max_level == 2
+    for now, level in STEPS[1:]:
+        integral.update(now, level)
+    assert integral.start_time == 2.0
+    assert integral.duration(10.0) == pytest.approx(8.0)
+    assert integral.mean(10.0) == pytest.approx((2 * 1 + 4 * 3) / 8.0)
+    assert integral.distribution(10.0) == pytest.approx([0.5, 0.0, 0.125, 0.0, 0.375])
+    assert integral.max_level == 4
+
+
+def test_empty_interval():
+    integral = LevelTimeIntegral(5.0, level=3)
+    assert integral.mean(5.0) == 3.0
+    assert integral.distribution(5.0) == [0.0, 0.0, 0.0, 1.0]
+
+
+def test_model_device_busy_time_matches_service_time():
+    config = ModelConfig(num_sources=2, num_devices=2, buffer_size=3, generation_interval=1.5, tasks_per_source=2000)
+    model = build_model(config, seed=3)
+    dispatcher = model.dispatcher
+    metrics = TimeWeightedMetrics().attach(dispatcher)
+    dispatcher.run()
+    now = dispatcher.current_time
+    busy_time = sum(integral.mean(now) * integral.duration(now) for integral in metrics.devices.values())
+    service_time = sum(dispatcher.stats["total_service_time_by_source"].values())
+    assert busy_time == pytest.approx(service_time, rel=1e-9)
+    assert metrics.busy_devices.mean(now) * metrics.busy_devices.duration(now) == pytest.approx(service_time, rel=1e-9)
+    assert sum(metrics.buffer.distribution(now)) == pytest.approx(1.0)
+
+
+def test_reset_stats_restarts_integrals():
+    config = ModelConfig(num_sources=2, num_devices=1, buffer_size=3, generation_interval=1.5, tasks_per_source=2000)
+    dispatcher = build_model(config, seed=4).dispatcher
+    metrics = TimeWeightedMetrics().attach(dispatcher)
+    dispatcher.run(until_time=500.0)
+    warmup = dispatcher.current_time
+    dispatcher.reset_stats()
+    dispatcher.run(until_time=1500.0)
+    now = dispatcher.current_time
+    for integral in metrics.integrals():
+        assert integral.start_time == warmup
+        assert integral.duration(now) == pytest.approx(now - warmup)
+    assert 0.0 < metrics.devices[1].mean(now) <= 1.0
@@ -0,0 +1,69 @@
+# tests/test_variance_reduction.py
+"""Оценки сравнения конфигураций: метрики реплики, контрольные переменные, общие случайные числа."""
+import math
+import random
+from dataclasses import replace
+from statistics import fmean, stdev
+
+import pytest
+
+from src.config import ModelConfig, build_model
+from src.experiments.variance_reduction import compare, control_variate_estimate, simulate
+from src.metrics.confidence import student_t_quantile
+
+LOSSY = ModelConfig(num_sources=2, num_devices=1, buffer_size=3, generation_interval=1.6, arrival="poisson",
+                    tasks_per_source=10 ** 9, service_per_order=True)
+
+
+def test_simulate_system_time_counts_completed_orders_only():
+    output = simulate(LOSSY, seed=3, replication=0, warmup=100.0, horizon=2000.0)
+    model = build_model(LOSSY, seed=3, replication=0)
+    model.dispatcher.run(until_time=100.0)
+    model.dispatcher.reset_stats()
+    model.dispatcher.run(until_time=2100.0)
+    stats = model.dispatcher.stats
+    real = [sid for sid in stats["system_times"] if sid >= 0]
+    completed = sum(stats["system_times"][sid].count for sid in real)
+    expected = sum(stats["system_times"][sid].mean * stats["system_times"][sid].count for sid in real) / completed
+    generated = sum(stats["generated_by_source"][sid] for sid in real)
+    assert sum(stats["rejected_by_source"][sid] for sid in real) > 0.1 * generated
+    assert output.metrics["system_time"] == pytest.approx(expected)
+    assert output.metrics["rejection"] == pytest.approx(
+        sum(stats["rejected_by_source"][sid] for sid in real) / generated)
+    assert output.orders == generated
+
+
+def test_control_variate_estimate_without_controls_is_t_interval():
+    values = [1.0, 2.5, 0.5, 3.0, 2.0, 1.5]
+    mean, half_width, variance, used = control_variate_estimate(values, [])
+    assert used == 0
+    assert mean == pytest.approx(fmean(values))
+    assert variance == pytest.approx(stdev(values) ** 2)
+    assert half_width == pytest.approx(student_t_quantile(0.975, 5) * stdev(values) / math.sqrt(6))
+
+
+def test_control_variate_removes_linear_noise():
+    rng = random.Random(5)
+    control = [rng.gauss(0.0, 1.0) for _ in range(40)]
+    noise = [rng.gauss(0.0, 0.01) for _ in range(40)]
+    values = [5.0 + 2.0 * c + e for c, e in zip(control, noise)]
+    # Повторенный столбец коллинеарен и отбрасывается
+    mean, half_width, variance, used = control_variate_estimate(values, [control, list(control)])
+    assert used == 1
+    # Скорректированные значения - 5 плюс шум и сдвиг на отклонение выборочного среднего контрольной
+    adjusted_mean = fmean(values) - 2.0 * fmean(control)
+    assert mean == pytest.approx(adjusted_mean, abs=0.01)
+    assert variance == pytest.approx(0.01 ** 2, rel=0.6)
+    assert half_width < 0.01
+    plain = control_variate_estimate(values, [])
+    assert plain[2] > 1000 * variance
+
+
+def test_common_random_numbers_cancel_identical_configurations():
+    result = compare(LOSSY, replace(LOSSY), observations=4, methods=("independent", "crn"),
+                     warmup=50.0, horizon=300.0, workers=1)
+    by_name = {r.name: r for r in result.results}
+    # Одинаковые конфигурации на общих числах дают одинаковые прогоны: разность ровно 0
+    assert by_name["crn"].mean == {"rejection": 0.0, "system_time": 0.0}
+    assert by_name["crn"].variance == {"rejection": 0.0, "system_time": 0.0}
+    assert by_name["independent"].variance["system_time"] > 0.0